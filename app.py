@@ -1,27 +1,163 @@
 import streamlit as st
-import difflib
+import collections
 import json
-import xmltodict
-import pandas as pd
-from formatter import (
-    format_json, format_xml, format_yaml, format_csv,
-    format_toml, format_ini, format_markdown, format_html,
-    format_sql, format_python,
-    validate_json_schema, validate_xml_xsd, lint_yaml
-)
-from tree_viewer import show_tree
+import time
+import cache
+import incremental
+import isolation
+import jobs
+import diff_engine
+import diff_view
+import struct_diff
+import registry
+import tracing
+import uploads
+from formatter import json_to_xml, xml_to_json, json_to_toml, json_to_toon, toon_to_json, schema_cache_stats
+from tree_viewer import show_tree, parse_job
 
 # ---------------- Session state init ----------------
 for key in ["raw_text_value", "diff_original", "diff_modified"]:
     if key not in st.session_state:
         st.session_state[key] = ""
 
+JOB_KEYS = ["format_job", "validate_job", "convert_job", "tree_job"]
+
+# ---------------- Stage timing (hidden debug panel) ----------------
+# Open the app with ?debug=1, or set NEATIFY_TRACE=1, to record per-run
+# stage timings (tracing.py). Otherwise no trace is bound and spans are no-ops.
+TRACE_RUNS = 20
+DEBUG = tracing.enabled_by_env() or st.query_params.get("debug") == "1"
+if DEBUG:
+    history = st.session_state.setdefault("traces", collections.deque(maxlen=TRACE_RUNS))
+    previous = st.session_state.get("trace")
+    # Runs that recorded nothing (job polling) are dropped; a run that
+    # submitted a job keeps receiving that job's spans after it ends.
+    if previous is not None and previous.events and previous not in history:
+        history.append(previous)
+    capture = st.session_state.get("trace_capture")
+    st.session_state.trace_run = st.session_state.get("trace_run", 0) + 1
+    st.session_state.trace = tracing.Trace(
+        f"{st.session_state.get('section', 'Introduction')} #{st.session_state.trace_run}",
+        capture if capture is not None and capture.span is None else None)
+tracing.bind(st.session_state.trace if DEBUG else None)
+
+UPLOAD_KEYS = ["format_upload", "convert_upload", "orig_upload", "mod_upload", "csv_upload"]
+
+def receive_upload(uploaded_file, key):
+    """The uploads.Upload for a file uploader, spooled once per uploaded file.
+
+    Returns (upload, new); new is True on the run that spooled it.
+    """
+    upload = st.session_state.get(key)
+    if upload is not None and upload.name == uploaded_file.file_id:
+        return upload, False
+    drop_upload(key)
+    with tracing.span("upload.spool") as span:
+        upload = uploads.spool(uploaded_file, name=uploaded_file.file_id)
+        span.set(out=upload.size, encoding=upload.encoding, on_disk=upload.on_disk)
+    st.session_state[key] = upload
+    return upload, True
+
+def drop_upload(key):
+    upload = st.session_state.pop(key, None)
+    if upload is not None:
+        upload.close()
+
+def decode_upload(upload):
+    with tracing.span("upload.decode", encoding=upload.encoding) as span:
+        text = upload.text()
+        span.set(out=len(text))
+    return text
+
+def read_upload(uploaded_file, key):
+    """Decoded text of an uploaded file (spooled once, see receive_upload)."""
+    return decode_upload(receive_upload(uploaded_file, key)[0])
+
+def attach_upload(uploaded_file, key, text_key):
+    """Spool a section's upload; returns it if it is too large for the text area.
+
+    Smaller uploads are decoded into the text area once, when they arrive,
+    so edits made there afterwards are kept.
+    """
+    if uploaded_file is None:
+        drop_upload(key)
+        return None
+    upload, new = receive_upload(uploaded_file, key)
+    if upload.large:
+        return upload
+    if new:
+        st.session_state[text_key] = decode_upload(upload)
+    return None
+
+def show_large_upload(upload, file_name, language):
+    st.info(f"{file_name} is {upload.size / (1 << 20):,.1f} MB ({upload.encoding}), too large to edit "
+            "here, so it is processed straight from the upload. Its beginning:")
+    st.code(upload.preview(), language=language)
+
+def current_text(upload, key):
+    """The input to process: a large upload's text, or the text area's."""
+    return decode_upload(upload) if upload is not None else st.session_state[key]
+
+def show_code(text, language, line_numbers=False):
+    """st.code, showing only the beginning of very large outputs."""
+    if len(text) > uploads.LARGE_BYTES:
+        st.caption(f"Showing the first {uploads.PREVIEW_CHARS:,} of {len(text):,} characters; "
+                   "download the file for all of it.")
+        text = text[:uploads.PREVIEW_CHARS]
+    with tracing.span("render.code", text, capture=True):
+        st.code(text, language=language, line_numbers=line_numbers)
+
+def drop_job(key):
+    """Forget the background job held under a session-state key.
+
+    The job is cancelled unless another session still holds it (jobs.Job.release).
+    """
+    pending = st.session_state.pop(key, None)
+    if pending is not None:
+        pending[-1].release()
+
+def poll_job(key, label):
+    """Show progress for the job under key, rerunning until it is done.
+
+    Returns the finished session-state entry (a tuple ending with the Job,
+    removed from state), or None when there is no job.
+    """
+    pending = st.session_state.get(key)
+    if pending is None:
+        return None
+    job = pending[-1]
+    if not job.done():
+        status = f"{label}… {job.elapsed:.1f}s"
+        if job.progress is None:
+            st.info(status)
+        else:
+            st.progress(job.progress, text=status)
+        st.button("Cancel", key=f"{key}_cancel", on_click=drop_job, args=(key,), icon=":material/cancel:")
+        time.sleep(jobs.POLL_SECONDS)
+        st.rerun()
+    return st.session_state.pop(key)
+
+# Start the backend worker processes once per server, so the first
+# Python/SQL/HTML/YAML-lint call does not pay for spawning and imports.
+isolation.default_pool()
+
 def clear_text(key="raw_text_value"):
     st.session_state[key] = ""   # reset the bound key
+    st.session_state.pop("format_result", None)
+    st.session_state.pop("tree_data", None)
+    for job_key in JOB_KEYS:
+        drop_job(job_key)
 
 def clear_on_section_change():
     for key in ["raw_text_value", "diff_original", "diff_modified"]:
         st.session_state[key] = ""
+    st.session_state.pop("diff_result", None)
+    st.session_state.pop("format_result", None)
+    st.session_state.pop("tree_data", None)
+    for job_key in JOB_KEYS:
+        drop_job(job_key)
+    for upload_key in UPLOAD_KEYS:
+        drop_upload(upload_key)
 
 # ---------------- Page config ----------------
 st.set_page_config(page_title="Multi-Format Formatter", layout="wide")
@@ -72,7 +208,7 @@ if section == "Introduction":
 if section == "Formatter":
     fmt_type = st.sidebar.radio(
         "Choose format type:",
-        ["JSON", "XML", "YAML", "CSV", "TOML", "INI", "Markdown", "HTML", "SQL", "Python"],
+        registry.formatter_names(),
         key="fmt_type",
         on_change=clear_on_section_change
     )
@@ -81,82 +217,118 @@ if section == "Formatter":
 
     uploaded_file = st.file_uploader(
         "Upload a file",
-        type=["json","xml","yaml","yml","csv","txt","toml","ini","cfg","md","html","sql","py"]
+        type=registry.extensions() + ["txt"]
     )
-    if uploaded_file is not None:
-        st.session_state.raw_text_value = uploaded_file.read().decode("utf-8")
-
-    raw_text = st.text_area("Or paste your content here:", height=300, key="raw_text_value")
+    big = attach_upload(uploaded_file, "format_upload", "raw_text_value")
+    if big is not None:
+        show_large_upload(big, uploaded_file.name, registry.get_formatter(fmt_type).language)
+    else:
+        raw_text = st.text_area("Or paste your content here:", height=300, key="raw_text_value")
+    if registry.get_formatter(fmt_type).incremental and incremental.supports(fmt_type):
+        st.checkbox("Incremental: re-format only the blocks that changed", value=True, key="incremental",
+                    help="Output is identical to a full re-format; unchanged blocks come from a cache.")
 
     btn_col1, btn_col2 = st.columns([1, 1])
     format_clicked = btn_col1.button("Format", type="primary", icon=":material/tune:")
     btn_col2.button("Clear", on_click=lambda: clear_text("raw_text_value"), type="primary", icon=":material/delete:")
 
     if format_clicked:
-        text = st.session_state.raw_text_value.strip()
-        if text == "":
+        source = big if big is not None else st.session_state.raw_text_value.strip()
+        st.session_state.pop("format_result", None)
+        drop_job("format_job")
+        if big is None and source == "":
             st.warning("Please provide content via upload or paste.")
         else:
             try:
-                if fmt_type == "JSON":
-                    formatted = format_json(text)
-                elif fmt_type == "XML":
-                    formatted = format_xml(text)
-                elif fmt_type == "YAML":
-                    formatted = format_yaml(text)
-                elif fmt_type == "CSV":
-                    formatted = format_csv(text)
-                elif fmt_type == "TOML":
-                    formatted = format_toml(text)
-                elif fmt_type == "INI":
-                    formatted = format_ini(text)
-                elif fmt_type == "Markdown":
-                    formatted = format_markdown(text)
-                elif fmt_type == "HTML":
-                    formatted = format_html(text)
-                elif fmt_type == "SQL":
-                    formatted = format_sql(text)
-                elif fmt_type == "Python":
-                    formatted = format_python(text)
-
-                st.success(f"Formatted {fmt_type} successfully:")
-                st.code(formatted, language=fmt_type.lower(), line_numbers=True)
-
-                st.download_button(
-                    label=f"Download formatted {fmt_type}",
-                    data=formatted,
-                    file_name=f"formatted.{fmt_type.lower()}",
-                    mime="text/plain", icon=":material/file_download:",
-                    type="primary"
-                )
-
-                if fmt_type in ["JSON", "XML", "YAML", "TOML", "INI"]:
-                    st.subheader("🌳 Tree Viewer")
-                    show_tree(text, fmt_type)
-
+                # Runs off the script thread; the handle survives reruns.
+                backend = registry.get_formatter(fmt_type)
+                stream = backend.load_stream()
+                # Streaming formatters read a large upload directly; the rest need its text.
+                text = decode_upload(big) if big is not None and stream is None else source
+                if backend.incremental and st.session_state.get("incremental"):
+                    job = jobs.submit(f"format:{fmt_type}", incremental.format_document, text, fmt_type,
+                                      version=backend.version())
+                else:
+                    job = jobs.submit(f"format:{fmt_type}", stream or backend, text, version=backend.version(),
+                                      stream=stream is not None, isolate=backend.isolated)
+                st.session_state.format_job = (fmt_type, source, job)
             except Exception as e:
                 st.error(f"Error formatting {fmt_type}: {e}")
 
+    pending = poll_job("format_job", f"Formatting {fmt_type}")
+    if pending:
+        fmt, text, job = pending
+        try:
+            st.session_state.format_result = (fmt, text, job.result())
+        except jobs.Cancelled:
+            st.info("Formatting cancelled.")
+        except Exception as e:
+            st.error(f"Error formatting {fmt}: {e}")
+
+    # Kept in session state so tree navigation (which reruns the script)
+    # does not lose the formatted output.
+    result = st.session_state.get("format_result")
+    if result and result[0] == fmt_type:
+        _, text, formatted = result
+        backend = registry.get_formatter(fmt_type)
+
+        st.success(f"Formatted {fmt_type} successfully:")
+        show_code(formatted, backend.language, line_numbers=True)
+
+        st.download_button(
+            label=f"Download formatted {fmt_type}",
+            data=formatted,
+            file_name=f"formatted.{fmt_type.lower()}",
+            mime="text/plain", icon=":material/file_download:",
+            type="primary"
+        )
+
+        if backend.tree and isinstance(text, uploads.Upload):
+            st.caption("The tree viewer is not available for uploads too large for the text area.")
+        elif backend.tree:
+            st.subheader("🌳 Tree Viewer")
+            # The parse job is held here rather than looked up in the result
+            # cache, which may not keep a large parsed document.
+            tree = st.session_state.get("tree_job")
+            if tree is None or tree[0] != fmt_type or tree[1] is not text:
+                drop_job("tree_job")
+                tree = st.session_state.tree_job = (fmt_type, text, parse_job(text, fmt_type))
+            if tree[-1].done():
+                show_tree(text, fmt_type, tree[-1])
+            else:
+                st.info("Building tree…")
+                time.sleep(jobs.POLL_SECONDS)
+                st.rerun()
+
     # Validation tools
     st.markdown("---")
     st.subheader("🔍 Validation / Linting")
-    if fmt_type == "JSON":
-        schema_text = st.text_area("Paste JSON Schema (optional):", key="json_schema")
-        if st.button("Validate JSON", type="primary", icon=":material/fact_check:"):
+    validator = registry.get_validator(fmt_type)
+    if validator is not None and validator.schema_label:
+        schema_text = st.text_area(validator.schema_label, key=f"{fmt_type.lower()}_schema")
+        if st.button(validator.button_label, type="primary", icon=":material/fact_check:"):
             if schema_text.strip():
-                st.info(validate_json_schema(st.session_state.raw_text_value, schema_text))
+                drop_job("validate_job")
+                st.session_state.validate_job = (jobs.submit(
+                    f"validate:{fmt_type}", validator, current_text(big, "raw_text_value"),
+                    schema_text, version=validator.version(), isolate=validator.isolated),)
             else:
-                st.warning("Please provide a JSON Schema to validate against.")
-    elif fmt_type == "XML":
-        xsd_text = st.text_area("Paste XSD Schema (optional):", key="xml_xsd")
-        if st.button("Validate XML", type="primary", icon=":material/fact_check:"):
-            if xsd_text.strip():
-                st.info(validate_xml_xsd(st.session_state.raw_text_value, xsd_text))
-            else:
-                st.warning("Please provide an XSD Schema to validate against.")
-    elif fmt_type == "YAML":
-        if st.button("Lint YAML", type="primary"):
-            st.info(lint_yaml(st.session_state.raw_text_value))
+                st.warning("Please provide a schema to validate against.")
+    elif validator is not None:
+        if st.button(validator.button_label, type="primary"):
+            drop_job("validate_job")
+            st.session_state.validate_job = (jobs.submit(
+                f"validate:{fmt_type}", validator, current_text(big, "raw_text_value"),
+                version=validator.version(), isolate=validator.isolated),)
+
+    pending = poll_job("validate_job", "Validating")
+    if pending:
+        try:
+            st.info(pending[-1].result())
+        except jobs.Cancelled:
+            st.info("Validation cancelled.")
+        except Exception as e:
+            st.error(f"Validation failed: {e}")
 
 # ---------------- Diff Viewer Section ----------------
 
@@ -166,9 +338,9 @@ elif section == "Diff Viewer":
     # Upload buttons
     col1, col2 = st.columns(2)
     with col1:
-        original_file = st.file_uploader("Upload Original File", type=["txt", "csv", "json", "xml"], key="orig_file")
+        original_file = st.file_uploader("Upload Original File", type=["txt", "csv", "json", "xml", "yaml", "yml", "toml"], key="orig_file")
     with col2:
-        modified_file = st.file_uploader("Upload Modified File", type=["txt", "csv", "json", "xml"], key="mod_file")
+        modified_file = st.file_uploader("Upload Modified File", type=["txt", "csv", "json", "xml", "yaml", "yml", "toml"], key="mod_file")
 
     # Fallback text areas
     st.markdown("### Or paste content directly below:")
@@ -182,171 +354,200 @@ elif section == "Diff Viewer":
     original_text = ""
     modified_text = ""
     if original_file is not None:
-        original_text = original_file.read().decode("utf-8")
+        original_text = read_upload(original_file, "orig_upload")
     else:
+        drop_upload("orig_upload")
         original_text = original_text_area
 
     if modified_file is not None:
-        modified_text = modified_file.read().decode("utf-8")
+        modified_text = read_upload(modified_file, "mod_upload")
     else:
+        drop_upload("mod_upload")
         modified_text = modified_text_area
 
     # Choose diff mode
-    diff_mode = st.radio("Choose diff mode:", ["Unified (Git-style)", "Line-by-Line"], horizontal=True)
+    diff_mode = st.radio("Choose diff mode:", ["Unified (Git-style)", "Line-by-Line", "Structural"], horizontal=True)
+    if diff_mode == "Structural":
+        struct_fmt = st.selectbox("Document format:", struct_diff.FORMATS, key="struct_fmt")
+        list_key = st.text_input("Match list items by key (optional, e.g. id):", key="struct_list_key")
+    else:
+        diff_algorithm = st.selectbox("Diff algorithm:", list(diff_engine.ENGINES), key="diff_algorithm")
 
     if st.button("Show Diff", type="primary"):
         if not original_text.strip() or not modified_text.strip():
             st.warning("Please provide both original and modified content (via upload or paste).")
+            st.session_state.pop("diff_result", None)
+        elif diff_mode == "Structural":
+            try:
+                ops = struct_diff.diff_documents(original_text, modified_text, struct_fmt,
+                                                 list_key=list_key.strip() or None)
+                if not ops:
+                    st.success("No semantic differences.")
+                else:
+                    st.write(f"{len(ops)} changes" + (" (showing first 1000)" if len(ops) > 1000 else ""))
+                    st.dataframe(
+                        [{"op": op["op"], "path": op["path"],
+                          "old": json.dumps(op.get("old"), default=str)[:200] if "old" in op else "",
+                          "new": json.dumps(op.get("value"), default=str)[:200] if "value" in op else ""}
+                         for op in ops[:1000]],
+                        use_container_width=True
+                    )
+                    st.download_button("Download patch (JSON)", json.dumps(ops, indent=4, default=str),
+                                       "diff.json", "application/json", type="primary",
+                                       icon=":material/file_download:")
+            except Exception as e:
+                st.error(f"Structural diff failed: {e}")
         else:
-            if diff_mode == "Unified (Git-style)":
-                diff = difflib.unified_diff(
-                    original_text.splitlines(),
-                    modified_text.splitlines(),
-                    fromfile="Original",
-                    tofile="Modified",
-                    lineterm=""
-                )
-                diff_lines = list(diff)
-
-                highlighted = []
-                for line in diff_lines:
-                    if line.startswith("+") and not line.startswith("+++"):
-                        highlighted.append(f"<span style='background-color:#e6ffed'>{line}</span>")
-                    elif line.startswith("-") and not line.startswith("---"):
-                        highlighted.append(f"<span style='background-color:#ffe6e6'>{line}</span>")
-                    else:
-                        highlighted.append(line)
-
-                st.markdown(
-                    "<pre style='font-family:monospace'>" + "\n".join(highlighted) + "</pre>",
-                    unsafe_allow_html=True
-                )
-
-            elif diff_mode == "Line-by-Line":
-                orig_lines = original_text.splitlines()
-                mod_lines = modified_text.splitlines()
-                max_len = max(len(orig_lines), len(mod_lines))
-
-                rows = []
-                for i in range(max_len):
-                    orig_line = orig_lines[i] if i < len(orig_lines) else ""
-                    mod_line = mod_lines[i] if i < len(mod_lines) else ""
-
-                    if orig_line == mod_line:
-                        rows.append(
-                            f"<tr><td style='background-color:#f0f0f0'>{orig_line}</td>"
-                            f"<td style='background-color:#f0f0f0'>{mod_line}</td></tr>"
-                        )
-                    else:
-                        sm = difflib.SequenceMatcher(None, orig_line, mod_line)
-                        orig_highlight, mod_highlight = "", ""
-                        for tag, i1, i2, j1, j2 in sm.get_opcodes():
-                            if tag == "equal":
-                                orig_highlight += orig_line[i1:i2]
-                                mod_highlight += mod_line[j1:j2]
-                            elif tag == "replace":
-                                orig_highlight += f"<span style='background-color:#ffe6e6'>{orig_line[i1:i2]}</span>"
-                                mod_highlight += f"<span style='background-color:#e6ffed'>{mod_line[j1:j2]}</span>"
-                            elif tag == "delete":
-                                orig_highlight += f"<span style='background-color:#ffe6e6'>{orig_line[i1:i2]}</span>"
-                            elif tag == "insert":
-                                mod_highlight += f"<span style='background-color:#e6ffed'>{mod_line[j1:j2]}</span>"
-
-                        rows.append(
-                            f"<tr><td>{orig_highlight}</td><td>{mod_highlight}</td></tr>"
-                        )
-
-                html_table = (
-                    "<table style='width:100%; font-family:monospace; border-collapse:collapse;'>"
-                    "<tr><th style='text-align:left'>Original</th><th style='text-align:left'>Modified</th></tr>"
-                    + "".join(rows)
-                    + "</table>"
-                )
-
-                st.markdown(html_table, unsafe_allow_html=True)
+            # Keep the diff in session state so paging through it does not re-diff.
+            st.session_state.diff_result = diff_engine.diff_lines(
+                original_text.splitlines(),
+                modified_text.splitlines(),
+                algorithm=diff_algorithm
+            )
+            st.session_state.diff_page = 1
+
+    result = st.session_state.get("diff_result")
+    if result is not None and diff_mode != "Structural":
+        if not result.exact:
+            st.info("Inputs are too different to diff within the time budget; "
+                    "some changes are shown as whole replaced blocks.")
+        layout = "unified" if diff_mode == "Unified (Git-style)" else "split"
+        view = diff_view.DiffView(result, layout=layout)
+
+        if view.page_count > 1:
+            def go_to_hunk(step):
+                shown = view.hunks_on_page(st.session_state.diff_page - 1)
+                target = shown[-1] + 1 if step > 0 else shown[0] - 1
+                target = min(max(target, 0), len(view.hunks) - 1)
+                st.session_state.diff_page = view.page_of_hunk(target) + 1
+
+            nav1, nav2, nav3 = st.columns([2, 1, 1])
+            nav1.number_input(f"Page (of {view.page_count})", min_value=1,
+                              max_value=view.page_count, key="diff_page")
+            nav2.button("◀ Previous hunk", on_click=go_to_hunk, args=(-1,))
+            nav3.button("Next hunk ▶", on_click=go_to_hunk, args=(1,))
+        page = min(st.session_state.get("diff_page", 1), max(view.page_count, 1)) - 1
+        if view.hunks:
+            shown = view.hunks_on_page(page)
+            st.caption(f"{len(view.hunks)} hunks · showing hunk {shown[0] + 1}"
+                       + (f"–{shown[-1] + 1}" if len(shown) > 1 else ""))
+        st.markdown(view.render(page), unsafe_allow_html=True)
 
 # ---------------- Multi-Format Conversion Section ----------------
 elif section == "Multi-Format Conversion":
     st.title("🔄 Multi-Format Conversion (JSON ↔ XML ↔ TOML ↔ TOON)")
-    uploaded_file = st.file_uploader("Upload JSON, XML, or TOML file", type=["json","xml","toml","txt"])
-    if uploaded_file is not None:
-        st.session_state.raw_text_value = uploaded_file.read().decode("utf-8")
-
-    raw_text = st.text_area("Paste JSON, XML, or TOML:", height=400, key="raw_text_value")
+    uploaded_file = st.file_uploader("Upload JSON, XML, TOML, or TOON file", type=["json","xml","toml","toon","txt"])
+    big = attach_upload(uploaded_file, "convert_upload", "raw_text_value")
+    if big is not None:
+        show_large_upload(big, uploaded_file.name, "text")
+    else:
+        raw_text = st.text_area("Paste JSON, XML, TOML, or TOON:", height=400, key="raw_text_value")
     st.button("Clear", on_click=lambda: clear_text("raw_text_value"), type="primary", icon=":material/delete:")
 
-    col1, col2, col3, col4 = st.columns([1,1,1,1])
+    col1, col2, col3, col4, col5 = st.columns([1,1,1,1,1])
 
     # JSON → XML
     if col1.button("Convert JSON → XML", type="primary", icon=":material/swap_horiz:"):
-        try:
-            obj = json.loads(st.session_state.raw_text_value)
-            xml_str = xmltodict.unparse({"root": obj}, pretty=True)
-            st.success("Converted JSON to XML:")
-            st.code(xml_str, language="xml")
-            st.download_button("Download XML", xml_str, "converted.xml", "text/xml", type="primary", icon=":material/file_download:")
-        except Exception as e:
-            st.error(f"Conversion failed: {e}")
+        drop_job("convert_job")
+        st.session_state.convert_job = ("JSON", "XML", "xml", "converted.xml", "text/xml", jobs.submit(
+            "convert:json-xml", json_to_xml, current_text(big, "raw_text_value"),
+            version=registry.package_version("xmltodict")))
 
     # XML → JSON
     if col2.button("Convert XML → JSON", type="primary", icon=":material/swap_horiz:"):
-        try:
-            obj = xmltodict.parse(st.session_state.raw_text_value)
-            json_str = json.dumps(obj, indent=4)
-            st.success("Converted XML to JSON:")
-            st.code(json_str, language="json")
-            st.download_button("Download JSON", json_str, "converted.json", "application/json", type="primary", icon=":material/file_download:")
-        except Exception as e:
-            st.error(f"Conversion failed: {e}")
+        drop_job("convert_job")
+        st.session_state.convert_job = ("XML", "JSON", "json", "converted.json", "application/json", jobs.submit(
+            "convert:xml-json", xml_to_json, current_text(big, "raw_text_value"),
+            version=registry.package_version("xmltodict")))
 
     # JSON → TOML
     if col3.button("Convert JSON → TOML", type="primary", icon=":material/swap_horiz:"):
-        try:
-            obj = json.loads(st.session_state.raw_text_value)
-            import toml
-            toml_str = toml.dumps(obj)
-            st.success("Converted JSON to TOML:")
-            st.code(toml_str, language="toml")
-            st.download_button("Download TOML", toml_str, "converted.toml", "text/plain", type="primary", icon=":material/file_download:")
-        except Exception as e:
-            st.error(f"Conversion failed: {e}")
+        drop_job("convert_job")
+        st.session_state.convert_job = ("JSON", "TOML", "toml", "converted.toml", "text/plain", jobs.submit(
+            "convert:json-toml", json_to_toml, current_text(big, "raw_text_value"),
+            version=registry.package_version("toml")))
 
-    # JSON → TOON (stub implementation)
+    # JSON → TOON
     if col4.button("Convert JSON → TOON", type="primary", icon=":material/swap_horiz:"):
+        drop_job("convert_job")
+        st.session_state.convert_job = ("JSON", "TOON", "text", "converted.toon", "text/plain", jobs.submit(
+            "convert:json-toon", json_to_toon, current_text(big, "raw_text_value")))
+
+    # TOON → JSON
+    if col5.button("Convert TOON → JSON", type="primary", icon=":material/swap_horiz:"):
+        drop_job("convert_job")
+        st.session_state.convert_job = ("TOON", "JSON", "json", "converted.json", "application/json", jobs.submit(
+            "convert:toon-json", toon_to_json, current_text(big, "raw_text_value")))
+
+    pending = poll_job("convert_job", "Converting")
+    if pending:
+        source, target, language, file_name, mime, job = pending
         try:
-            obj = json.loads(st.session_state.raw_text_value)
-            if isinstance(obj, list) and all(isinstance(d, dict) for d in obj):
-                keys = list(obj[0].keys())
-                toon_lines = [f"{len(obj)} " + " ".join(keys)]
-                for item in obj:
-                    toon_lines.append(" ".join(str(item.get(k, "")) for k in keys))
-                toon_str = "\n".join(toon_lines)
-                st.success("Converted JSON to TOON:")
-                st.code(toon_str, language="text")
-                st.download_button("Download TOON", toon_str, "converted.toon", "text/plain", type="primary", icon=":material/file_download:")
-            else:
-                st.warning("TOON demo currently supports only arrays of objects with identical keys.")
+            converted = job.result()
+            st.success(f"Converted {source} to {target}:")
+            show_code(converted, language)
+            st.download_button(f"Download {target}", converted, file_name, mime, type="primary", icon=":material/file_download:")
+        except jobs.Cancelled:
+            st.info("Conversion cancelled.")
         except Exception as e:
             st.error(f"Conversion failed: {e}")
 
-
 elif section == "CSV Analysis":
     st.title("📊 CSV Data Analysis")
+    import charts
+    import csv_cache
+    import csv_stats
+
+    with st.sidebar.expander("Chart settings"):
+        numeric_chart = st.radio("Numeric columns", ["Histogram", "Row series"], key="csv_numeric_chart")
+        bins = st.slider("Histogram bins", 10, 200, charts.DEFAULT_BINS, key="csv_bins")
+        points = st.slider("Series point budget", 100, charts.MAX_POINTS, charts.DEFAULT_POINTS,
+                           step=100, key="csv_points")
+    with st.sidebar.expander("CSV cache"):
+        st.json(csv_cache.stats())
 
     uploaded_file = st.file_uploader("Upload a CSV file", type=["csv"])
     if uploaded_file is not None:
         try:
-            df = pd.read_csv(uploaded_file)
-
-            st.success("CSV uploaded successfully!")
+            upload, _ = receive_upload(uploaded_file, "csv_upload")
+            # The file is streamed in chunks once; summaries are kept per
+            # upload, and with NEATIFY_CSV_CACHE_DIR set they are also cached on
+            # disk by content hash next to a Parquet copy (csv_cache), so
+            # re-uploads and other sessions skip the parse.
+            entry = st.session_state.get("csv_analysis")
+            if entry is None or entry.key != csv_cache.key(upload.sha256):
+                entry = csv_cache.load(upload.sha256)
+            if entry is None:
+                bar = st.progress(0.0, text="Analyzing CSV…")
+
+                def report(fraction, rows):
+                    bar.progress(fraction or 0.0, text=f"Analyzing CSV… {rows:,} rows")
+
+                trackers = {
+                    "salary_by_team": csv_stats.GroupMean("Team", "Salary"),
+                    "top_salaries": csv_stats.TopRows("Salary", 10),
+                    "players": csv_stats.GroupMembers("Team", "Name"),
+                    "series": charts.SeriesSampler(),
+                }
+                with upload.open_binary() as f:
+                    entry = csv_cache.build(upload.sha256, f, trackers, progress=report,
+                                            encoding=upload.encoding)
+                bar.empty()
+            st.session_state.csv_analysis = entry
+            result, trackers = entry.analysis, entry.trackers
+            columns = result.columns
+
+            st.success(f"CSV uploaded successfully! ({result.rows:,} rows)")
 
             # Preview
             st.subheader("🔎 Data Preview")
-            st.dataframe(df.head(10), use_container_width=True)
+            st.dataframe(result.preview, use_container_width=True)
 
             # Summary stats
             st.subheader("📈 Summary Statistics")
-            st.write(df.describe(include="all"))
+            st.write(result.describe())
+            if result.approximate:
+                st.caption("Quartiles, unique counts and top values are approximate for this file size.")
             st.markdown("""
             **Explanation of statistics:**
             - count: number of non-null entries
@@ -359,43 +560,94 @@ elif section == "CSV Analysis":
 
             # Column-wise insights
             st.subheader("📋 Column Insights")
-            for col in df.columns:
+            for col, stats in columns.items():
                 st.write(f"**{col}**")
-                if pd.api.types.is_numeric_dtype(df[col]):
-                    st.write(f"- Numeric column with mean = {df[col].mean():.2f}, std = {df[col].std():.2f}")
-                    st.bar_chart(df[col].dropna())
+                if stats.numeric:
+                    st.write(f"- Numeric column with mean = {stats.moments.mean:.2f}, std = {stats.moments.std:.2f}")
+                    if stats.moments.count:
+                        if numeric_chart == "Histogram":
+                            st.bar_chart(entry.histogram(col, bins))
+                        else:
+                            st.line_chart(trackers["series"].result(col, points))
                 else:
-                    st.write(f"- Categorical column with {df[col].nunique()} unique values")
-                    st.bar_chart(df[col].value_counts())
+                    st.write(f"- Categorical column with {stats.distinct.estimate()} unique values")
+                    st.bar_chart(charts.top_values(stats.frequent.most_common(bins), bins))
 
             # Extra analytics if certain columns exist
-            if "Salary" in df.columns:
-                max_salary_row = df.loc[df["Salary"].idxmax()]
-                st.subheader("💰 Highest Salary")
-                st.write(f"{max_salary_row['Name']} ({max_salary_row['Team']}) — ${max_salary_row['Salary']:,.0f}")
+            if "Salary" in columns and columns["Salary"].numeric:
+                top10 = trackers["top_salaries"].result()
+                if not top10.empty and {"Name", "Team"} <= set(top10.columns):
+                    max_salary_row = top10.iloc[0]
+                    st.subheader("💰 Highest Salary")
+                    st.write(f"{max_salary_row['Name']} ({max_salary_row['Team']}) — ${max_salary_row['Salary']:,.0f}")
 
                 st.subheader("💵 Salary Distribution")
-                st.bar_chart(df["Salary"].dropna())
+                st.bar_chart(entry.histogram("Salary", bins))
 
-                st.subheader("📊 Average Salary per Group")
-                avg_salary = df.groupby("Team")["Salary"].mean().sort_values(ascending=False)
-                st.bar_chart(avg_salary)
+                if "Team" in columns:
+                    st.subheader("📊 Average Salary per Group")
+                    st.bar_chart(trackers["salary_by_team"].result().head(bins))
 
-                st.subheader("🏆 Top 10 Highest Paid")
-                top10 = df.nlargest(10, "Salary")[["Name", "Salary"]].set_index("Name")
-                st.bar_chart(top10)
+                if "Name" in top10.columns:
+                    st.subheader("🏆 Top 10 Highest Paid")
+                    st.bar_chart(top10[["Name", "Salary"]].set_index("Name"))
 
-            if "Team" in df.columns:
+            if "Team" in columns:
                 st.subheader("🏀 Players per Team")
-                st.bar_chart(df["Team"].value_counts())
+                st.bar_chart(charts.top_values(columns["Team"].frequent.most_common(bins), bins))
 
-                st.subheader("📋 Players by Team")
-                for team, players in df.groupby("Team")["Name"]:
-                    st.markdown(f"**{team}**: {', '.join(players.dropna().tolist())}")
+                players = trackers["players"]
+                if players.members:
+                    st.subheader("📋 Players by Team")
+                    for team in sorted(players.members, key=str):
+                        names = players.members[team]
+                        more = players.totals[team] - len(names)
+                        st.markdown(f"**{team}**: {', '.join(names)}" + (f" … and {more:,} more" if more else ""))
 
-            if "Position" in df.columns:
+            if "Position" in columns:
                 st.subheader("🧩 Position Distribution")
-                st.bar_chart(df["Position"].value_counts())
+                st.bar_chart(charts.top_values(columns["Position"].frequent.most_common(bins), bins))
 
         except Exception as e:
-            st.error(f"Error reading CSV: {e}")
\ No newline at end of file
+            st.error(f"Error reading CSV: {e}")
+# ---------------- Cache stats ----------------
+with st.sidebar.expander("Cache statistics"):
+    st.json({"results": cache.default_cache().stats(), "schemas": schema_cache_stats(),
+             "workers": isolation.default_pool().stats(),
+             "jobs": [{"op": job.op, "seconds": round(job.elapsed, 1), "progress": job.progress}
+                      for job in jobs.running()]})
+
+# ---------------- Debug panel ----------------
+if DEBUG:
+    with st.sidebar.expander("Debug: stage timings"):
+        runs = list(st.session_state.traces)
+        if st.session_state.trace.events:
+            runs.append(st.session_state.trace)
+        if runs:
+            shown = st.selectbox("Run", range(len(runs)), index=len(runs) - 1,
+                                 format_func=lambda i: runs[i].label, key="trace_shown")
+            rows = runs[shown].breakdown()
+            st.caption(f"{len(rows)} spans; sizes in bytes for upload stages, characters for text")
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+            st.download_button("Download Chrome trace", json.dumps(tracing.chrome_trace(runs)),
+                               "neatify-trace.json", "application/json",
+                               icon=":material/file_download:")
+        else:
+            st.caption("No stages recorded yet.")
+
+        capture = st.session_state.get("trace_capture")
+        if capture is None:
+            mode = st.radio("Profile the next request with", ["cprofile", "tracemalloc"],
+                            horizontal=True, key="trace_capture_mode")
+            if st.button("Arm profiler"):
+                st.session_state.trace_capture = tracing.Capture(mode)
+                st.rerun()
+        elif capture.done:
+            st.code(capture.report, language="text")
+            st.button("Clear profile", on_click=st.session_state.pop, args=("trace_capture",))
+        elif capture.span is not None:
+            st.info(f"Profiling {capture.span}…")
+        else:
+            st.info(f"{capture.mode} armed: the next format, validation, conversion, "
+                    f"code render or tree view is profiled.")
+            st.button("Disarm", on_click=st.session_state.pop, args=("trace_capture",))
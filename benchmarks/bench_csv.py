@@ -0,0 +1,90 @@
+"""Throughput of CSV normalization: in-memory baseline vs streaming vs parallel.
+
+Writes a synthetic CSV of the requested size (quoted fields with commas,
+doubled quotes and embedded newlines) to a temporary directory and formats
+it to /dev/null. The in-memory baseline (the previous format_csv) is only
+run up to 256 MB, since it holds input and output as strings.
+
+Usage: python benchmarks/bench_csv.py [megabytes ...] [--jobs N]
+"""
+
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import csv_stream  # noqa: E402
+
+BASELINE_MAX_MB = 256
+
+
+def make_csv(path: str, megabytes: int) -> int:
+    rng = random.Random(7)
+    target = megabytes << 20
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "city", "note", "amount"])
+        i = 0
+        while f.tell() < target:
+            rows = []
+            for _ in range(10_000):
+                i += 1
+                note = rng.choice(["ok", 'said "hi"', "line one\nline two", "a, b and c", ""])
+                rows.append([i, f"user {i}", rng.choice(["Oslo", "New York, NY", "Zürich"]),
+                             note, f"{rng.random() * 1000:.2f}"])
+            writer.writerows(rows)
+    return os.path.getsize(path)
+
+
+def baseline(path: str) -> None:
+    with open(path, encoding="utf-8", newline="") as f:
+        text = f.read()
+    out = io.StringIO()
+    writer = csv.writer(out)
+    for row in csv.reader(io.StringIO(text)):
+        writer.writerow(row)
+    out.getvalue()
+
+
+def streaming(path: str, align: bool = False) -> None:
+    with open(path, encoding="utf-8", newline="") as src, open(os.devnull, "w") as dst:
+        csv_stream.format_stream(src, dst, align=align)
+
+
+def parallel(path: str, jobs: int, align: bool = False) -> None:
+    with open(os.devnull, "w") as dst:
+        csv_stream.format_file(path, dst, align=align, jobs=jobs)
+
+
+def main(sizes, jobs: int):
+    print(f"{'MB':>6} {'method':>18} {'seconds':>9} {'MB/s':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for megabytes in sizes:
+            path = os.path.join(tmp, f"bench_{megabytes}.csv")
+            size_mb = make_csv(path, megabytes) / (1 << 20)
+            methods = [("streaming", lambda: streaming(path)),
+                       (f"parallel x{jobs}", lambda: parallel(path, jobs)),
+                       (f"parallel x{jobs} align", lambda: parallel(path, jobs, align=True))]
+            if megabytes <= BASELINE_MAX_MB:
+                methods.insert(0, ("in-memory", lambda: baseline(path)))
+            for name, fn in methods:
+                start = time.perf_counter()
+                fn()
+                elapsed = time.perf_counter() - start
+                print(f"{megabytes:>6} {name:>18} {elapsed:>9.2f} {size_mb / elapsed:>8.1f}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    jobs = os.cpu_count() or 1
+    if "--jobs" in args:
+        i = args.index("--jobs")
+        jobs = int(args[i + 1])
+        del args[i:i + 2]
+    main([int(a) for a in args] or [1024], jobs)
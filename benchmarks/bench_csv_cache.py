@@ -0,0 +1,78 @@
+"""CSV Analysis: parsing every time vs the csv_cache columnar cache.
+
+Builds a CSV of --rows rows with numeric and text columns, then times a
+plain csv_stats.analyze_csv pass, a cold csv_cache.build (analysis plus
+Parquet copy), a warm csv_cache.load, and one histogram read from the
+Parquet copy. The cache lives in a temporary directory.
+
+Usage: python benchmarks/bench_csv_cache.py [--rows N]
+"""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import charts  # noqa: E402
+import csv_cache  # noqa: E402
+import csv_stats  # noqa: E402
+import uploads  # noqa: E402
+
+
+def build_csv(rows: int) -> bytes:
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        "Name": [f"player {i}" for i in range(rows)],
+        "Team": rng.choice([f"team {k}" for k in range(30)], rows),
+        "Position": rng.choice(["PG", "SG", "SF", "PF", "C"], rows),
+        "Age": rng.integers(19, 40, rows),
+        "Salary": rng.normal(5e6, 2e6, rows).round(),
+    })
+    return frame.to_csv(index=False).encode()
+
+
+def trackers() -> dict:
+    return {
+        "salary_by_team": csv_stats.GroupMean("Team", "Salary"),
+        "top_salaries": csv_stats.TopRows("Salary", 10),
+        "players": csv_stats.GroupMembers("Team", "Name"),
+        "series": charts.SeriesSampler(),
+    }
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main(rows: int):
+    csv_cache.CACHE_DIR = tempfile.mkdtemp(prefix="neatify-bench-csv-")
+    upload = uploads.spool(io.BytesIO(build_csv(rows)))
+    print(f"rows: {rows:,}, MB: {upload.size / 1e6:.1f}, columnar: {csv_cache._arrow() is not None}")
+    print(f"{'run':>16} {'seconds':>8}")
+    elapsed, _ = timed(csv_stats.analyze_csv, upload.open_binary(), trackers=trackers().values())
+    print(f"{'analyze_csv':>16} {elapsed:>8.3f}")
+    elapsed, _ = timed(csv_cache.build, upload.sha256, upload.open_binary(), trackers())
+    print(f"{'cache build':>16} {elapsed:>8.3f}")
+    elapsed, entry = timed(csv_cache.load, upload.sha256)
+    print(f"{'cache load':>16} {elapsed:>8.3f}")
+    elapsed, _ = timed(entry.histogram, "Salary")
+    print(f"{'histogram':>16} {elapsed:>8.3f}")
+    print(f"cache on disk: {csv_cache.stats()['bytes'] / 1e6:.1f} MB")
+    shutil.rmtree(csv_cache.CACHE_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    rows = 1_000_000
+    if "--rows" in args:
+        rows = int(args[args.index("--rows") + 1])
+    main(rows)
@@ -0,0 +1,74 @@
+"""Compare difflib.unified_diff with diff_engine on synthetic large inputs.
+
+Shapes:
+  config    key = value lines with scattered edits, inserts and deletes
+  repeated  highly repetitive lines (few unique anchors, difflib's worst case)
+  shuffled  blocks moved around
+
+Usage: python benchmarks/bench_diff.py [lines ...]
+"""
+
+import difflib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import diff_engine  # noqa: E402
+
+
+def config(lines: int, rng: random.Random):
+    a = [f"service.{i // 50}.option_{i % 50} = {rng.randint(0, 10**6)}" for i in range(lines)]
+    b = list(a)
+    for _ in range(max(1, lines // 200)):
+        pos = rng.randrange(len(b))
+        op = rng.random()
+        if op < 0.4:
+            b[pos] = b[pos] + "  # changed"
+        elif op < 0.7:
+            b.insert(pos, f"new.option = {rng.random()}")
+        else:
+            del b[pos]
+    return a, b
+
+
+def repeated(lines: int, rng: random.Random):
+    a = [rng.choice(["}", "{", "    enabled = true", ""]) for _ in range(lines)]
+    b = list(a)
+    for _ in range(max(1, lines // 100)):
+        b[rng.randrange(len(b))] = rng.choice(["}", "    enabled = false"])
+    return a, b
+
+
+def shuffled(lines: int, rng: random.Random):
+    a = [f"row {i} {rng.random()}" for i in range(lines)]
+    blocks = [a[i:i + 500] for i in range(0, lines, 500)]
+    rng.shuffle(blocks)
+    return a, [line for block in blocks for line in block]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main(sizes):
+    rng = random.Random(42)
+    print(f"{'shape':>9} {'lines':>8} {'engine':>9} {'seconds':>9} {'hunk lines':>11} {'exact':>6}")
+    for lines in sizes:
+        for shape in (config, repeated, shuffled):
+            a, b = shape(lines, rng)
+            elapsed, out = timed(lambda: list(difflib.unified_diff(a, b, lineterm="")))
+            print(f"{shape.__name__:>9} {lines:>8} {'difflib':>9} {elapsed:>9.3f} {len(out):>11} {'yes':>6}")
+            for algorithm in ("patience", "myers"):
+                elapsed, result = timed(lambda: diff_engine.diff_lines(a, b, algorithm=algorithm))
+                out = list(result.unified(lineterm=""))
+                print(f"{shape.__name__:>9} {lines:>8} {algorithm:>9} {elapsed:>9.3f} "
+                      f"{len(out):>11} {'yes' if result.exact else 'no':>6}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000])
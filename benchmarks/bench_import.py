@@ -0,0 +1,59 @@
+"""Measure cold-start cost of importing the formatter layer.
+
+Each scenario runs in a fresh interpreter so module caches do not carry over:
+
+* lazy:  ``import formatter, registry`` and format one JSON document
+* eager: the same plus importing every backend up front, which is what the
+  module-level imports used to do
+
+Usage: python benchmarks/bench_import.py [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+BACKENDS = ["yaml", "bs4", "sqlparse", "autopep8", "jsonschema", "xmlschema",
+            "yamllint.config", "yamllint.linter", "pandas", "xmltodict"]
+
+LAZY = "import formatter, registry; registry.get_formatter('JSON')('{\"a\": 1}')"
+EAGER = (
+    "import importlib\n"
+    f"for m in {BACKENDS!r}:\n"
+    "    try: importlib.import_module(m)\n"
+    "    except ImportError: pass\n"
+    + LAZY
+)
+
+TIMER = "import time; _t = time.perf_counter()\n{body}\nprint(time.perf_counter() - _t)"
+
+
+def run(body: str, runs: int) -> list:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", TIMER.format(body=body)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def main(runs: int):
+    missing = [m for m in BACKENDS if subprocess.run(
+        [sys.executable, "-c", f"import {m}"], capture_output=True).returncode]
+    if missing:
+        print(f"note: not installed, so not counted: {', '.join(missing)}")
+    results = {name: run(body, runs) for name, body in (("eager", EAGER), ("lazy", LAZY))}
+    for name, samples in results.items():
+        print(f"{name:>6}: median {statistics.median(samples) * 1000:8.1f} ms "
+              f"(min {min(samples) * 1000:.1f} ms, {runs} runs)")
+    gain = statistics.median(results["eager"]) / statistics.median(results["lazy"])
+    print(f"startup speed-up: {gain:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
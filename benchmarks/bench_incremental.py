@@ -0,0 +1,120 @@
+"""Incremental vs full re-formatting of large Markdown, SQL and Python documents.
+
+Builds a document of about --lines lines per format, then times a full
+format, a cold incremental format (empty unit cache) and incremental
+formats after editing a few lines, checking each result against a full
+re-format. Inputs that once made the two differ are checked as well
+("regression" rows). Everything runs in-process.
+
+Usage: python benchmarks/bench_incremental.py [formats ...] [--lines N] [--edits N]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import formatter  # noqa: E402
+import incremental  # noqa: E402
+
+FULL = {"Markdown": formatter.format_markdown, "SQL": formatter.format_sql,
+        "Python": formatter.format_python}
+
+
+def markdown_block(i: int) -> str:
+    return (f"# Section {i}\nSome text for section {i}.   \n## Details\n"
+            f"- item {i}\n- another item\n\n")
+
+
+def sql_block(i: int) -> str:
+    return (f"select id, name, total from orders_{i % 7} where total > {i} and status = 'open';\n"
+            f"-- batch {i}\ninsert into audit (id, note) values ({i}, 'checked; ok');\n\n")
+
+
+def python_block(i: int) -> str:
+    # autopep8 turns the lambda assignment into a def (E731), which changes
+    # the blank lines the next unit needs.
+    lam = f"\n\nkey_{i} = lambda item: item[{i % 3}]\n" if i % 10 == 0 else ""
+    return (lam + f"\n\ndef handler_{i}(event,context = None):\n"
+            f"    values=[x*{i} for x in range(10)]\n"
+            f"    if event.get('kind')=='retry' :\n"
+            f"        return {{'id':{i},'values':values}}\n"
+            f"    return None\n")
+
+
+BLOCKS = {"Markdown": markdown_block, "SQL": sql_block, "Python": python_block}
+
+
+def python_cycle() -> str:
+    # A late import (moved by E402) in the first unit, and in the second an
+    # indented comment before a dedent, where E305 and E303 undo each other.
+    pad = "".join(f"v{i} = {i}\n" for i in range(70))
+    return (pad + "def f(a,b):\n    return a+b\nfrom x import y\ndef  k( ):\n    return 1\n\n"
+            + pad + "def f(a,b):\n    pass\n    # indented comment\nx=1\ndef  k( ):\n    pass\n")
+
+
+REGRESSIONS = {"Python": [python_cycle]}
+
+
+def build(name: str, lines: int) -> str:
+    head = "import os\nimport sys\n" if name == "Python" else ""
+    parts, count, i = [head], 0, 0
+    while count < lines:
+        block = BLOCKS[name](i)
+        parts.append(block)
+        count += block.count("\n")
+        i += 1
+    return "".join(parts)
+
+
+def edit(text: str, rng: random.Random) -> str:
+    """Add trailing spaces to three nearby lines, so their units must be formatted again."""
+    lines = text.split("\n")
+    at = rng.randrange(len(lines) - 3)
+    for i in range(at, at + 3):
+        lines[i] += "  "
+    return "\n".join(lines)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main(names, lines: int, edits: int):
+    rng = random.Random(0)
+    print(f"{'format':>9} {'lines':>7} {'units':>6} {'run':>10} {'seconds':>8} {'speedup':>8} same")
+    for name in names:
+        if not incremental.supports(name):
+            print(f"{name:>9}: backend not installed, skipped")
+            continue
+        text = build(name, lines)
+        units = len(incremental.SPLITTERS[name](text) or [])
+        full, expected = timed(FULL[name], text)
+        runs = [("cold", text, expected)]
+        for _ in range(edits):
+            edited = edit(text, rng)
+            runs.append(("edited", edited, FULL[name](edited)))
+        print(f"{name:>9} {text.count(chr(10)):>7} {units:>6} {'full':>10} {full:>8.3f} {'':>8}")
+        for label, source, want in runs:
+            elapsed, got = timed(incremental.format_text, source, name)
+            print(f"{name:>9} {'':>7} {'':>6} {label:>10} {elapsed:>8.3f} {full / elapsed:>7.1f}x {got == want}")
+        for case in REGRESSIONS.get(name, []):
+            source = case()
+            elapsed, got = timed(incremental.format_text, source, name)
+            print(f"{name:>9} {'':>7} {'':>6} {'regression':>10} {elapsed:>8.3f} {'':>8} "
+                  f"{got == FULL[name](source)}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {"--lines": 10000, "--edits": 3}
+    for flag in options:
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = int(args[i + 1])
+            del args[i:i + 2]
+    main(args or list(FULL), options["--lines"], options["--edits"])
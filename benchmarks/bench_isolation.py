@@ -0,0 +1,119 @@
+"""Latency of CPU-heavy backends in-process vs in isolation.py workers.
+
+Two measurements, each at several client concurrency levels (threads):
+
+* load: every client formats a mix of SQL, Python, HTML and YAML-lint
+  documents back to back; reports throughput and p50/p90/p99 latency.
+* neighbour: the clients keep formatting large Python files while the main
+  thread wakes every 10 ms to format a small JSON document; reported is how
+  late that finishes. In-process, the heavy calls hold the GIL and the
+  small call waits for it; with workers it does not.
+
+Usage: python benchmarks/bench_isolation.py [clients ...] [--seconds S]
+"""
+
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import formatter  # noqa: E402
+import isolation  # noqa: E402
+
+SQL = "select a, b, c from t join u on t.id = u.id where a > 1 and b < 2 order by c;\n" * 40
+PYTHON = "def f( a,b ):\n  return [x*2 for x in range( a )]+[ b ]\n" * 80
+HTML = "<div><p class=x>text<b>bold</b></p><ul><li>1<li>2</ul></div>" * 60
+YAML = "key: value\nlist:\n  - a\n  - b\nmap: {x: 1, y: 2}\n" * 60
+MIX = [("format_sql", SQL), ("format_python", PYTHON), ("format_html", HTML), ("lint_yaml", YAML)]
+SMALL_JSON = '{"a": [1, 2, 3], "b": {"c": "d"}}'
+
+
+def percentiles(samples: list) -> tuple:
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return cuts[49], cuts[89], cuts[98]
+
+
+def run_clients(clients: int, seconds: float, call) -> list:
+    """Run call(name, text) from clients threads for seconds; return latencies."""
+    latencies = []
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def client(offset: int):
+        i = offset
+        while time.perf_counter() < stop:
+            name, text = MIX[i % len(MIX)]
+            start = time.perf_counter()
+            call(name, text)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+            i += 1
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies
+
+
+def neighbour(clients: int, seconds: float, call) -> list:
+    """Small in-process JSON latencies while clients run heavy Python formats."""
+    stop = threading.Event()
+
+    def heavy():
+        while not stop.is_set():
+            call("format_python", PYTHON * 10)
+
+    threads = [threading.Thread(target=heavy) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    samples = []
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        # Waking from sleep means re-taking the GIL, so that wait is counted.
+        start = time.perf_counter()
+        time.sleep(0.01)
+        formatter.format_json(SMALL_JSON)
+        samples.append(time.perf_counter() - start - 0.01)
+    stop.set()
+    for t in threads:
+        t.join()
+    return samples
+
+
+def main(levels, seconds: float):
+    pool = isolation.WorkerPool()
+    modes = {
+        "in-process": lambda name, text: getattr(formatter, name)(text),
+        f"workers x{pool.size}": lambda name, text: pool.call(f"formatter:{name}", text),
+    }
+    for name, text in MIX:  # warm imports and workers
+        for call in modes.values():
+            call(name, text)
+    print(f"{'test':>10} {'clients':>7} {'mode':>12} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+    for clients in levels:
+        for mode, call in modes.items():
+            latencies = run_clients(clients, seconds, call)
+            p50, p90, p99 = percentiles(latencies)
+            print(f"{'load':>10} {clients:>7} {mode:>12} {len(latencies) / seconds:>8.1f} "
+                  f"{p50 * 1e3:>8.1f} {p90 * 1e3:>8.1f} {p99 * 1e3:>8.1f}")
+        for mode, call in modes.items():
+            p50, p90, p99 = percentiles(neighbour(clients, seconds, call))
+            print(f"{'neighbour':>10} {clients:>7} {mode:>12} {'':>8} "
+                  f"{p50 * 1e3:>8.2f} {p90 * 1e3:>8.2f} {p99 * 1e3:>8.2f}")
+    pool.close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    seconds = 5.0
+    if "--seconds" in args:
+        i = args.index("--seconds")
+        seconds = float(args[i + 1])
+        del args[i:i + 2]
+    main([int(a) for a in args] or [1, 4, 16], seconds)
@@ -0,0 +1,166 @@
+"""Load test for service.py: requests/s and latency percentiles.
+
+Starts ``python service.py`` on a free port (or uses --url) and drives it
+from client threads over keep-alive connections (stdlib http.client):
+
+* json-hot:   the same small JSON document (result cache hits)
+* json-cold:  a different small JSON document every request
+* sql:        SQL formatting, run in isolation.py workers
+* batch:      50 mixed items per request (reported per request)
+* stream:     one large JSON body streamed through /format/json (MB/s)
+
+Usage: python benchmarks/bench_service.py [clients ...] [--seconds S] [--url URL]
+"""
+
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+SQL = "select a, b from t join u on t.id = u.id where a > 1 order by b;\n" * 20
+STREAM_MB = 32
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server():
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, "service.py", "--port", str(port)], cwd=ROOT)
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(200):
+        try:
+            request(connect(url), "GET", "/health")
+            return proc, url
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise SystemExit("service did not start")
+
+
+def connect(url: str) -> http.client.HTTPConnection:
+    parsed = urlparse(url)
+    return http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=120)
+
+
+def request(conn, method: str, path: str, body=None, headers=None) -> bytes:
+    conn.request(method, path, body=body, headers=headers or {})
+    response = conn.getresponse()
+    data = response.read()
+    if response.status != 200:
+        raise RuntimeError(f"{path}: HTTP {response.status}: {data[:200]!r}")
+    return data
+
+
+def scenarios():
+    counter = iter(range(10 ** 9))
+    hot = json.dumps({"a": [1, 2, 3], "b": {"c": "d"}})
+    batch = json.dumps({"items": [
+        {"op": op, "name": name, "document": doc}
+        for op, name, doc in [("format", "JSON", hot), ("format", "SQL", SQL),
+                              ("convert", "json-xml", hot), ("validate", "YAML", "a: 1\n"),
+                              ("convert", "json-toon", hot)] * 10]})
+    return {
+        "json-hot": lambda: ("POST", "/format/json", hot, {}),
+        "json-cold": lambda: ("POST", "/format/json", json.dumps({"n": next(counter), "v": [1, 2]}), {}),
+        "sql": lambda: ("POST", "/format/sql", SQL + f"-- {next(counter)}\n", {}),
+        "batch": lambda: ("POST", "/batch", batch, {"Content-Type": "application/json"}),
+    }
+
+
+def load(url: str, clients: int, seconds: float, make) -> list:
+    latencies, errors = [], []
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def client():
+        conn = connect(url)
+        while time.perf_counter() < stop:
+            method, path, body, headers = make()
+            start = time.perf_counter()
+            try:
+                request(conn, method, path, body.encode("utf-8"), headers)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+                conn.close()
+                conn = connect(url)
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+        conn.close()
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if errors:
+        print(f"  {len(errors)} errors, first: {errors[0]}")
+    return latencies
+
+
+def stream(url: str) -> float:
+    """MB/s for one large JSON document sent in chunks and read back."""
+    piece = json.dumps([{"id": i, "name": f"user {i}", "tags": ["a", "b"]} for i in range(1000)])
+    count = (STREAM_MB << 20) // len(piece)
+
+    def body():
+        yield b"["
+        for i in range(count):
+            yield (b"," if i else b"") + piece.encode("utf-8")
+        yield b"]"
+
+    conn = connect(url)
+    start = time.perf_counter()
+    conn.request("POST", "/format/json", body=body(), encode_chunked=True,
+                 headers={"Transfer-Encoding": "chunked"})
+    response = conn.getresponse()
+    while response.read(1 << 20):
+        pass
+    return count * len(piece) / (1 << 20) / (time.perf_counter() - start)
+
+
+def main(levels, seconds: float, url: str = None):
+    proc = None
+    if url is None:
+        proc, url = start_server()
+    try:
+        print(f"{'scenario':>10} {'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+        for name, make in scenarios().items():
+            load(url, 1, 0.5, make)   # warm caches and workers
+            for clients in levels:
+                latencies = load(url, clients, seconds, make)
+                if len(latencies) < 2:
+                    continue
+                cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+                print(f"{name:>10} {clients:>7} {len(latencies) / seconds:>8.1f} "
+                      f"{cuts[49] * 1e3:>8.1f} {cuts[89] * 1e3:>8.1f} {cuts[98] * 1e3:>8.1f}")
+        print(f"{'stream':>10} {1:>7} {stream(url):>8.1f} MB/s ({STREAM_MB} MB JSON)")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {}
+    for flag in ("--seconds", "--url"):
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = args[i + 1]
+            del args[i:i + 2]
+    main([int(a) for a in args] or [1, 8, 32], float(options.get("--seconds", 5)),
+         options.get("--url"))
@@ -0,0 +1,504 @@
+"""Benchmark every registered formatter and validator; save and gate baselines.
+
+For each format the suite writes deterministic synthetic corpora (seeded,
+cached on disk) at several sizes and three shapes:
+
+* deep:    nesting (JSON/YAML/XML/HTML/TOML objects, Markdown lists, SQL
+           subqueries, Python blocks); CSV gets multi-line quoted fields and
+           INI many dotted sections, their nearest equivalent
+* wide:    many keys, attributes, columns or arguments per record
+* strings: long string values with escapes, quotes and non-ASCII text
+
+Each case reports latency p50/p90/p99 over repeated runs, throughput (MB/s
+at p50) and peak traced memory from one extra run under tracemalloc. Cases:
+
+* format/NAME    the registered formatter on the whole text
+* stream/NAME    the streaming variant, file to /dev/null (JSON, XML, CSV)
+* validate/NAME  the registered validator (permissive schema for JSON/XML)
+
+Backends normally run in isolation.py workers are measured in-process here,
+so only the backend's own cost is counted (bench_isolation.py covers the
+worker overhead). Sizes above --max-memory run the streaming cases only, so
+1 GB corpora exercise the paths that hold larger-than-memory files. Once a
+single run takes longer than --max-seconds, larger sizes of that case are
+skipped (autopep8 is superlinear on long lines).
+
+--save writes results, interpreter and backend versions to a JSON baseline;
+--compare re-reads one and exits with status 1 when a case is slower (p50) or
+uses more memory than the baseline by more than the tolerance. Baselines
+default to benchmarks/baselines/<host>.json and are local to one machine.
+
+Usage: python benchmarks/bench_suite.py [--sizes 1K,64K,1M] [--shapes deep,wide,strings]
+           [--formats JSON,XML] [--kinds format,stream,validate] [--budget S]
+           [--save [PATH]] [--compare [PATH]] [--tolerance 0.25] [--no-memory]
+"""
+
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import platform
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from xml.sax.saxutils import escape, quoteattr
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import registry  # noqa: E402
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+CORPUS_DIR = os.path.join(tempfile.gettempdir(), "neatify-bench-corpus")
+CORPUS_VERSION = 1   # bump when a generator changes, so cached corpora are rebuilt
+SEED = 20240601
+SHAPES = ("deep", "wide", "strings")
+SIZES = "1K,64K,1M"
+UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+MAX_MEMORY = "64M"      # larger corpora only run the streaming cases
+MAX_RUNS = 200
+MAX_SECONDS = 20.0      # one run slower than this skips the larger sizes of that case
+TIME_FLOOR = 0.001      # seconds: smaller p50 differences are noise, not regressions
+MEMORY_FLOOR = 256 << 10
+
+DEPTH = 24
+WIDTH = 48
+WORDS = ("alpha", "beta", "gamma", "delta", "naïve", "café", "Zürich", "東京", "données",
+         "quote\"d", "back\\slash", "tab\there", "a&b", "<tag>", "it's", "50/50")
+
+# Permissive schemas, so validation cost is parsing plus a schema walk.
+JSON_SCHEMA = json.dumps({"type": "array", "items": {"type": "object"}})
+XSD = ('<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+       '<xs:element name="root"><xs:complexType><xs:sequence>'
+       '<xs:any minOccurs="0" maxOccurs="unbounded" processContents="skip"/>'
+       '</xs:sequence></xs:complexType></xs:element></xs:schema>')
+STREAMS = {"XML": "formatter:format_xml_stream"}   # not registered, but worth tracking
+
+
+# ------------------ Corpora ------------------
+
+def _words(rng, count: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def _long(rng) -> str:
+    return _words(rng, rng.randint(200, 600))
+
+
+def _plain(rng, count: int) -> str:
+    """Words without characters that need escaping in any format."""
+    return " ".join(rng.choice(WORDS[:9]) for _ in range(count))
+
+
+def _json(shape: str):
+    def item(i, rng):
+        if shape == "deep":
+            value = {"id": i, "value": rng.random()}
+            for d in range(DEPTH):
+                value = {f"level{d}": value, "n": d}
+        elif shape == "wide":
+            value = {f"k{k}": (rng.randint(-1000, 1000) if k % 3 == 0 else
+                               rng.random() if k % 3 == 1 else _words(rng, 2))
+                     for k in range(WIDTH)}
+        else:
+            value = {"id": i, "text": _long(rng), "tags": [_words(rng, 1) for _ in range(4)]}
+        return json.dumps(value, ensure_ascii=False)
+    return "[\n", item, ",\n", "\n]\n"
+
+
+def _xml(shape: str):
+    def item(i, rng):
+        if shape == "deep":
+            opens = "".join(f'<n d="{d}">' for d in range(DEPTH))
+            return f"{opens}{escape(_words(rng, 3))}{'</n>' * DEPTH}"
+        if shape == "wide":
+            attrs = " ".join(f"a{k}={quoteattr(_words(rng, 1))}" for k in range(WIDTH // 3))
+            children = "".join(f"<c{k}>{escape(_words(rng, 1))}</c{k}>" for k in range(WIDTH))
+            return f"<row {attrs}>{children}</row>"
+        return f'<doc id="{i}"><text>{escape(_long(rng))}</text></doc>'
+    return '<?xml version="1.0" encoding="UTF-8"?>\n<root>', item, "\n", "</root>\n"
+
+
+def _yaml(shape: str):
+    def item(i, rng):
+        if shape == "deep":
+            lines = ["- level0:"] + [f"{'  ' * (d + 1)}level{d}:" for d in range(1, DEPTH)]
+            return "\n".join(lines) + f"\n{'  ' * (DEPTH + 1)}value: {i}\n"
+        if shape == "wide":
+            return "- " + "  ".join(f"k{k}: {json.dumps(_words(rng, 2), ensure_ascii=False)}\n"
+                                    for k in range(WIDTH))
+        return f"- id: {i}\n  text: {json.dumps(_long(rng), ensure_ascii=False)}\n"
+    return "", item, "", ""
+
+
+def _csv(shape: str):
+    columns = WIDTH if shape == "wide" else 4
+
+    def row(values) -> str:
+        buf = io.StringIO()
+        csv.writer(buf, lineterminator="\n").writerow(values)
+        return buf.getvalue()
+
+    def item(i, rng):
+        if shape == "deep":
+            return row([i, _words(rng, 3) + "\n" + _words(rng, 3), f'say "{_words(rng, 1)}"', "a,b"])
+        if shape == "wide":
+            return row([i] + [rng.randint(0, 10 ** 6) if k % 2 else _plain(rng, 1)
+                              for k in range(1, columns)])
+        return row([i, _long(rng), _plain(rng, 1), rng.random()])
+    return row([f"col{k}" for k in range(columns)]), item, "", ""
+
+
+def _toml(shape: str):
+    def item(i, rng):
+        if shape == "deep":
+            path = ".".join(f"l{d}" for d in range(DEPTH // 2))
+            return f"[t{i}.{path}]\nvalue = {i}\nname = {json.dumps(_words(rng, 2), ensure_ascii=False)}\n\n"
+        if shape == "wide":
+            keys = "".join(f"k{k} = {rng.randint(0, 1000) if k % 2 else json.dumps(_plain(rng, 2))}\n"
+                           for k in range(WIDTH))
+            return f"[t{i}]\n{keys}\n"
+        return f"[t{i}]\ntext = {json.dumps(_long(rng), ensure_ascii=False)}\n\n"
+    return "", item, "", ""
+
+
+def _ini(shape: str):
+    def item(i, rng):
+        if shape == "deep":
+            return f"[section.{i}.a.b.c]\nkey = {_plain(rng, 2)}\n\n"
+        if shape == "wide":
+            return f"[s{i}]\n" + "".join(f"k{k} = {_plain(rng, 2)}\n" for k in range(WIDTH)) + "\n"
+        # Long values wrapped over indented continuation lines.
+        text = _plain(rng, rng.randint(200, 600)).split()
+        lines = [" ".join(text[n:n + 12]) for n in range(0, len(text), 12)]
+        return f"[s{i}]\ntext = " + "\n    ".join(lines) + "\n\n"
+    return "", item, "", ""
+
+
+def _markdown(shape: str):
+    def item(i, rng):
+        if shape == "deep":
+            return "".join(f"{'  ' * d}- {_words(rng, 2)}\n" for d in range(DEPTH)) + "\n"
+        if shape == "wide":
+            head = "| " + " | ".join(f"c{k}" for k in range(WIDTH // 2)) + " |\n"
+            rule = "|" + "---|" * (WIDTH // 2) + "\n"
+            rows = "".join("| " + " | ".join(_plain(rng, 1) for _ in range(WIDTH // 2)) + " |\n"
+                           for _ in range(4))
+            return f"## Table {i}\n{head}{rule}{rows}\n"
+        return f"# Section {i}\n{_long(rng)}  \n\n"
+    return "", item, "", ""
+
+
+def _html(shape: str):
+    def item(i, rng):
+        if shape == "deep":
+            return f"{'<div>' * DEPTH}<span>{escape(_words(rng, 3))}</span>{'</div>' * DEPTH}"
+        if shape == "wide":
+            cells = "".join(f"<td class=c{k}>{escape(_words(rng, 1))}</td>" for k in range(WIDTH))
+            return f"<table><tr id=r{i}>{cells}</tr></table>"
+        return f"<p id=p{i}>{escape(_long(rng))}<br></p>"
+    return "<!DOCTYPE html><html><body>", item, "\n", "</body></html>\n"
+
+
+def _sql(shape: str):
+    def item(i, rng):
+        if shape == "deep":
+            query = f"select id, name from t{i} where id > {rng.randint(0, 99)}"
+            for d in range(DEPTH // 3):
+                query = f"select * from ({query}) as q{d} where q{d}.id < {rng.randint(100, 999)}"
+            return query + ";"
+        if shape == "wide":
+            return f"select {', '.join(f'c{k}' for k in range(WIDTH))} from t{i} where c0 = {i};"
+        text = _long(rng).replace("'", "''")
+        return f"insert into notes (id, body) values ({i}, '{text}');"
+    return "", item, "\n", "\n"
+
+
+def _python(shape: str):
+    def item(i, rng):
+        if shape == "deep":
+            lines = [f"def f{i}( x ):"]
+            for d in range(DEPTH // 2):
+                lines.append(f"{'    ' * (d + 1)}if x>{d} :")
+            lines.append(f"{'    ' * (DEPTH // 2 + 1)}return x*{i}")
+            return "\n".join(lines) + "\n"
+        if shape == "wide":
+            args = ",".join(f"k{k}={rng.randint(0, 99)}" for k in range(WIDTH))
+            return f"v{i}=dict( {args} )\n"
+        return f"s{i} = {_long(rng)!r}\n"
+    return "", item, "\n", ""
+
+
+GENERATORS = {"JSON": _json, "XML": _xml, "YAML": _yaml, "CSV": _csv, "TOML": _toml,
+              "INI": _ini, "Markdown": _markdown, "HTML": _html, "SQL": _sql, "Python": _python}
+
+
+def parse_size(text: str) -> int:
+    match = re.fullmatch(r"(\d+)([KMG]?)B?", text.strip().upper())
+    if not match:
+        raise ValueError(f"Bad size: {text!r} (use e.g. 1K, 64K, 1M, 1G)")
+    return int(match.group(1)) * UNITS[match.group(2)]
+
+
+def size_label(size: int) -> str:
+    for unit in ("G", "M", "K"):
+        if size >= UNITS[unit] and size % UNITS[unit] == 0:
+            return f"{size // UNITS[unit]}{unit}"
+    return str(size)
+
+
+def corpus(fmt: str, shape: str, size: int) -> str:
+    """Path of the (cached) corpus: whole records until at least size bytes."""
+    path = os.path.join(CORPUS_DIR, f"v{CORPUS_VERSION}-{fmt}-{shape}-{size_label(size)}.txt")
+    if os.path.exists(path):
+        return path
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    head, item, sep, tail = GENERATORS[fmt](shape)
+    rng = random.Random(f"{SEED}:{fmt}:{shape}:{size}")
+    target = max(size - len(tail.encode()), 0)
+    partial = path + ".part"
+    with open(partial, "w", encoding="utf-8", newline="") as f:
+        f.write(head)
+        written = len(head.encode())
+        i = 0
+        while written < target or i == 0:
+            piece = (sep if i else "") + item(i, rng)
+            f.write(piece)
+            written += len(piece.encode())
+            i += 1
+        f.write(tail)
+    os.replace(partial, path)
+    return path
+
+
+# ------------------ Measurement ------------------
+
+def targets(formats, kinds):
+    """(case prefix, format, callable(path_or_text), streaming) in registry order."""
+    found = []
+    for name in registry.formatter_names():
+        if name not in formats:
+            continue
+        backend = registry.get_formatter(name)
+        if "format" in kinds:
+            found.append(("format", name, backend.load(), False))
+        stream = backend.stream or STREAMS.get(name, "")
+        if "stream" in kinds and stream:
+            found.append(("stream", name, registry.Backend(name, stream).load(), True))
+        validator = registry.get_validator(name)
+        if "validate" in kinds and validator is not None:
+            schema = {"JSON": JSON_SCHEMA, "XML": XSD}.get(name)
+            func = validator.load()
+            found.append(("validate", name,
+                          (lambda text, f=func, s=schema: f(text, s)) if schema else func, False))
+    return found
+
+
+def read(path: str, streaming: bool):
+    """The corpus text for in-memory cases (streaming cases open the file)."""
+    if streaming:
+        return None
+    with open(path, encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def run_once(func, streaming: bool, path: str, text: str):
+    if streaming:
+        with open(path, encoding="utf-8", newline="") as src, open(os.devnull, "w") as dst:
+            func(src, dst)
+    else:
+        func(text)
+
+
+def percentile(ordered: list, p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(p * len(ordered)) - 1))]
+
+
+def measure(func, streaming: bool, path: str, budget: float, memory: bool) -> dict:
+    text = read(path, streaming)
+    samples = []
+    spent = 0.0
+    while not samples or (spent < budget and len(samples) < MAX_RUNS):
+        start = time.perf_counter()
+        run_once(func, streaming, path, text)
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed)
+        spent += elapsed
+    samples.sort()
+    size = os.path.getsize(path)
+    result = {
+        "bytes": size,
+        "runs": len(samples),
+        "p50": percentile(samples, 0.50),
+        "p90": percentile(samples, 0.90),
+        "p99": percentile(samples, 0.99),
+    }
+    result["mb_s"] = size / (1 << 20) / result["p50"] if result["p50"] else 0.0
+    if memory:
+        tracemalloc.start()
+        try:
+            run_once(func, streaming, path, text)
+            result["peak"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def run_suite(sizes, shapes, formats, kinds, budget: float, memory: bool, max_memory: int,
+              max_seconds: float) -> dict:
+    results = {}
+    print(f"{'case':<34} {'MB':>8} {'runs':>5} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} "
+          f"{'MB/s':>8} {'peak MB':>8}")
+    for kind, fmt, func, streaming in targets(formats, kinds):
+        for shape in shapes:
+            # Warm imports, compiled schemas and lazy state on a tiny corpus.
+            try:
+                warm = corpus(fmt, shape, 1 << 10)
+                run_once(func, streaming, warm, read(warm, streaming))
+            except Exception as e:
+                print(f"{kind}/{fmt}/{shape:<26} skipped: {type(e).__name__}: {e}")
+                continue
+            slow = None
+            for size in sorted(sizes):
+                if size > max_memory and not streaming:
+                    continue
+                case = f"{kind}/{fmt}/{shape}/{size_label(size)}"
+                if slow:
+                    print(f"{case:<34} skipped: {slow}")
+                    continue
+                try:
+                    result = measure(func, streaming, corpus(fmt, shape, size), budget, memory)
+                except Exception as e:
+                    print(f"{case:<34} failed: {type(e).__name__}: {e}")
+                    continue
+                results[case] = result
+                if result["p50"] > max_seconds:
+                    slow = f"{size_label(size)} took {result['p50']:.0f}s"
+                peak = f"{result['peak'] / (1 << 20):>8.2f}" if "peak" in result else f"{'-':>8}"
+                print(f"{case:<34} {result['bytes'] / (1 << 20):>8.2f} {result['runs']:>5} "
+                      f"{result['p50'] * 1e3:>9.2f} {result['p90'] * 1e3:>9.2f} "
+                      f"{result['p99'] * 1e3:>9.2f} {result['mb_s']:>8.2f} {peak}", flush=True)
+    return results
+
+
+# ------------------ Baselines ------------------
+
+def environment() -> dict:
+    packages = sorted({b.package for name in registry.formatter_names()
+                       for b in (registry.get_formatter(name), registry.get_validator(name)) if b})
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "backends": {package or "stdlib": registry.package_version(package) for package in packages},
+    }
+
+
+def default_baseline() -> str:
+    host = re.sub(r"[^A-Za-z0-9_.-]", "_", platform.node() or "local")
+    return os.path.join(BASELINE_DIR, f"{host}.json")
+
+
+def save_baseline(path: str, results: dict, settings: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    document = {"version": 1, "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "environment": environment(), "settings": settings, "results": results}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"\nSaved {len(results)} cases to {path}")
+
+
+def compare(path: str, results: dict, tolerance: float, memory_tolerance: float) -> list:
+    """Print the differences from a saved baseline and return the regressions."""
+    with open(path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    before_env, now_env = baseline.get("environment", {}), environment()
+    for key in ("python", "machine", "cpus"):
+        if before_env.get(key) != now_env[key]:
+            print(f"note: {key} was {before_env.get(key)}, now {now_env[key]}")
+    for package, version in now_env["backends"].items():
+        if before_env.get("backends", {}).get(package, version) != version:
+            print(f"note: {before_env['backends'][package]} is now {version}")
+
+    regressions, improved, missing = [], 0, []
+    print(f"\n{'case':<34} {'metric':>7} {'baseline':>10} {'now':>10} {'change':>8}")
+    for case, old in sorted(baseline.get("results", {}).items()):
+        new = results.get(case)
+        if new is None:
+            missing.append(case)
+            continue
+        checks = [("p50", old["p50"], new["p50"], tolerance, TIME_FLOOR, 1e3, "ms")]
+        if "peak" in old and "peak" in new:
+            checks.append(("peak", old["peak"], new["peak"], memory_tolerance, MEMORY_FLOOR,
+                           1 / (1 << 20), "MB"))
+        for metric, was, now, allowed, floor, scale, unit in checks:
+            change = (now - was) / was if was else 0.0
+            if change > allowed and now - was > floor:
+                regressions.append((case, metric))
+                flag = "SLOWER" if metric == "p50" else "MORE"
+            elif change < -allowed and was - now > floor:
+                improved += 1
+                flag = "better"
+            else:
+                continue
+            print(f"{case:<34} {metric:>7} {was * scale:>8.2f}{unit} {now * scale:>8.2f}{unit} "
+                  f"{change:>+7.0%} {flag}")
+    if missing:
+        print(f"{len(missing)} baseline cases not run (filtered, skipped or failed)")
+    print(f"{len(regressions)} regressions, {improved} improvements "
+          f"(tolerance {tolerance:.0%} time, {memory_tolerance:.0%} memory)")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Neatify's formatters and validators.")
+    parser.add_argument("--sizes", default=SIZES, help="comma-separated sizes, e.g. 1K,64K,1M,1G")
+    parser.add_argument("--shapes", default=",".join(SHAPES))
+    parser.add_argument("--formats", default=",".join(GENERATORS))
+    parser.add_argument("--kinds", default="format,stream,validate")
+    parser.add_argument("--budget", type=float, default=2.0,
+                        help="seconds of repeated runs per case (at least one run)")
+    parser.add_argument("--max-memory", default=MAX_MEMORY,
+                        help="largest corpus for the in-memory (non-streaming) cases")
+    parser.add_argument("--max-seconds", type=float, default=MAX_SECONDS,
+                        help="skip larger sizes of a case once one run takes longer")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--save", nargs="?", const=default_baseline(), metavar="PATH")
+    parser.add_argument("--compare", nargs="?", const=default_baseline(), metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed p50 slowdown before a regression (0.25 = 25%%)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s]
+    shapes = [s for s in args.shapes.split(",") if s]
+    formats = [f for f in args.formats.split(",") if f]
+    kinds = [k for k in args.kinds.split(",") if k]
+    unknown = ([s for s in shapes if s not in SHAPES] + [f for f in formats if f not in GENERATORS]
+               + [k for k in kinds if k not in ("format", "stream", "validate")])
+    if unknown:
+        parser.error(f"unknown shape, format or kind: {', '.join(unknown)}")
+    if args.compare and not os.path.exists(args.compare):
+        parser.error(f"no baseline at {args.compare} (create one with --save)")
+
+    results = run_suite(sizes, shapes, formats, kinds, args.budget, not args.no_memory,
+                        parse_size(args.max_memory), args.max_seconds)
+    if args.save:
+        save_baseline(args.save, results, {"sizes": args.sizes, "shapes": shapes,
+                                           "budget": args.budget, "seed": SEED,
+                                           "corpus_version": CORPUS_VERSION})
+    if args.compare:
+        return 1 if compare(args.compare, results, args.tolerance, args.memory_tolerance) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Size and speed of TOON against JSON on synthetic but realistic datasets.
+
+* tabular: a flat employee list (the case TOON tables are made for).
+* nested: orders with a customer object and line items.
+* mixed: event records whose keys and payload shapes vary.
+
+Sizes are UTF-8 bytes; compact JSON uses separators=(",", ":"). Throughput
+is MB of TOON text per second, best of three runs. Every dataset is checked
+to round-trip through TOON unchanged.
+
+Usage: python benchmarks/bench_toon.py [records ...]
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import toon  # noqa: E402
+
+TEAMS = ["Core", "Data", "Infra", "Mobile", "Web"]
+CITIES = ["Oslo", "New York, NY", "Zürich", "São Paulo", "Tokyo"]
+
+
+def tabular(n: int, rng: random.Random) -> dict:
+    return {"employees": [
+        {"id": i, "name": f"Employee {i}", "team": rng.choice(TEAMS),
+         "salary": round(rng.uniform(40_000, 200_000), 2), "remote": rng.random() < 0.4,
+         "city": rng.choice(CITIES)}
+        for i in range(n)]}
+
+
+def nested(n: int, rng: random.Random) -> dict:
+    return {"orders": [
+        {"id": f"ord-{i:06d}", "customer": {"id": rng.randint(1, 10_000), "email": f"c{i}@example.com",
+                                            "address": {"city": rng.choice(CITIES), "zip": f"{rng.randint(0, 99999):05d}"}},
+         "items": [{"sku": f"SKU{rng.randint(1, 999)}", "qty": rng.randint(1, 5),
+                    "price": round(rng.uniform(1, 300), 2)} for _ in range(rng.randint(1, 5))],
+         "notes": rng.choice([None, "leave at door", 'fragile: "glass"', ""])}
+        for i in range(n)]}
+
+
+def mixed(n: int, rng: random.Random) -> list:
+    events = []
+    for i in range(n):
+        event = {"id": i, "type": rng.choice(["push", "issue", "release"]), "at": f"2024-05-{i % 28 + 1:02d}T12:00:00Z"}
+        if event["type"] == "push":
+            event["commits"] = [f"{rng.getrandbits(40):010x}" for _ in range(rng.randint(1, 4))]
+        elif event["type"] == "issue":
+            event["labels"] = rng.sample(["bug", "docs", "perf", "ui"], rng.randint(0, 3))
+            event["body"] = "Steps:\n1. open\n2. crash"
+        else:
+            event["assets"] = [{"name": f"v{i}.tar.gz", "size": rng.randint(1, 1 << 30)}]
+        events.append(event)
+    return events
+
+
+def best(fn, runs: int = 3) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(sizes):
+    print(f"{'records':>8} {'dataset':>8} {'json KB':>9} {'compact':>9} {'toon KB':>9} {'saved':>6} "
+          f"{'json enc':>9} {'toon enc':>9} {'json dec':>9} {'toon dec':>9}  (MB/s)")
+    for n in sizes:
+        for name, make in (("tabular", tabular), ("nested", nested), ("mixed", mixed)):
+            data = make(n, random.Random(7))
+            pretty = json.dumps(data, indent=2, ensure_ascii=False)
+            compact = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+            text = toon.encode(data)
+            if toon.decode(text) != data:
+                raise SystemExit(f"{name}: TOON round trip changed the data")
+            kb = [len(s.encode("utf-8")) / 1024 for s in (pretty, compact, text)]
+            mb = kb[2] / 1024
+            rates = [mb / best(fn) for fn in (lambda: json.dumps(data, indent=2), lambda: toon.encode(data),
+                                              lambda: json.loads(pretty), lambda: toon.decode(text))]
+            print(f"{n:>8} {name:>8} {kb[0]:>9.0f} {kb[1]:>9.0f} {kb[2]:>9.0f} {1 - kb[2] / kb[0]:>6.0%} "
+                  + " ".join(f"{r:>9.1f}" for r in rates))
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000])
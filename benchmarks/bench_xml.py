@@ -0,0 +1,64 @@
+"""Compare minidom and streaming XML formatting on synthetic sitemap/SOAP data.
+
+Usage: python benchmarks/bench_xml.py [records ...]
+"""
+
+import io
+import os
+import sys
+import time
+import tracemalloc
+import xml.dom.minidom
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import xml_stream  # noqa: E402
+
+
+def make_sitemap(records: int) -> str:
+    urls = "".join(
+        f"<url><loc>https://example.com/page/{i}?a=1&amp;b=2</loc>"
+        f"<lastmod>2024-01-{i % 28 + 1:02d}</lastmod>"
+        f"<!-- entry {i} --><note><![CDATA[<raw> & {i}]]></note></url>"
+        for i in range(records)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f"{urls}</urlset>"
+    )
+
+
+def measure(fn, text: str):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(text)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def minidom_format(text: str) -> None:
+    xml.dom.minidom.parseString(text).toprettyxml(indent="    ")
+
+
+def stream_format(text: str) -> None:
+    # Discard output the way a file sink would, so only parser state counts.
+    for _ in xml_stream.iter_format(io.StringIO(text)):
+        pass
+
+
+def main(sizes):
+    print(f"{'records':>8} {'MB':>7} {'engine':>9} {'seconds':>8} {'MB/s':>7} {'peak MB':>8}")
+    for records in sizes:
+        text = make_sitemap(records)
+        mb = len(text.encode()) / 1e6
+        for name, fn in (("minidom", minidom_format), ("stream", stream_format)):
+            elapsed, peak = measure(fn, text)
+            print(f"{records:>8} {mb:>7.2f} {name:>9} {elapsed:>8.3f} "
+                  f"{mb / elapsed:>7.2f} {peak / 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1_000, 10_000, 50_000])
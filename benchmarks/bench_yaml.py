@@ -0,0 +1,97 @@
+"""Multi-document YAML: pure-Python PyYAML vs libyaml vs batches in workers.
+
+Builds a bundle of Kubernetes-style manifests separated by ``---`` and
+times formatting (safe_load_all/dump_all with the Python classes, then
+yaml_stream serially and in isolation.py workers) and linting (whole text
+in one call vs yaml_stream batches in workers). Lint runs on the first
+--lint-docs documents only, since yamllint is slow.
+
+Usage: python benchmarks/bench_yaml.py [documents ...] [--lint-docs N]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import isolation  # noqa: E402
+import yaml_stream  # noqa: E402
+
+yaml = yaml_stream.yaml
+
+
+def manifest(i: int) -> str:
+    return (
+        "---\n"
+        "apiVersion: apps/v1\n"
+        "kind: Deployment\n"
+        "metadata:\n"
+        f"  name: service-{i}\n"
+        "  labels:\n"
+        f"    app: service-{i}\n"
+        "    tier: backend\n"
+        "spec:\n"
+        f"  replicas: {i % 5 + 1}\n"
+        "  template:\n"
+        "    spec:\n"
+        "      containers:\n"
+        f"        - name: app-{i}\n"
+        f"          image: registry.example.com/app:{i}.0\n"
+        "          ports:\n"
+        "            - containerPort: 8080\n"
+        "          env:\n"
+        + "".join(f"            - name: VAR_{k}\n              value: \"value {k} of {i}\"\n"
+                  for k in range(8))
+    )
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def python_format(text: str) -> str:
+    documents = yaml.load_all(text, Loader=yaml.SafeLoader)
+    return "---\n".join(yaml.dump(d, Dumper=yaml.SafeDumper, sort_keys=False, indent=4)
+                        for d in documents)
+
+
+def main(sizes, lint_docs: int):
+    pool = isolation.WorkerPool()
+    warm = manifest(0) + manifest(1)
+    yaml_stream.format_text(warm, call=pool.call, workers=pool.size)
+    yaml_stream.lint(warm, call=pool.call, workers=pool.size)
+    print(f"libyaml: {yaml_stream.ENGINE == 'libyaml'}, workers: {pool.size}")
+    print(f"{'docs':>7} {'MB':>7} {'task':>7} {'engine':>18} {'seconds':>8} {'MB/s':>7}")
+    for count in sizes:
+        text = "".join(manifest(i) for i in range(count))
+        mb = len(text) / 1e6
+        runs = [
+            ("format", "python", python_format, (text,)),
+            ("format", yaml_stream.ENGINE, yaml_stream.format_text, (text,)),
+            ("format", f"{yaml_stream.ENGINE} workers", yaml_stream.format_text,
+             (text, 4, pool.call, pool.size)),
+        ]
+        lint_text = "".join(manifest(i) for i in range(min(count, lint_docs)))
+        runs += [
+            ("lint", "whole text", yaml_stream.lint_batch, (lint_text,)),
+            ("lint", "batches workers", yaml_stream.lint, (lint_text, pool.call, pool.size)),
+        ]
+        for task, engine, func, args in runs:
+            elapsed, _ = timed(func, *args)
+            size = len(args[0]) / 1e6
+            print(f"{count:>7} {size if task == 'lint' else mb:>7.2f} {task:>7} {engine:>18} "
+                  f"{elapsed:>8.3f} {size / elapsed:>7.2f}")
+    pool.close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    lint_docs = 500
+    if "--lint-docs" in args:
+        i = args.index("--lint-docs")
+        lint_docs = int(args[i + 1])
+        del args[i:i + 2]
+    main([int(a) for a in args] or [100, 1000, 5000], lint_docs)
@@ -0,0 +1,241 @@
+"""Content-addressed cache for format/validate/convert results.
+
+Results are keyed by a SHA-256 of (operation, inputs, options, backend
+version). Entries live in an in-process LRU bounded by entry count and
+total bytes, with an optional on-disk tier (a directory of pickles) that
+can be shared by every session and worker on the machine. Only point the
+disk tier at a directory you trust, since entries are unpickled on read.
+
+The disk tier keeps a running byte total and an LRU index of its files,
+built by one scan when the cache is created; files other processes write
+are counted once this process reads them.
+
+The disk tier is enabled by setting NEATIFY_CACHE_DIR; sizes can be tuned
+with NEATIFY_CACHE_MAX_ENTRIES, NEATIFY_CACHE_MAX_MB and
+NEATIFY_CACHE_DISK_MB.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Bump when the output of this project's own formatters changes, so stale
+# results on disk are not served after an upgrade.
+CACHE_VERSION = "3"
+
+_MISSING = object()
+
+
+def make_key(op: str, args: tuple, options: dict, version: str = "") -> str:
+    """Hash an operation and its inputs into a cache key."""
+    h = hashlib.sha256()
+    for part in (CACHE_VERSION, op, version, repr(sorted(options.items()))):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode("utf-8", "surrogatepass")
+        elif not isinstance(arg, bytes):
+            arg = repr(arg).encode("utf-8")
+        h.update(len(arg).to_bytes(8, "little"))
+        h.update(arg)
+    return h.hexdigest()
+
+
+def _sizeof(value) -> int:
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if hasattr(value, "nbytes"):   # values that report their own footprint
+        return value.nbytes
+    return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+class ResultCache:
+    """Two-tier LRU cache with hit/miss/eviction counters."""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 << 20,
+                 disk_dir: str = None, max_disk_bytes: int = 512 << 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._disk = OrderedDict()     # key -> file size, least recently used first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(
+            ["hits", "misses", "evictions", "disk_hits", "disk_writes", "disk_evictions"], 0)
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_scan()
+
+    # --- public API ---
+
+    def get(self, key: str, default=None):
+        """Return the cached value for key, checking memory then disk."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry[0]
+        value = self._disk_get(key)
+        with self._lock:
+            if value is _MISSING:
+                self._counters["misses"] += 1
+                return default
+            self._counters["hits"] += 1
+            self._counters["disk_hits"] += 1
+        self._memory_put(key, value, _sizeof(value))
+        return value
+
+    def put(self, key: str, value, size: int = None) -> None:
+        """Store value under key; size defaults to its length or pickled size."""
+        if size is None:
+            size = _sizeof(value)
+        self._memory_put(key, value, size)
+        if self.disk_dir:
+            self._disk_put(key, value)
+
+    def stats(self) -> dict:
+        """Counters plus current occupancy, for sizing the cache."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            if self.disk_dir:
+                stats["disk_entries"] = len(self._disk)
+                stats["disk_bytes"] = self._disk_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        """Drop the in-process tier (the disk tier is left for other workers)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    # --- in-process tier ---
+
+    def _memory_put(self, key: str, value, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._counters["evictions"] += 1
+
+    # --- disk tier ---
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key + ".pkl")
+
+    def _disk_scan(self) -> None:
+        files = []
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if not name.endswith(".pkl"):
+                    continue
+                try:
+                    st = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                files.append((st.st_mtime, name[:-4], st.st_size))
+        with self._lock:
+            for _, key, size in sorted(files):
+                self._disk[key] = size
+                self._disk_bytes += size
+
+    def _disk_touch(self, key: str, size: int) -> None:
+        """Record key as the most recently used file; caller holds the lock."""
+        self._disk_bytes += size - self._disk.pop(key, 0)
+        self._disk[key] = size
+
+    def _disk_get(self, key: str):
+        if not self.disk_dir:
+            return _MISSING
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+                size = f.tell()
+            os.utime(path)  # refresh recency for other processes' scans
+        except (OSError, pickle.UnpicklingError, EOFError):
+            with self._lock:
+                self._disk_bytes -= self._disk.pop(key, 0)
+            return _MISSING
+        with self._lock:
+            self._disk_touch(key, size)
+        return value
+
+    def _disk_put(self, key: str, value) -> None:
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            os.replace(tmp, path)  # atomic, so concurrent readers never see partial files
+        except OSError:
+            return
+        with self._lock:
+            self._counters["disk_writes"] += 1
+            self._disk_touch(key, size)
+        self._disk_evict()
+
+    def _disk_evict(self) -> None:
+        while True:
+            with self._lock:
+                if self._disk_bytes <= self.max_disk_bytes or not self._disk:
+                    return
+                key, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                self._counters["disk_evictions"] += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass   # already removed by another process
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> ResultCache:
+    """Process-wide cache shared by every Streamlit session in this worker."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ResultCache(
+                max_entries=int(os.environ.get("NEATIFY_CACHE_MAX_ENTRIES", 256)),
+                max_bytes=int(os.environ.get("NEATIFY_CACHE_MAX_MB", 64)) << 20,
+                disk_dir=os.environ.get("NEATIFY_CACHE_DIR") or None,
+                max_disk_bytes=int(os.environ.get("NEATIFY_CACHE_DISK_MB", 512)) << 20,
+            )
+        return _default
+
+
+def cached(op: str, func, *args, version: str = "", size: int = None, **options):
+    """Return func(*args, **options), reusing a stored result for identical inputs.
+
+    Exceptions are not cached, so a failing input is retried on the next call.
+    """
+    cache = default_cache()
+    key = make_key(op, args, options, version)
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = func(*args, **options)
+        cache.put(key, value, size=size)
+    return value
@@ -0,0 +1,101 @@
+"""Bounded-size chart data for CSV Analysis.
+
+Charts never receive raw rows: numeric columns are binned into histograms
+(read off the column's quantile sketch, or counted exactly from the
+csv_cache Parquet copy when there is one) and row-order series are reduced to
+a fixed point budget with Largest-Triangle-Three-Buckets (LTTB), so the
+payload sent to the browser is the same for a thousand rows or a billion.
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_POINTS = 1000
+MAX_POINTS = 5000      # points kept per column while streaming; the view picks fewer
+DEFAULT_BINS = 50
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int):
+    """Downsample a series to n_out points, keeping its visual shape.
+
+    Each inner bucket contributes the point forming the largest triangle with
+    the previously chosen point and the next bucket's average. Work inside a
+    bucket is vectorized; the loop runs once per output point.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    # Averages of each bucket, used as the third triangle vertex.
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    sizes = np.diff(edges)
+    avg_x = np.r_[sums_x / sizes, x[-1]]
+    avg_y = np.r_[sums_y / sizes, y[-1]]
+    chosen = np.empty(n_out, dtype=np.intp)
+    chosen[0], chosen[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        area = np.abs((x[a] - avg_x[b + 1]) * (y[lo:hi] - y[a])
+                      - (x[a] - x[lo:hi]) * (avg_y[b + 1] - y[a]))
+        a = lo + int(area.argmax())
+        chosen[b + 1] = a
+    return x[chosen], y[chosen]
+
+
+def sketch_histogram(stats, bins: int = DEFAULT_BINS) -> pd.Series:
+    """Bin counts for a numeric csv_stats.ColumnStats, read off its t-digest."""
+    m = stats.moments
+    if not m.count:
+        return pd.Series(dtype=float)
+    edges = np.linspace(m.min, m.max, bins + 1)
+    cdf = stats.digest.cdf(edges)
+    counts = np.diff(cdf)
+    counts[0] += cdf[0]  # values equal to the minimum
+    return pd.Series(counts * m.count, index=[f"{e:,.4g}" for e in edges[1:]])
+
+
+def exact_histogram(chunks, lo: float, hi: float, bins: int = DEFAULT_BINS) -> pd.Series:
+    """Bin counts over chunks of float values (NaN skipped), labelled like sketch_histogram."""
+    edges = np.histogram_bin_edges([], bins, range=(lo, hi))
+    counts = np.zeros(bins)
+    for values in chunks:
+        counts += np.histogram(values[~np.isnan(values)], edges)[0]
+    return pd.Series(counts, index=[f"{e:,.4g}" for e in edges[1:]])
+
+
+def top_values(pairs, limit: int) -> pd.Series:
+    """(value, count) pairs as a bar-chart series, capped at limit bars."""
+    return pd.Series(dict(pairs[:limit]), dtype=float)
+
+
+class SeriesSampler:
+    """csv_stats tracker keeping an LTTB-reduced row-order series per numeric column."""
+
+    def __init__(self, points: int = MAX_POINTS):
+        self.points = points
+        self.rows = 0
+        self.series = {}   # column -> (row numbers, values)
+
+    def update(self, chunk: pd.DataFrame):
+        for col in chunk.columns:
+            values = chunk[col]
+            if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+                continue
+            y = values.to_numpy(dtype=np.float64, na_value=np.nan)
+            keep = ~np.isnan(y)
+            x = np.arange(self.rows, self.rows + len(y), dtype=np.float64)[keep]
+            x, y = lttb(x, y[keep], self.points)
+            if col in self.series:
+                old_x, old_y = self.series[col]
+                x, y = np.r_[old_x, x], np.r_[old_y, y]
+                if len(x) > 2 * self.points:
+                    x, y = lttb(x, y, self.points)
+            self.series[col] = (x, y)
+        self.rows += len(chunk)
+
+    def result(self, col: str, points: int = DEFAULT_POINTS) -> pd.Series:
+        x, y = self.series.get(col, (np.empty(0), np.empty(0)))
+        x, y = lttb(x, y, points)
+        return pd.Series(y, index=x.astype(np.int64))
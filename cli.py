@@ -0,0 +1,219 @@
+"""Headless formatter: format or check whole directory trees from the shell.
+
+Usage:
+    python cli.py [--check | --write | --diff] [-j N] PATH [PATH ...]
+
+Files are matched to a formatter by extension (see registry.py) and
+processed in a process pool across all cores. Files already known to be
+formatted are skipped via a manifest of (mtime, size, hash, backend version).
+"""
+
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import registry
+
+MANIFEST_NAME = ".neatify-manifest.json"
+MANIFEST_VERSION = 1
+SKIP_DIRS = {".git", ".hg", ".svn", "__pycache__", "node_modules", ".venv", "venv", ".tox"}
+
+
+# ------------------ Discovery ------------------
+
+def _walk(root: str):
+    for dirpath, dirnames, names in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS and not d.startswith("."))
+        for name in sorted(names):
+            yield os.path.join(dirpath, name)
+
+
+def iter_files(paths: list, fmt: str = None):
+    """Yield (path, formatter name) for every formattable file under paths."""
+    for root in paths:
+        for path in [root] if os.path.isfile(root) else _walk(root):
+            if os.path.basename(path) == MANIFEST_NAME:
+                continue
+            if fmt:
+                yield path, fmt
+                continue
+            backend = registry.formatter_for_extension(os.path.splitext(path)[1])
+            if backend is not None:
+                yield path, backend.name
+
+
+# ------------------ Manifest ------------------
+
+def load_manifest(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_manifest(path: str, files: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "files": files}, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+# ------------------ Worker ------------------
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def process_file(job: tuple) -> dict:
+    """Format one file. Runs in a worker process, so it only takes plain data."""
+    path, fmt, mode, known_hash = job
+    result = {"path": path, "status": "unchanged", "bytes": 0}
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        result["bytes"] = len(raw)
+        result["hash"] = _digest(raw)
+        if known_hash == result["hash"]:
+            result["status"] = "cached"  # touched but not modified since last clean run
+            return result
+        text = raw.decode("utf-8")
+        formatted = registry.get_formatter(fmt)(text).rstrip("\n") + "\n"
+        if formatted == text:
+            return result
+        result["status"] = "changed"
+        if mode == "write":
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                f.write(formatted)
+            result["hash"] = _digest(formatted.encode("utf-8"))
+        elif mode == "diff":
+            result["diff"] = "".join(
+                line if line.endswith("\n") else line + "\n\\ No newline at end of file\n"
+                for line in difflib.unified_diff(
+                    text.splitlines(keepends=True), formatted.splitlines(keepends=True),
+                    fromfile=path, tofile=path,
+                )
+            )
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+# ------------------ Driver ------------------
+
+def run(paths: list, mode: str = "check", jobs: int = None, fmt: str = None,
+        manifest_path: str = None, out=sys.stdout, err=sys.stderr) -> int:
+    """Process paths and return the exit code (1 if anything needs or failed formatting)."""
+    start = time.perf_counter()
+    manifest = load_manifest(manifest_path) if manifest_path else {}
+    versions = {}
+    pending = []
+    counts = dict.fromkeys(["changed", "unchanged", "cached", "skipped", "error"], 0)
+    total_bytes = 0
+
+    for path, name in iter_files(paths, fmt):
+        version = versions.setdefault(name, f"{name}:{registry.get_formatter(name).version()}")
+        key = os.path.abspath(path)
+        entry = manifest.get(key)
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            print(f"error: {path}: {e}", file=err)
+            counts["error"] += 1
+            continue
+        if entry and entry[3] == version:
+            if entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                counts["skipped"] += 1
+                continue
+            pending.append((path, name, mode, entry[2]))
+        else:
+            pending.append((path, name, mode, None))
+
+    workers = jobs or os.cpu_count() or 1
+    if workers > 1 and len(pending) > 1:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        chunksize = max(1, min(64, len(pending) // (workers * 4)))
+        results = pool.map(process_file, pending, chunksize=chunksize)
+    else:
+        pool = None
+        results = map(process_file, pending)
+
+    try:
+        for (path, name, _, _), result in zip(pending, results):
+            status = result["status"]
+            counts[status] += 1
+            total_bytes += result["bytes"]
+            if status == "error":
+                print(f"error: {path}: {result['error']}", file=err)
+                continue
+            if status == "changed":
+                if mode == "check":
+                    print(f"would reformat {path}", file=out)
+                elif mode == "write":
+                    print(f"reformatted {path}", file=out)
+                else:
+                    out.write(result["diff"])
+            if status != "changed" or mode == "write":
+                st = os.stat(path)
+                manifest[os.path.abspath(path)] = [
+                    st.st_mtime_ns, st.st_size, result["hash"], versions[name]]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if manifest_path:
+        save_manifest(manifest_path, manifest)
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    processed = len(pending)
+    print(
+        f"{processed + counts['skipped']} files: {counts['changed']} "
+        f"{'reformatted' if mode == 'write' else 'to reformat'}, {counts['unchanged'] + counts['cached']} "
+        f"unchanged, {counts['skipped']} skipped (manifest), {counts['error']} errors "
+        f"in {elapsed:.2f}s — {processed / elapsed:.1f} files/s, "
+        f"{total_bytes / 1e6 / elapsed:.2f} MB/s",
+        file=err,
+    )
+    if counts["error"] or (counts["changed"] and mode != "write"):
+        return 1
+    return 0
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Format or check files with Neatify's formatters.")
+    parser.add_argument("paths", nargs="+", help="files or directories to process")
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument("--check", dest="mode", action="store_const", const="check",
+                       help="report files that would change (default)")
+    modes.add_argument("--write", dest="mode", action="store_const", const="write",
+                       help="rewrite files in place")
+    modes.add_argument("--diff", dest="mode", action="store_const", const="diff",
+                       help="print a unified diff for files that would change")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--format", dest="fmt", choices=registry.formatter_names(),
+                        help="use this formatter for every file instead of guessing by extension")
+    parser.add_argument("--manifest", default=MANIFEST_NAME,
+                        help=f"manifest path for skipping unchanged files (default: ./{MANIFEST_NAME})")
+    parser.add_argument("--no-manifest", action="store_true", help="process every file")
+    args = parser.parse_args(argv)
+    return run(
+        args.paths,
+        mode=args.mode or "check",
+        jobs=args.jobs,
+        fmt=args.fmt,
+        manifest_path=None if args.no_manifest else args.manifest,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,457 @@
+"""Streaming JSON ↔ XML conversion with xmltodict's mapping conventions.
+
+Output matches ``xmltodict.unparse({"root": json.loads(text)}, pretty=True)``
+and ``json.dumps(xmltodict.parse(text), indent=4)``: ``@name`` keys are
+attributes, ``#text`` is character data, ``#comment`` keys are comments and
+repeated child elements become lists. The difference is that neither side is
+ever held in memory whole.
+
+* JSON → XML is driven by ``json_stream.iter_events``. Each element's start
+  tag is held until its first child, so every ``@attr`` key has to come
+  before the element's children (``xmltodict.parse`` output always does).
+  An attribute key that arrives later raises ``LateAttributeError``.
+* XML → JSON parses with expat and builds one child of the root element at
+  a time. The first child tag streams straight to the output. Other tags are
+  spooled to temporary files, so they can be written in first-appearance
+  order as xmltodict groups them.
+
+Duplicate JSON object keys are converted in turn instead of collapsed.
+"""
+
+import functools
+import json
+import tempfile
+import xml.parsers.expat
+
+import json_stream
+from xml_stream import _escape
+
+ROOT = "root"
+XML_HEADER = '<?xml version="1.0" encoding="utf-8"?>\n'
+INDENT = "\t"            # xmltodict.unparse(pretty=True) defaults
+NEWL = "\n"
+FLUSH_SIZE = 1 << 16
+FLUSH_PIECES = 4096      # output pieces buffered before a write
+SPOOL_SIZE = 1 << 20     # per-tag spool kept in memory before going to disk
+
+
+class LateAttributeError(ValueError):
+    """An @attribute key followed child elements, so its start tag was already written."""
+
+
+# ------------------ Shared helpers ------------------
+
+@functools.lru_cache(maxsize=4096)
+def _validate_name(value, kind: str) -> None:
+    """Reject names xmltodict.unparse rejects (valid names are memoized)."""
+    if not isinstance(value, str):
+        raise ValueError(f"{kind} name must be a string")
+    if value.startswith("?") or value.startswith("!"):
+        raise ValueError(f'Invalid {kind} name: cannot start with "?" or "!"')
+    if "<" in value or ">" in value:
+        raise ValueError(f'Invalid {kind} name: "<" or ">" not allowed')
+    if "/" in value:
+        raise ValueError(f'Invalid {kind} name: "/" not allowed')
+    if '"' in value or "'" in value:
+        raise ValueError(f"Invalid {kind} name: quotes not allowed")
+    if "=" in value:
+        raise ValueError(f'Invalid {kind} name: "=" not allowed')
+    if any(ch.isspace() for ch in value):
+        raise ValueError(f"Invalid {kind} name: whitespace not allowed")
+
+
+def _to_text(value) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _quoteattr(data: str) -> str:
+    """Same result as xml.sax.saxutils.quoteattr."""
+    data = _escape(data).replace("\n", "&#10;").replace("\r", "&#13;").replace("\t", "&#9;")
+    if '"' in data:
+        if "'" in data:
+            return '"%s"' % data.replace('"', "&quot;")
+        return "'%s'" % data
+    return '"%s"' % data
+
+
+# ------------------ JSON → XML ------------------
+
+def _build(event: str, value, events):
+    """Materialize the JSON value that starts with (event, value)."""
+    if event == "value":
+        return value
+    root = {} if event == "start_map" else []
+    stack, keys = [root], [None]
+    for event, value in events:
+        if event == "key":
+            keys[-1] = value
+            continue
+        if event in ("end_map", "end_array"):
+            stack.pop()
+            keys.pop()
+            if not stack:
+                return root
+            continue
+        item = value if event == "value" else ({} if event == "start_map" else [])
+        top = stack[-1]
+        if isinstance(top, dict):
+            top[keys[-1]] = item
+        else:
+            top.append(item)
+        if event != "value":
+            stack.append(item)
+            keys.append(None)
+    raise ValueError("Unexpected end of JSON input")
+
+
+class _Element:
+    """A JSON object being written as an XML element."""
+
+    def __init__(self, key: str, depth: int):
+        _validate_name(key, "element")
+        self.key = key
+        self.depth = depth
+        self.attrs = {}
+        self.started = False
+        self.children = False
+        self.cdata = None
+        self.pending = None   # key whose value comes next
+
+    def start(self, out: list) -> None:
+        if not self.started:
+            attrs = "".join(f" {k}={_quoteattr(v)}" for k, v in self.attrs.items())
+            out.append(f"{INDENT * self.depth}<{self.key}{attrs}>")
+            self.started = True
+
+    def open_children(self, out: list) -> None:
+        self.start(out)
+        if not self.children:
+            out.append(NEWL)
+            self.children = True
+
+    def set_attribute(self, key: str, value) -> None:
+        if self.started:
+            raise LateAttributeError(
+                f"Attribute {key!r} of <{self.key}> follows its child elements; "
+                "streaming conversion needs attributes first")
+        if key == "@xmlns" and isinstance(value, dict):
+            for prefix, uri in value.items():
+                _validate_name(prefix, "attribute")
+                self.attrs["xmlns" + (f":{prefix}" if prefix else "")] = str(uri)
+            return
+        name = key[1:]
+        _validate_name(name, "attribute")
+        self.attrs[name] = value if isinstance(value, str) else str(value)
+
+    def end(self, out: list) -> None:
+        self.start(out)
+        if self.cdata is not None:
+            out.append(_escape(self.cdata))
+        if self.children:
+            out.append(INDENT * self.depth)
+        out.append(f"</{self.key}>")
+        if self.depth:
+            out.append(NEWL)
+
+
+class _Array:
+    """A JSON array whose items are written as sibling elements named key."""
+
+    def __init__(self, key: str, depth: int, parent: _Element):
+        self.key = key
+        self.depth = depth
+        self.parent = parent
+        self.count = 0
+
+
+def _scalar_element(key: str, value, depth: int, out: list) -> None:
+    _validate_name(key, "element")
+    text = "" if value is None else _escape(_to_text(value))
+    out.append(f"{INDENT * depth}<{key}>{text}</{key}>")
+    if depth:
+        out.append(NEWL)
+
+
+def _comments(value, depth: int) -> list:
+    """Lines for a #comment value; none for an empty list, null or ''."""
+    lines = []
+    for text in (value if isinstance(value, list) else [value]):
+        if text is None:
+            continue
+        text = _to_text(text)
+        if not text:
+            continue
+        if "--" in text:
+            raise ValueError("Comment text cannot contain '--'")
+        if text.endswith("-"):
+            raise ValueError("Comment text cannot end with '-'")
+        lines.append(f"{INDENT * depth}<!--{_escape(text)}-->{NEWL}")
+    return lines
+
+
+def iter_json_to_xml(src, root: str = ROOT, chunk_size: int = json_stream.CHUNK_SIZE):
+    """Yield XML text in pieces for the JSON document read from src."""
+    events = json_stream.iter_events(src, chunk_size)
+    out = [XML_HEADER]
+    stack = []
+
+    def begin(key, depth, event, value, parent):
+        """Start writing the value of key at depth; containers go on the stack."""
+        if event == "start_map":
+            if parent is not None:
+                parent.open_children(out)
+            stack.append(_Element(key, depth))
+        elif event == "start_array":
+            stack.append(_Array(key, depth, parent))
+        else:
+            if parent is not None:
+                parent.open_children(out)
+            _scalar_element(key, value, depth, out)
+
+    event, value = next(events)
+    begin(root, 0, event, value, None)
+    for event, value in events:
+        frame = stack[-1] if stack else None
+        if isinstance(frame, _Element):
+            if event == "key":
+                frame.pending = value
+                continue
+            if event == "end_map":
+                frame.end(out)
+                stack.pop()
+            else:
+                key, frame.pending = frame.pending, None
+                if key == "#text":
+                    frame.cdata = _to_text(_build(event, value, events))
+                elif isinstance(key, str) and key.startswith("@"):
+                    frame.set_attribute(key, _build(event, value, events))
+                elif key == "#comment":
+                    lines = _comments(_build(event, value, events), frame.depth + 1)
+                    if lines:
+                        frame.open_children(out)
+                        out.extend(lines)
+                else:
+                    begin(key, frame.depth + 1, event, value, frame)
+        elif isinstance(frame, _Array):
+            if event == "end_array":
+                stack.pop()
+                continue
+            if frame.depth == 0 and frame.count:
+                raise ValueError("document with multiple roots")
+            frame.count += 1
+            if frame.parent is not None:
+                frame.parent.open_children(out)
+            if event == "start_map":
+                stack.append(_Element(frame.key, frame.depth))
+            else:
+                _scalar_element(frame.key, _build(event, value, events), frame.depth, out)
+        else:
+            raise ValueError("Unexpected JSON event after the document")
+        if len(out) >= FLUSH_PIECES:
+            yield "".join(out)
+            out.clear()
+    if out:
+        yield "".join(out)
+
+
+def json_to_xml_stream(src, dst, root: str = ROOT) -> None:
+    """Convert JSON from file object src into XML written to dst."""
+    for piece in iter_json_to_xml(src, root=root):
+        dst.write(piece)
+
+
+# ------------------ XML → JSON ------------------
+
+_PAD = " " * 4
+
+
+def _dump(value, level: int) -> str:
+    """json.dumps(value, indent=4) as it appears nested level levels deep."""
+    return json.dumps(value, indent=4).replace("\n", "\n" + _PAD * level)
+
+
+class _Group:
+    """All children of the root element sharing one tag."""
+
+    def __init__(self, key: str, spool: bool):
+        self.key = key
+        self.count = 0
+        self.first = None
+        self.spool = tempfile.SpooledTemporaryFile(SPOOL_SIZE, mode="w+", encoding="utf-8") if spool else None
+
+    def add(self, value, out: list) -> None:
+        """Record one item; out is the direct output for the streamed group."""
+        self.count += 1
+        if self.count == 1:
+            self.first = value
+            return
+        target = out if self.spool is None else None
+        if self.count == 2:
+            text = "[\n" + _PAD * 3 + _dump(self.first, 3)
+            self.first = None
+            if target is None:
+                self.spool.write(text)
+            else:
+                target.append(f'{_PAD * 2}{json.dumps(self.key)}: {text}')
+        piece = ",\n" + _PAD * 3 + _dump(value, 3)
+        if target is None:
+            self.spool.write(piece)
+        else:
+            target.append(piece)
+
+    def finish(self, dst) -> None:
+        """Write the group's closing (or its single value) to dst."""
+        if self.count == 1:
+            dst.write(f'{_PAD * 2}{json.dumps(self.key)}: {_dump(self.first, 2)}')
+        elif self.spool is None:
+            dst.write("\n" + _PAD * 2 + "]")
+        else:
+            dst.write(f'{_PAD * 2}{json.dumps(self.key)}: ')
+            self.spool.seek(0)
+            while True:
+                block = self.spool.read(FLUSH_SIZE)
+                if not block:
+                    break
+                dst.write(block)
+            self.spool.close()
+            dst.write("\n" + _PAD * 2 + "]")
+
+
+class _Collector:
+    """Expat callbacks reproducing xmltodict.parse, handing over root children one by one."""
+
+    def __init__(self, on_child):
+        self.on_child = on_child
+        self.depth = 0
+        self.stack = []
+        self.item = None
+        self.data = []
+        self.root = None
+        self.root_attrs = None
+        self.root_text = []
+
+    def start(self, name, attrs):
+        self.depth += 1
+        if self.depth == 1:
+            self.root = name
+            self.root_attrs = {"@" + attrs[i]: attrs[i + 1] for i in range(0, len(attrs), 2)} or None
+            return
+        self.stack.append((self.item, self.data))
+        self.item = {"@" + attrs[i]: attrs[i + 1] for i in range(0, len(attrs), 2)} or None
+        self.data = []
+
+    def end(self, name):
+        self.depth -= 1
+        if self.depth == 0:
+            return
+        data = "".join(self.data) if self.data else None
+        item = self.item
+        self.item, self.data = self.stack.pop()
+        if data:
+            data = data.strip() or None
+        if item is not None and data:
+            item = _push(item, "#text", data)
+        elif item is None:
+            item = data
+        if self.depth == 1:
+            self.on_child(name, item)
+        else:
+            self.item = _push(self.item, name, item)
+
+    def characters(self, data):
+        if self.depth == 1:
+            # Root-level text only matters once it is not whitespace.
+            if self.root_text or data.strip():
+                self.root_text.append(data)
+        else:
+            self.data.append(data)
+
+
+def _push(item, key, data):
+    if item is None:
+        item = {}
+    if key in item:
+        value = item[key]
+        if isinstance(value, list):
+            value.append(data)
+        else:
+            item[key] = [value, data]
+    else:
+        item[key] = data
+    return item
+
+
+def _forbid_entities(*args, **kwargs):
+    raise ValueError("entities are disabled")
+
+
+def xml_to_json_stream(src, dst, chunk_size: int = json_stream.CHUNK_SIZE) -> None:
+    """Convert XML from file object src (text or binary) into JSON written to dst."""
+    groups = {}
+    order = []
+    out = []
+    state = {"opened": False}
+
+    def open_document():
+        if not state["opened"]:
+            state["opened"] = True
+            dst.write("{\n" + _PAD + json.dumps(collector.root) + ": {")
+            sep = "\n"
+            for key, value in (collector.root_attrs or {}).items():
+                dst.write(f"{sep}{_PAD * 2}{json.dumps(key)}: {json.dumps(value)}")
+                sep = ",\n"
+            state["sep"] = sep
+
+    def on_child(name, item):
+        group = groups.get(name)
+        if group is None:
+            group = groups[name] = _Group(name, spool=bool(groups))
+            order.append(name)
+        if name == order[0] and group.count == 1:
+            # Second item of the streamed group: the list opens now.
+            open_document()
+            dst.write(state["sep"])
+        group.add(item, out)
+        if out:
+            dst.write("".join(out))
+            out.clear()
+
+    collector = _Collector(on_child)
+    parser = xml.parsers.expat.ParserCreate()
+    parser.ordered_attributes = True
+    parser.buffer_text = True
+    parser.StartElementHandler = collector.start
+    parser.EndElementHandler = collector.end
+    parser.CharacterDataHandler = collector.characters
+    parser.EntityDeclHandler = _forbid_entities
+    while True:
+        chunk = src.read(chunk_size)
+        parser.Parse(chunk, not chunk)
+        if not chunk:
+            break
+
+    text = "".join(collector.root_text).strip() or None
+    if not order:
+        # No child elements: the root is a scalar or a small dict.
+        value = collector.root_attrs
+        if value is not None and text:
+            value["#text"] = text
+        elif value is None:
+            value = text
+        dst.write(json.dumps({collector.root: value}, indent=4))
+        return
+    first = groups[order[0]]
+    if first.count == 1:
+        open_document()
+        dst.write(state["sep"])
+    for i, name in enumerate(order):
+        if i:
+            dst.write(",\n")
+        groups[name].finish(dst)
+    if text:
+        dst.write(f',\n{_PAD * 2}"#text": {json.dumps(text)}')
+    dst.write("\n" + _PAD + "}\n}")
@@ -0,0 +1,275 @@
+"""On-disk columnar cache for CSV Analysis, keyed by file hash.
+
+The first analysis of a CSV stores, in a directory named after the file's
+SHA-256:
+
+* ``data.parquet``: the parsed rows, written one row group per chunk in
+  the same pass that computes the statistics. Columns that csv_stats
+  treats as numeric are stored as float64, all others as strings.
+* ``analysis.pkl``: the csv_stats.CsvAnalysis (column statistics and
+  preview) and the group-by trackers it was built with.
+
+Opening the same file again (a re-upload, another session, a restart)
+unpickles the summaries instead of parsing the CSV. Charts that need raw
+values read only their own column from the Parquet file, in row-group
+batches. Without pyarrow, only the summaries are stored.
+
+The cache is enabled by setting NEATIFY_CSV_CACHE_DIR. Only point it at a
+directory you trust, since entries are unpickled on read. Without it,
+build() only analyzes and the summaries live as long as the Entry does.
+Entries are evicted least recently used first once the directory holds
+more than NEATIFY_CSV_CACHE_MB (default 2048).
+"""
+
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+import charts
+import csv_stats
+import tracing
+
+CACHE_DIR = os.environ.get("NEATIFY_CSV_CACHE_DIR") or None
+MAX_BYTES = int(float(os.environ.get("NEATIFY_CSV_CACHE_MB", 2048)) * (1 << 20))
+VERSION = "1"           # bump when CsvAnalysis or the tracker classes change
+STALE_SECONDS = 3600    # unfinished builds older than this are removed
+
+DATA = "data.parquet"
+SUMMARY = "analysis.pkl"
+
+
+def key(sha256: str) -> str:
+    return f"{sha256}-v{VERSION}"
+
+
+def _arrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+# ------------------ Writing ------------------
+
+class ParquetSink:
+    """csv_stats tracker writing every chunk to a Parquet file, one row group each.
+
+    The schema comes from the first chunk. If a later chunk cannot be
+    converted, the file is removed and the summaries are cached alone.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.writer = None
+        self.numeric = set()
+        self.failed = False
+
+    def _table(self, chunk: pd.DataFrame):
+        pa = _arrow()
+        arrays = []
+        for name in chunk.columns:
+            series = chunk[name]
+            if name in self.numeric:
+                if not pd.api.types.is_numeric_dtype(series):
+                    series = pd.to_numeric(series, errors="coerce")
+                arrays.append(pa.array(series.to_numpy(dtype="float64", na_value=float("nan")),
+                                       type=pa.float64(), from_pandas=True))
+            else:
+                arrays.append(pa.array(series.astype("string"), type=pa.string(), from_pandas=True))
+        return pa.Table.from_arrays(arrays, schema=self.writer.schema)
+
+    def update(self, chunk: pd.DataFrame):
+        if self.failed:
+            return
+        pa = _arrow()
+        try:
+            if self.writer is None:
+                # Same rule as CsvAnalysis, so stored types match the statistics.
+                self.numeric = {
+                    name for name in chunk.columns
+                    if pd.api.types.is_numeric_dtype(chunk[name])
+                    and not pd.api.types.is_bool_dtype(chunk[name])
+                }
+                schema = pa.schema([(str(name), pa.float64() if name in self.numeric else pa.string())
+                                    for name in chunk.columns])
+                self.writer = pa.parquet.ParquetWriter(self.path, schema)
+            self.writer.write_table(self._table(chunk))
+        except (pa.ArrowException, OSError, TypeError, ValueError):
+            self.failed = True
+            self.close()
+
+    def close(self):
+        if self.writer is not None:
+            try:
+                self.writer.close()
+            except OSError:
+                self.failed = True
+            self.writer = None
+        if self.failed and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# ------------------ Entries ------------------
+
+class Entry:
+    """Cached summaries of one CSV, plus column reads from its Parquet copy."""
+
+    def __init__(self, key: str, path, analysis, trackers: dict):
+        self.key = key
+        self.path = path      # None when the cache is disabled
+        self.analysis = analysis
+        self.trackers = trackers
+        self._memo = {}
+
+    @property
+    def columnar(self) -> bool:
+        return (self.path is not None and _arrow() is not None
+                and os.path.exists(os.path.join(self.path, DATA)))
+
+    def iter_column(self, column: str):
+        """Float arrays of a numeric column, one row-group batch at a time."""
+        pq = _arrow().parquet
+        data = pq.ParquetFile(os.path.join(self.path, DATA))
+        for batch in data.iter_batches(batch_size=csv_stats.CHUNK_ROWS, columns=[column]):
+            yield batch.column(0).to_numpy(zero_copy_only=False)
+
+    def histogram(self, column: str, bins: int = charts.DEFAULT_BINS) -> pd.Series:
+        """Exact bin counts from the Parquet copy; from the t-digest without one."""
+        stats = self.analysis.columns[column]
+        if (column, bins) in self._memo:
+            return self._memo[column, bins]
+        if not self.columnar or not stats.moments.count:
+            return charts.sketch_histogram(stats, bins)
+        with tracing.span("csv_cache.histogram", column=column, bins=bins):
+            try:
+                counts = charts.exact_histogram(self.iter_column(column), stats.moments.min,
+                                                stats.moments.max, bins)
+            except OSError:   # evicted by another session
+                return charts.sketch_histogram(stats, bins)
+        self._memo[column, bins] = counts
+        return counts
+
+
+def load(sha256: str):
+    """The cached Entry for a file hash, or None."""
+    if not CACHE_DIR:
+        return None
+    path = os.path.join(CACHE_DIR, key(sha256))
+    summary = os.path.join(path, SUMMARY)
+    with tracing.span("csv_cache.load") as span:
+        try:
+            with open(summary, "rb") as f:
+                analysis, trackers = pickle.load(f)
+            os.utime(summary)   # refresh recency for eviction
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            span.set(hit=False)
+            return None
+        span.set(hit=True)
+    return Entry(key(sha256), path, analysis, trackers)
+
+
+def build(sha256: str, f, trackers: dict, progress=None, encoding: str = None) -> Entry:
+    """Analyze a CSV file object with trackers, store the result and return its Entry.
+
+    Caching is best effort: if the entry cannot be written, the analysis is
+    still returned.
+    """
+    if not CACHE_DIR:
+        with tracing.span("csv_cache.build") as span:
+            analysis = csv_stats.analyze_csv(f, trackers=trackers.values(), progress=progress,
+                                             encoding=encoding)
+            span.set(rows=analysis.rows, columnar=False)
+        return Entry(key(sha256), None, analysis, trackers)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, key(sha256))
+    tmp = tempfile.mkdtemp(prefix=f".{key(sha256)}-", dir=CACHE_DIR)
+    sink = ParquetSink(os.path.join(tmp, DATA)) if _arrow() is not None else None
+    try:
+        with tracing.span("csv_cache.build") as span:
+            try:
+                analysis = csv_stats.analyze_csv(f, trackers=[*trackers.values(), *filter(None, [sink])],
+                                                 progress=progress, encoding=encoding)
+            finally:
+                if sink is not None:
+                    sink.close()
+            analysis.trackers = list(trackers.values())
+            span.set(rows=analysis.rows, columnar=sink is not None and not sink.failed)
+            try:
+                with open(os.path.join(tmp, SUMMARY), "wb") as out:
+                    pickle.dump((analysis, trackers), out, pickle.HIGHEST_PROTOCOL)
+                os.rename(tmp, path)   # atomic; fails if another session stored it first
+            except OSError:
+                pass
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    evict(keep=key(sha256))
+    return Entry(key(sha256), path, analysis, trackers)
+
+
+# ------------------ Eviction ------------------
+
+def _entry_size(path: str) -> int:
+    size = 0
+    for name in os.listdir(path):
+        try:
+            size += os.path.getsize(os.path.join(path, name))
+        except OSError:
+            pass
+    return size
+
+
+def evict(keep: str = None, max_bytes: int = None):
+    """Remove least recently used entries until the cache fits in max_bytes.
+
+    keep is never removed, but loses its Parquet copy if that alone is over
+    the budget.
+    """
+    if not CACHE_DIR:
+        return
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    entries, total = [], 0
+    try:
+        names = os.listdir(CACHE_DIR)
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(CACHE_DIR, name)
+        try:
+            if name.startswith("."):
+                if time.time() - os.path.getmtime(path) > STALE_SECONDS:
+                    shutil.rmtree(path, ignore_errors=True)
+                continue
+            used = os.path.getmtime(os.path.join(path, SUMMARY))
+            size = _entry_size(path)
+        except OSError:
+            continue
+        entries.append((used, size, name))
+        total += size
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            return
+        path = os.path.join(CACHE_DIR, name)
+        if name == keep:
+            data = os.path.join(path, DATA)
+            if os.path.exists(data):
+                total -= os.path.getsize(data)
+                os.remove(data)
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+
+def stats() -> dict:
+    """Entries and bytes on disk, for the cache statistics panel."""
+    try:
+        names = [n for n in os.listdir(CACHE_DIR) if not n.startswith(".")] if CACHE_DIR else []
+    except OSError:
+        names = []
+    return {"enabled": bool(CACHE_DIR), "entries": len(names),
+            "bytes": sum(_entry_size(os.path.join(CACHE_DIR, n)) for n in names)}
@@ -0,0 +1,503 @@
+"""Chunked, memory-bounded statistics for CSV Analysis.
+
+A CSV is read in chunks of ``chunk_rows`` rows and folded into mergeable
+per-column summaries, so memory depends on the chunk size and the sketch
+sizes, never on the file size:
+
+* count / mean / std / min / max: Welford moments, merged per chunk with
+  Chan's parallel update.
+* quartiles: a merging t-digest. Values are kept verbatim until
+  ``buffer_size`` of them have been seen, so small files get the exact
+  quantiles ``DataFrame.describe`` reports.
+* distinct counts: HyperLogLog, backed by an exact set of value hashes
+  until ``exact_limit`` distinct values have been seen.
+* top values / frequencies: Count-Min sketch plus a small candidate set,
+  again exact (a plain counter) until ``exact_limit`` distinct values.
+
+Every summary has ``merge()``, so chunks can also be summarised elsewhere
+(another process) and combined.
+"""
+
+import math
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 200_000
+EXACT_LIMIT = 50_000       # distinct values tracked exactly before switching to sketches
+DIGEST_BUFFER = 100_000    # raw values kept per numeric column before compressing
+
+
+def _hashes(values) -> np.ndarray:
+    """Stable 64-bit hashes for a 1-D array/Series/Index of values."""
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+
+
+# ------------------ Moments ------------------
+
+class Moments:
+    """Count, mean, variance, min and max (Welford/Chan)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: np.ndarray):
+        if len(values):
+            mean = float(values.mean())
+            self._combine(len(values), mean, float(((values - mean) ** 2).sum()),
+                          float(values.min()), float(values.max()))
+
+    def merge(self, other: "Moments"):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+
+    def _combine(self, n, mean, m2, lo, hi):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, lo)
+        self.max = max(self.max, hi)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+
+# ------------------ Quantiles ------------------
+
+class TDigest:
+    """Merging t-digest (k1 scale function), exact until the first compression."""
+
+    def __init__(self, compression: int = 200, buffer_size: int = DIGEST_BUFFER):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = math.inf
+        self.max = -math.inf
+        self.exact = True
+        self._buffer = []      # (values, weights or None) arrays not yet merged
+        self._buffered = 0
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum()) + sum(
+            len(v) if w is None else float(w.sum()) for v, w in self._buffer)
+
+    def update(self, values: np.ndarray, weights: np.ndarray = None):
+        if not len(values):
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._buffer.append((values, weights))
+        self._buffered += len(values)
+        if self._buffered > self.buffer_size:
+            self._compress()
+
+    def merge(self, other: "TDigest"):
+        for values, weights in other._buffer:
+            self.update(values, weights)
+        if len(other.means):
+            self.exact = False
+            self.update(other.means, other.weights)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _compress(self):
+        values = np.concatenate([self.means] + [v for v, _ in self._buffer])
+        weights = np.concatenate([self.weights] + [
+            np.ones(len(v)) if w is None else w for v, w in self._buffer])
+        self._buffer, self._buffered = [], 0
+        self.exact = False
+        order = np.argsort(values, kind="stable")
+        values, weights = values[order], weights[order]
+        cum = np.cumsum(weights)
+        q = (cum - weights / 2) / cum[-1]
+        # Centroids may only span one unit of k = δ/2π·asin(2q-1); the scale is
+        # steep near q=0 and q=1, so tail centroids stay small and accurate.
+        k = np.floor(self.compression / (2 * math.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1)))
+        starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(values * weights, starts) / self.weights
+
+    def quantile(self, q: float) -> float:
+        if self.exact:
+            values = [v for v, _ in self._buffer]
+            return float(np.quantile(np.concatenate(values), q)) if values else math.nan
+        if self._buffer:
+            self._compress()
+        cum = np.cumsum(self.weights)
+        centers = cum - self.weights / 2
+        return float(np.interp(q * cum[-1], np.r_[0.0, centers, cum[-1]],
+                               np.r_[self.min, self.means, self.max]))
+
+    def cdf(self, x: np.ndarray) -> np.ndarray:
+        """Approximate fraction of values <= each x."""
+        if self._buffer:
+            if self.exact:
+                values = np.sort(np.concatenate([v for v, _ in self._buffer]))
+                return np.searchsorted(values, x, side="right") / len(values)
+            self._compress()
+        cum = np.cumsum(self.weights)
+        centers = cum - self.weights / 2
+        return np.interp(x, np.r_[self.min, self.means, self.max],
+                         np.r_[0.0, centers, cum[-1]]) / cum[-1]
+
+
+# ------------------ Distinct counts ------------------
+
+class HyperLogLog:
+    """Distinct-count estimate, exact while fewer than exact_limit values are seen."""
+
+    def __init__(self, p: int = 14, exact_limit: int = EXACT_LIMIT):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+        self.exact_limit = exact_limit
+        self.exact = set()     # value hashes, dropped once over the limit
+
+    def update(self, hashes: np.ndarray):
+        if not len(hashes):
+            return
+        idx = (hashes >> np.uint64(64 - self.p)).astype(np.intp)
+        rest = ((hashes << np.uint64(self.p)) >> np.uint64(32)).astype(np.float64)
+        rank = (33 - np.frexp(rest)[1]).astype(np.uint8)  # leading zeros + 1
+        np.maximum.at(self.registers, idx, rank)
+        if self.exact is not None:
+            self.exact.update(np.unique(hashes).tolist())
+            if len(self.exact) > self.exact_limit:
+                self.exact = None
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        if self.exact is not None and other.exact is not None:
+            self.exact |= other.exact
+            if len(self.exact) > self.exact_limit:
+                self.exact = None
+        else:
+            self.exact = None
+
+    def estimate(self) -> int:
+        if self.exact is not None:
+            return len(self.exact)
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        est = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int32))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if est <= 2.5 * m and zeros:
+            est = m * math.log(m / zeros)  # linear counting for small cardinalities
+        return int(round(est))
+
+
+# ------------------ Frequencies ------------------
+
+class HeavyHitters:
+    """Most frequent values: exact counter while small, Count-Min sketch after."""
+
+    def __init__(self, width: int = 2048, depth: int = 5, capacity: int = 64,
+                 exact_limit: int = EXACT_LIMIT):
+        self.width = width
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.capacity = capacity
+        self.exact_limit = exact_limit
+        self.exact = Counter()
+        self.candidates = {}   # value -> hash, once exact tracking is dropped
+
+    def _cells(self, hashes: np.ndarray) -> np.ndarray:
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = hashes >> np.uint64(32)
+        rows = np.arange(self.table.shape[0], dtype=np.uint64)[:, None]
+        return ((h1 + rows * h2) % np.uint64(self.width)).astype(np.intp)
+
+    def _estimates(self, hashes: np.ndarray) -> np.ndarray:
+        cells = self._cells(hashes)
+        return self.table[np.arange(len(cells))[:, None], cells].min(axis=0)
+
+    def update(self, counts: pd.Series, hashes: np.ndarray = None):
+        """Add a chunk's value_counts() (index = value, values = count)."""
+        if counts.empty:
+            return
+        if hashes is None:
+            hashes = _hashes(counts.index)
+        cells = self._cells(hashes)
+        for row in range(len(cells)):
+            np.add.at(self.table[row], cells[row], counts.to_numpy())
+        if self.exact is not None:
+            self.exact.update(dict(zip(counts.index, counts.to_numpy().tolist())))
+            if len(self.exact) <= self.exact_limit:
+                return
+            counts = pd.Series(dict(self.exact.most_common(self.capacity)))
+            self.exact = None
+        top = counts.nlargest(self.capacity)
+        self.candidates.update(zip(top.index, _hashes(top.index)))
+        self._prune()
+
+    def _prune(self):
+        if len(self.candidates) > self.capacity:
+            items = list(self.candidates.items())
+            estimates = self._estimates(np.array([h for _, h in items], dtype=np.uint64))
+            keep = np.argsort(-estimates, kind="stable")[:self.capacity]
+            self.candidates = dict(items[i] for i in keep)
+
+    def merge(self, other: "HeavyHitters"):
+        self.table += other.table
+        if self.exact is not None and other.exact is not None:
+            self.exact.update(other.exact)
+            if len(self.exact) <= self.exact_limit:
+                return
+        for tracked in (self.exact, other.exact):
+            if tracked:
+                top = tracked.most_common(self.capacity)
+                self.candidates.update(zip([v for v, _ in top], _hashes([v for v, _ in top])))
+        self.candidates.update(other.candidates)
+        self.exact = None
+        self._prune()
+
+    def most_common(self, n: int = 10) -> list:
+        if self.exact is not None:
+            return self.exact.most_common(n)
+        if not self.candidates:
+            return []
+        values = list(self.candidates)
+        estimates = self._estimates(np.array(list(self.candidates.values()), dtype=np.uint64))
+        ranked = sorted(zip(values, estimates.tolist()), key=lambda vc: -vc[1])
+        return ranked[:n]
+
+
+# ------------------ Columns ------------------
+
+class ColumnStats:
+    """Mergeable summary of one column; numeric or categorical."""
+
+    def __init__(self, name: str, numeric: bool):
+        self.name = name
+        self.numeric = numeric
+        self.rows = 0
+        if numeric:
+            self.moments = Moments()
+            self.digest = TDigest()
+        else:
+            self.count = 0
+            self.distinct = HyperLogLog()
+            self.frequent = HeavyHitters()
+
+    def update(self, series: pd.Series):
+        self.rows += len(series)
+        if self.numeric:
+            if not pd.api.types.is_numeric_dtype(series):
+                series = pd.to_numeric(series, errors="coerce")
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            values = values[~np.isnan(values)]
+            self.moments.update(values)
+            self.digest.update(values)
+        else:
+            series = series.dropna()
+            self.count += len(series)
+            counts = series.value_counts(sort=False)
+            hashes = _hashes(counts.index)
+            self.distinct.update(hashes)
+            self.frequent.update(counts, hashes)
+
+    def merge(self, other: "ColumnStats"):
+        self.rows += other.rows
+        if self.numeric:
+            self.moments.merge(other.moments)
+            self.digest.merge(other.digest)
+        else:
+            self.count += other.count
+            self.distinct.merge(other.distinct)
+            self.frequent.merge(other.frequent)
+
+    @property
+    def non_null(self) -> int:
+        return self.moments.count if self.numeric else self.count
+
+    def describe(self) -> dict:
+        """Same keys DataFrame.describe(include="all") reports for the column."""
+        if self.numeric:
+            m = self.moments
+            return {
+                "count": float(m.count),
+                "mean": m.mean if m.count else math.nan,
+                "std": m.std,
+                "min": m.min if m.count else math.nan,
+                "25%": self.digest.quantile(0.25),
+                "50%": self.digest.quantile(0.5),
+                "75%": self.digest.quantile(0.75),
+                "max": m.max if m.count else math.nan,
+            }
+        top = self.frequent.most_common(1)
+        return {
+            "count": self.count,
+            "unique": self.distinct.estimate(),
+            "top": top[0][0] if top else math.nan,
+            "freq": top[0][1] if top else math.nan,
+        }
+
+    @property
+    def approximate(self) -> bool:
+        if self.numeric:
+            return not self.digest.exact
+        return self.distinct.exact is None or self.frequent.exact is None
+
+
+# ------------------ Group trackers ------------------
+# Small helpers for the column-specific panels (per-group means, top rows,
+# group members); each keeps a bounded amount of state across chunks.
+
+class GroupMean:
+    """Mean of value per key, for at most max_groups keys."""
+
+    def __init__(self, key: str, value: str, max_groups: int = 10_000):
+        self.key, self.value, self.max_groups = key, value, max_groups
+        self.sums, self.counts = {}, {}
+        self.truncated = False
+
+    def update(self, chunk: pd.DataFrame):
+        if self.key not in chunk or self.value not in chunk:
+            return
+        values = pd.to_numeric(chunk[self.value], errors="coerce")
+        agg = values.groupby(chunk[self.key]).agg(["sum", "count"])
+        for key, (total, count) in zip(agg.index, agg.to_numpy().tolist()):
+            if key not in self.sums and len(self.sums) >= self.max_groups:
+                self.truncated = True
+                continue
+            self.sums[key] = self.sums.get(key, 0.0) + total
+            self.counts[key] = self.counts.get(key, 0) + count
+
+    def result(self) -> pd.Series:
+        means = {k: self.sums[k] / self.counts[k] for k in self.sums if self.counts[k]}
+        return pd.Series(means, dtype=float).sort_values(ascending=False)
+
+
+class TopRows:
+    """The n rows with the largest value in column (first occurrence wins ties)."""
+
+    def __init__(self, column: str, n: int = 10):
+        self.column, self.n = column, n
+        self.rows = None
+
+    def update(self, chunk: pd.DataFrame):
+        if self.column not in chunk:
+            return
+        if not pd.api.types.is_numeric_dtype(chunk[self.column]):
+            chunk = chunk.assign(**{self.column: pd.to_numeric(chunk[self.column], errors="coerce")})
+        top = chunk.nlargest(self.n, self.column)
+        self.rows = top if self.rows is None else pd.concat([self.rows, top]).nlargest(self.n, self.column)
+
+    def result(self) -> pd.DataFrame:
+        return self.rows if self.rows is not None else pd.DataFrame()
+
+
+class GroupMembers:
+    """Up to limit values of value per key, plus how many there were in total."""
+
+    def __init__(self, key: str, value: str, limit: int = 50, max_groups: int = 1_000):
+        self.key, self.value, self.limit, self.max_groups = key, value, limit, max_groups
+        self.members, self.totals = {}, Counter()
+
+    def update(self, chunk: pd.DataFrame):
+        if self.key not in chunk or self.value not in chunk:
+            return
+        for key, values in chunk[self.value].dropna().groupby(chunk[self.key]):
+            if key not in self.members and len(self.members) >= self.max_groups:
+                continue
+            self.totals[key] += len(values)
+            kept = self.members.setdefault(key, [])
+            kept.extend(values.iloc[:self.limit - len(kept)].astype(str).tolist())
+
+
+# ------------------ Reading ------------------
+
+def _size(f) -> int:
+    try:
+        pos = f.tell()
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(pos)
+        return size
+    except (AttributeError, OSError):
+        return 0
+
+
+def iter_chunks(f, chunk_rows: int = CHUNK_ROWS, dtype: dict = None, encoding: str = None):
+    """Yield DataFrame chunks; text columns are pinned to str after the first chunk."""
+    if dtype is None and f.seekable():
+        start = f.tell()
+        head = pd.read_csv(f, nrows=min(chunk_rows, 10_000), encoding=encoding)
+        # Pinning text columns skips type inference for them and keeps their
+        # dtype stable across chunks.
+        dtype = {c: str for c in head.columns if not pd.api.types.is_numeric_dtype(head[c])}
+        f.seek(start)
+    yield from pd.read_csv(f, chunksize=chunk_rows, dtype=dtype, encoding=encoding)
+
+
+class CsvAnalysis:
+    """Folds CSV chunks into per-column summaries and optional group trackers."""
+
+    def __init__(self, trackers=()):
+        self.rows = 0
+        self.columns = {}
+        self.preview = None
+        self.trackers = list(trackers)
+
+    def update(self, chunk: pd.DataFrame):
+        if self.preview is None:
+            self.preview = chunk.head(10)
+        self.rows += len(chunk)
+        for name in chunk.columns:
+            stats = self.columns.get(name)
+            if stats is None:
+                dtype = chunk[name].dtype
+                numeric = pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+                stats = self.columns[name] = ColumnStats(name, numeric)
+            stats.update(chunk[name])
+        for tracker in self.trackers:
+            tracker.update(chunk)
+
+    def merge(self, other: "CsvAnalysis"):
+        self.rows += other.rows
+        if self.preview is None:
+            self.preview = other.preview
+        for name, stats in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(stats)
+            else:
+                self.columns[name] = stats
+
+    def describe(self) -> pd.DataFrame:
+        """Table shaped like DataFrame.describe(include="all")."""
+        rows = ["count"]
+        if any(not c.numeric for c in self.columns.values()):
+            rows += ["unique", "top", "freq"]
+        if any(c.numeric for c in self.columns.values()):
+            rows += ["mean", "std", "min", "25%", "50%", "75%", "max"]
+        table = {name: c.describe() for name, c in self.columns.items()}
+        return pd.DataFrame(table, index=rows, dtype=object)
+
+    @property
+    def approximate(self) -> bool:
+        return any(c.approximate for c in self.columns.values())
+
+
+def analyze_csv(f, chunk_rows: int = CHUNK_ROWS, trackers=(), progress=None,
+                encoding: str = None) -> CsvAnalysis:
+    """Stream a CSV file object through CsvAnalysis.
+
+    progress(fraction, rows) is called after every chunk; fraction is None
+    when the file size is unknown. encoding applies to binary file objects.
+    """
+    total = _size(f)
+    analysis = CsvAnalysis(trackers)
+    for chunk in iter_chunks(f, chunk_rows, encoding=encoding):
+        analysis.update(chunk)
+        if progress is not None:
+            fraction = min(f.tell() / total, 1.0) if total else None
+            progress(fraction, analysis.rows)
+    return analysis
@@ -0,0 +1,263 @@
+"""Streaming CSV normalizer.
+
+The delimiter is sniffed once from the head of the input; everything else
+follows the excel dialect. Records are then re-written in batches to an
+output stream with consistent quoting, so memory is bounded by the batch
+size rather than the file size.
+
+``format_file`` additionally splits a file on disk into byte ranges that end
+on record boundaries and formats the ranges in worker processes. A newline
+ends a record only when an even number of quote characters precedes it, so
+quoted fields containing newlines are never cut; dialects with an escape
+character (where quote parity says nothing) are formatted serially.
+
+With ``align=True`` a first pass measures every column's widest cell and a
+second pass pads cells to that width. Padding is whitespace inside the
+fields, so aligned output is meant for reading, not for re-import.
+"""
+
+import csv
+import io
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+SNIFF_BYTES = 1 << 14
+BATCH_ROWS = 10_000
+CHUNK_BYTES = 32 << 20     # target size of one parallel work unit
+DELIMITERS = ",;\t|"
+LINETERMINATOR = "\r\n"    # csv.writer's default, kept for compatibility
+
+
+# ------------------ Dialect ------------------
+
+def sniff(sample: str):
+    """The excel dialect, with the delimiter guessed from a CSV sample.
+
+    Only the delimiter is taken from csv.Sniffer. Its other guesses change
+    the data: an apostrophe in text becomes the quote character, spaces
+    after delimiters get dropped, and doublequote comes out False for most
+    files.
+    """
+    try:
+        delimiter = csv.Sniffer().sniff(sample, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        return csv.excel
+    if delimiter == csv.excel.delimiter:
+        return csv.excel
+    return type("sniffed", (csv.excel,), {"delimiter": delimiter})
+
+
+def _params(dialect) -> dict:
+    """Reader format parameters of a dialect, as a picklable dict."""
+    return {
+        "delimiter": dialect.delimiter,
+        "quotechar": dialect.quotechar or '"',
+        "doublequote": dialect.doublequote,
+        "escapechar": dialect.escapechar,
+        "skipinitialspace": dialect.skipinitialspace,
+        "quoting": dialect.quoting,
+    }
+
+
+def _writer(dst, params: dict):
+    return csv.writer(dst, delimiter=params["delimiter"], quotechar=params["quotechar"],
+                      lineterminator=LINETERMINATOR)
+
+
+def _head(src):
+    """Read a sniffing sample from src that ends on a line break."""
+    sample = src.read(SNIFF_BYTES)
+    if len(sample) == SNIFF_BYTES:
+        sample += src.readline()
+    return sample
+
+
+# ------------------ Serial pipeline ------------------
+
+def _render(cell: str, params: dict) -> str:
+    """One cell as csv.writer would write it with QUOTE_MINIMAL."""
+    quote = params["quotechar"]
+    if params["delimiter"] in cell or quote in cell or "\n" in cell or "\r" in cell:
+        return quote + cell.replace(quote, quote * 2) + quote
+    return cell
+
+
+def column_widths(rows, params: dict) -> list:
+    """Widest rendered cell per column."""
+    widths = []
+    for row in rows:
+        if len(row) > len(widths):
+            widths.extend([0] * (len(row) - len(widths)))
+        for i, cell in enumerate(row):
+            size = len(_render(cell, params))
+            if size > widths[i]:
+                widths[i] = size
+    return widths
+
+
+def _iter_rows_text(rows, params: dict, widths: list = None):
+    """Yield formatted text for rows in batches of BATCH_ROWS records."""
+    rows = iter(rows)
+    if widths is None:
+        buf = io.StringIO()
+        writer = _writer(buf, params)
+        while True:
+            batch = list(islice(rows, BATCH_ROWS))
+            if not batch:
+                return
+            writer.writerows(batch)
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    delimiter = params["delimiter"]
+    while True:
+        batch = list(islice(rows, BATCH_ROWS))
+        if not batch:
+            return
+        lines = []
+        for row in batch:
+            if len(row) == 1 and row[0] == "":
+                lines.append(params["quotechar"] * 2)
+                continue
+            cells = [_render(cell, params) for cell in row]
+            last = len(cells) - 1
+            lines.append(delimiter.join(
+                cell if i == last else cell.ljust(widths[i]) for i, cell in enumerate(cells)))
+        lines.append("")
+        yield LINETERMINATOR.join(lines)
+
+
+def iter_format(src, align: bool = False, dialect=None):
+    """Yield normalized CSV text in pieces while reading a text file object.
+
+    src should be opened with newline="". align=True needs a seekable src,
+    since it is read twice.
+    """
+    seekable = src.seekable()
+    start = src.tell() if seekable else None
+    sample = _head(src)
+    params = _params(dialect or sniff(sample))
+    widths = None
+    if align:
+        src.seek(start)
+        widths = column_widths(csv.reader(src, **params), params)
+    if seekable:
+        # Re-reading the sample is cheaper than feeding every line through
+        # a Python-level chain.
+        src.seek(start)
+        lines = src
+    else:
+        lines = _chain(sample, src)
+    yield from _iter_rows_text(csv.reader(lines, **params), params, widths)
+
+
+def _chain(sample: str, src):
+    yield from io.StringIO(sample, newline="")
+    yield from src
+
+
+def format_stream(src, dst, align: bool = False, dialect=None) -> None:
+    """Normalize CSV from src into dst (text file objects)."""
+    for piece in iter_format(src, align=align, dialect=dialect):
+        dst.write(piece)
+
+
+def format_text(text: str, align: bool = False) -> str:
+    """Normalize a CSV string with the streaming pipeline."""
+    return "".join(iter_format(io.StringIO(text, newline=""), align=align))
+
+
+# ------------------ Parallel pipeline ------------------
+
+def _count(data, byte: bytes, lo: int, hi: int, block: int = 1 << 20) -> int:
+    """data[lo:hi].count(byte) for an mmap, copying at most one block at a time."""
+    return sum(data[i:min(i + block, hi)].count(byte) for i in range(lo, hi, block))
+
+
+def split_points(path: str, params: dict, chunk_bytes: int = CHUNK_BYTES) -> list:
+    """Byte offsets [0, ..., size] cutting path into ranges of whole records."""
+    size = os.path.getsize(path)
+    if size <= chunk_bytes or params["escapechar"] or not params["doublequote"] \
+            or params["quoting"] == csv.QUOTE_NONE:
+        return [0, size]
+    quote = params["quotechar"].encode("utf-8")
+    points = [0]
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        pos, quotes = 0, 0   # quotes counted in data[:pos]
+        while True:
+            target = points[-1] + chunk_bytes
+            if target >= size:
+                break
+            quotes += _count(data, quote, pos, target)
+            pos = target
+            while True:
+                nl = data.find(b"\n", pos)
+                if nl < 0:
+                    pos = size
+                    break
+                quotes += _count(data, quote, pos, nl + 1)
+                pos = nl + 1
+                if quotes % 2 == 0:  # newline outside any quoted field
+                    break
+            if pos >= size:
+                break
+            points.append(pos)
+    points.append(size)
+    return points
+
+
+def _read_range(path: str, start: int, end: int) -> str:
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start).decode("utf-8")
+
+
+def _widths_range(job: tuple) -> list:
+    path, start, end, params = job
+    rows = csv.reader(io.StringIO(_read_range(path, start, end), newline=""), **params)
+    return column_widths(rows, params)
+
+
+def _format_range(job: tuple) -> str:
+    path, start, end, params, widths = job
+    rows = csv.reader(io.StringIO(_read_range(path, start, end), newline=""), **params)
+    return "".join(_iter_rows_text(rows, params, widths))
+
+
+def _ordered(pool, func, jobs: list, window: int):
+    """Like pool.map, but with at most window results in flight (bounded memory)."""
+    pending = []
+    for job in jobs:
+        pending.append(pool.submit(func, job))
+        if len(pending) >= window:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+
+def format_file(path: str, dst, align: bool = False, jobs: int = None,
+                chunk_bytes: int = CHUNK_BYTES) -> None:
+    """Normalize a UTF-8 CSV file on disk into dst, in parallel worker processes."""
+    with open(path, encoding="utf-8", newline="") as f:
+        dialect = sniff(_head(f))
+    params = _params(dialect)
+    points = split_points(path, params, chunk_bytes)
+    ranges = list(zip(points, points[1:]))
+    workers = min(jobs or os.cpu_count() or 1, len(ranges))
+    if workers <= 1:
+        with open(path, encoding="utf-8", newline="") as f:
+            format_stream(f, dst, align=align, dialect=dialect)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        widths = None
+        if align:
+            widths = []
+            for part in pool.map(_widths_range, [(path, s, e, params) for s, e in ranges]):
+                widths.extend([0] * (len(part) - len(widths)))
+                for i, width in enumerate(part):
+                    widths[i] = max(widths[i], width)
+        work = [(path, s, e, params, widths) for s, e in ranges]
+        for piece in _ordered(pool, _format_range, work, window=2 * workers):
+            dst.write(piece)
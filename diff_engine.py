@@ -0,0 +1,323 @@
+"""Line diff engine for large inputs.
+
+Lines are interned to integers first, so every comparison is an int compare.
+The common prefix and suffix are trimmed, then the middle is diffed with one
+of the pluggable engines in ENGINES:
+
+* ``patience``: anchors on lines that occur exactly once on both sides, then
+  fills the gaps with Myers. Near-linear on typical config/log files.
+* ``myers``: classic O((N+M)·D) greedy diff.
+* ``difflib``: the standard library's SequenceMatcher, for comparison. It
+  is checked against the budget between longest-match searches, and not
+  started on regions where a single search would exceed max_cost.
+
+Every engine runs under a budget (wall-clock timeout and a cap on edit-graph
+work). A region that would blow the budget is reported as one coarse
+replace block instead, and the result is flagged as inexact.
+"""
+
+import difflib
+import math
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+
+DEFAULT_TIMEOUT = 5.0           # seconds for a whole diff
+DEFAULT_MAX_COST = 4_000_000    # Myers diagonal steps per region (~D²/2); bounds time and trace memory
+
+
+class _Budget:
+    def __init__(self, timeout: float, max_cost: int):
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.max_cost = max_cost
+        self.exhausted = False
+
+    def expired(self) -> bool:
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.exhausted = True
+        return self.exhausted
+
+
+# ------------------ Engines ------------------
+# Each engine takes interned sequences a, b plus a region and a budget, and
+# returns the list of matching (i, j) index pairs inside that region.
+
+def _myers(a, b, a0, a1, b0, b1, budget):
+    n, m = a1 - a0, b1 - b0
+    max_d = n + m
+    if budget.max_cost:
+        max_d = min(max_d, math.isqrt(2 * budget.max_cost))
+    offset = max_d + 1
+    v = array("l", bytes(8 * (2 * max_d + 3)))
+    trace = []
+    for d in range(max_d + 1):
+        if d % 64 == 0 and budget.expired():
+            return None
+        trace.append(v[offset - d:offset + d + 1] if d else [v[offset]])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[a0 + x] == b[b0 + y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _myers_backtrack(a0, b0, trace, v, offset, d, n, m)
+    budget.exhausted = True
+    return None
+
+
+def _myers_backtrack(a0, b0, trace, v, offset, d_end, n, m):
+    matches = []
+    x, y = n, m
+    for d in range(d_end, 0, -1):
+        prev = trace[d]  # V as it was before step d, indexed from k = -d
+        k = x - y
+
+        def at(kk):
+            return prev[kk + d] if -d <= kk <= d else -1
+
+        if k == -d or (k != d and at(k - 1) < at(k + 1)):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = at(prev_k)
+        prev_y = prev_x - prev_k
+        while x > prev_x + (prev_k == k - 1) and y > prev_y + (prev_k == k + 1):
+            x -= 1
+            y -= 1
+            matches.append((a0 + x, b0 + y))
+        x, y = prev_x, prev_y
+    while x > 0 and y > 0:
+        x -= 1
+        y -= 1
+        matches.append((a0 + x, b0 + y))
+    return matches
+
+
+def _patience(a, b, a0, a1, b0, b1, budget):
+    matches = []
+    stack = [(a0, a1, b0, b1)]
+    while stack:
+        a0, a1, b0, b1 = stack.pop()
+        # Trim the region's common prefix and suffix.
+        while a0 < a1 and b0 < b1 and a[a0] == b[b0]:
+            matches.append((a0, b0))
+            a0 += 1
+            b0 += 1
+        while a0 < a1 and b0 < b1 and a[a1 - 1] == b[b1 - 1]:
+            a1 -= 1
+            b1 -= 1
+            matches.append((a1, b1))
+        if a0 == a1 or b0 == b1:
+            continue
+        anchors = _unique_lcs(a, b, a0, a1, b0, b1)
+        if not anchors:
+            if budget.expired() or not set(a[a0:a1]).intersection(b[b0:b1]):
+                continue  # nothing in common: the whole region is one replace
+            found = _myers(a, b, a0, a1, b0, b1, budget)
+            if found:
+                matches.extend(found)
+            continue
+        prev_i, prev_j = a0, b0
+        for i, j in anchors:
+            matches.append((i, j))
+            stack.append((prev_i, i, prev_j, j))
+            prev_i, prev_j = i + 1, j + 1
+        stack.append((prev_i, a1, prev_j, b1))
+    return matches
+
+
+def _unique_lcs(a, b, a0, a1, b0, b1):
+    """Longest increasing run of lines that appear exactly once on each side."""
+    counts = {}
+    for i in range(a0, a1):
+        entry = counts.get(a[i])
+        counts[a[i]] = [i, -1, 1] if entry is None else [entry[0], -1, entry[2] + 1]
+    for j in range(b0, b1):
+        entry = counts.get(b[j])
+        if entry is not None and entry[2] == 1:
+            entry[1] = j if entry[1] == -1 else -2  # -2: not unique in b
+    pairs = sorted((i, j) for i, j, c in counts.values() if c == 1 and j >= 0)
+    # Patience sort on j to find the longest increasing subsequence.
+    tails, tail_idx, back = [], [], [None] * len(pairs)
+    for idx, (_, j) in enumerate(pairs):
+        pos = bisect_left(tails, j)
+        back[idx] = tail_idx[pos - 1] if pos else None
+        if pos == len(tails):
+            tails.append(j)
+            tail_idx.append(idx)
+        else:
+            tails[pos] = j
+            tail_idx[pos] = idx
+    result = []
+    idx = tail_idx[-1] if tail_idx else None
+    while idx is not None:
+        result.append(pairs[idx])
+        idx = back[idx]
+    result.reverse()
+    return result
+
+
+class _OverBudget(Exception):
+    pass
+
+
+class _BudgetedMatcher(difflib.SequenceMatcher):
+    """SequenceMatcher that gives up between longest-match searches once over budget."""
+
+    def __init__(self, a, b, budget):
+        self.budget = budget
+        super().__init__(None, a, b, autojunk=False)
+
+    def find_longest_match(self, *args):
+        if self.budget.expired():
+            raise _OverBudget
+        return super().find_longest_match(*args)
+
+
+def _difflib(a, b, a0, a1, b0, b1, budget):
+    sa, sb = a[a0:a1], b[b0:b1]
+    # One longest-match search visits every pair of equal lines, so a region
+    # where that count alone is over max_cost is not attempted.
+    if budget.max_cost:
+        counts = Counter(sb)
+        if sum(counts.get(x, 0) for x in sa) > budget.max_cost:
+            budget.exhausted = True
+            return None
+    try:
+        blocks = _BudgetedMatcher(sa, sb, budget).get_matching_blocks()
+    except _OverBudget:
+        return None
+    return [
+        (a0 + i + t, b0 + j + t)
+        for i, j, size in blocks
+        for t in range(size)
+    ]
+
+
+ENGINES = {"patience": _patience, "myers": _myers, "difflib": _difflib}
+
+
+# ------------------ Results ------------------
+
+@dataclass
+class Diff:
+    """Result of diff_lines: difflib-style opcodes plus an exactness flag."""
+
+    a: list
+    b: list
+    opcodes: list
+    exact: bool = True
+
+    def grouped_opcodes(self, n: int = 3):
+        """Yield hunks with up to n lines of context (as SequenceMatcher does)."""
+        codes = list(self.opcodes)
+        if not codes:
+            codes = [("equal", 0, 1, 0, 1)]
+        if codes[0][0] == "equal":
+            tag, i1, i2, j1, j2 = codes[0]
+            codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+        if codes[-1][0] == "equal":
+            tag, i1, i2, j1, j2 = codes[-1]
+            codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+        group = []
+        for tag, i1, i2, j1, j2 in codes:
+            if tag == "equal" and i2 - i1 > 2 * n:
+                group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+                yield group
+                group = []
+                i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+            group.append((tag, i1, i2, j1, j2))
+        if group and not (len(group) == 1 and group[0][0] == "equal"):
+            yield group
+
+    def unified(self, fromfile: str = "", tofile: str = "", n: int = 3, lineterm: str = "\n"):
+        """Yield unified diff lines in the same layout as difflib.unified_diff."""
+        started = False
+        for group in self.grouped_opcodes(n):
+            if not started:
+                started = True
+                yield f"--- {fromfile}{lineterm}"
+                yield f"+++ {tofile}{lineterm}"
+            first, last = group[0], group[-1]
+            yield (f"@@ -{format_range(first[1], last[2])} "
+                   f"+{format_range(first[3], last[4])} @@{lineterm}")
+            for tag, i1, i2, j1, j2 in group:
+                if tag == "equal":
+                    for line in self.a[i1:i2]:
+                        yield " " + line
+                    continue
+                if tag in ("replace", "delete"):
+                    for line in self.a[i1:i2]:
+                        yield "-" + line
+                if tag in ("replace", "insert"):
+                    for line in self.b[j1:j2]:
+                        yield "+" + line
+
+
+def format_range(start: int, stop: int) -> str:
+    """Format a hunk range the way difflib does."""
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def _to_opcodes(matches, n, m):
+    codes = []
+    i = j = 0
+    for mi, mj in matches + [(n, m)]:
+        if mi > i or mj > j:
+            tag = "replace" if mi > i and mj > j else ("delete" if mi > i else "insert")
+            codes.append((tag, i, mi, j, mj))
+        if mi < n and mj < m:
+            if codes and codes[-1][0] == "equal" and codes[-1][2] == mi:
+                _, i1, _, j1, _ = codes.pop()
+                codes.append(("equal", i1, mi + 1, j1, mj + 1))
+            else:
+                codes.append(("equal", mi, mi + 1, mj, mj + 1))
+        i, j = mi + 1, mj + 1
+    return codes
+
+
+# ------------------ Public API ------------------
+
+def diff_lines(a: list, b: list, algorithm: str = "patience",
+               timeout: float = DEFAULT_TIMEOUT, max_cost: int = DEFAULT_MAX_COST) -> Diff:
+    """Diff two lists of lines, falling back to coarse hunks if over budget."""
+    ids = {}
+    ia = [ids.setdefault(line, len(ids)) for line in a]
+    ib = [ids.setdefault(line, len(ids)) for line in b]
+    n, m = len(ia), len(ib)
+
+    start = 0
+    while start < n and start < m and ia[start] == ib[start]:
+        start += 1
+    end_a, end_b = n, m
+    while end_a > start and end_b > start and ia[end_a - 1] == ib[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+
+    budget = _Budget(timeout, max_cost)
+    matches = [(i, i) for i in range(start)]
+    if start < end_a and start < end_b:
+        found = ENGINES[algorithm](ia, ib, start, end_a, start, end_b, budget)
+        if found:
+            matches.extend(sorted(found))
+    matches.extend((end_a + t, end_b + t) for t in range(n - end_a))
+    return Diff(list(a), list(b), _to_opcodes(matches, n, m), exact=not budget.exhausted)
+
+
+def unified_diff(a: list, b: list, fromfile: str = "", tofile: str = "", n: int = 3,
+                 lineterm: str = "\n", **options):
+    """Drop-in replacement for difflib.unified_diff backed by diff_lines."""
+    return diff_lines(a, b, **options).unified(fromfile, tofile, n=n, lineterm=lineterm)
@@ -0,0 +1,202 @@
+"""Paginated HTML rendering for diff_engine results.
+
+Only the rows of the page being shown are ever turned into HTML: hunks are
+kept as opcodes, split into pages of at most ``max_rows`` rows, and unchanged
+stretches between hunks are collapsed to a single marker row. Intra-line
+highlighting runs per rendered row, so its cost is bounded by the page too.
+"""
+
+import difflib
+import html
+
+import diff_engine
+
+MAX_ROWS = 300          # rows per page
+MAX_LINE_CHARS = 1000   # longer lines are truncated in the view
+MAX_INTRALINE_CHARS = 400
+
+ADD_BG = "#e6ffed"
+DEL_BG = "#ffe6e6"
+SAME_BG = "#f0f0f0"
+GAP_STYLE = "color:#888; font-style:italic"
+
+
+def _clip(line: str) -> str:
+    if len(line) > MAX_LINE_CHARS:
+        return html.escape(line[:MAX_LINE_CHARS]) + "…"
+    return html.escape(line)
+
+
+def _intraline(old: str, new: str):
+    """Return (old_html, new_html) with the changed characters highlighted."""
+    if len(old) > MAX_INTRALINE_CHARS or len(new) > MAX_INTRALINE_CHARS:
+        return _clip(old), _clip(new)
+    old_html, new_html = [], []
+    sm = difflib.SequenceMatcher(None, old, new)
+    for tag, i1, i2, j1, j2 in sm.get_opcodes():
+        a, b = html.escape(old[i1:i2]), html.escape(new[j1:j2])
+        if tag == "equal":
+            old_html.append(a)
+            new_html.append(b)
+            continue
+        if a:
+            old_html.append(f"<span style='background-color:#ffb3b3'>{a}</span>")
+        if b:
+            new_html.append(f"<span style='background-color:#b3f0c2'>{b}</span>")
+    return "".join(old_html), "".join(new_html)
+
+
+class DiffView:
+    """Pages over the hunks of a Diff, for "unified" or "split" (side-by-side) layout."""
+
+    def __init__(self, diff, layout: str = "unified", context: int = 3, max_rows: int = MAX_ROWS):
+        self.diff = diff
+        self.layout = layout
+        self.hunks = list(diff.grouped_opcodes(context))
+        self.pages = []       # each page: list of (hunk index, first row, end row)
+        self._hunk_page = []  # first page on which each hunk appears
+        page, used = [], 0
+        for h, hunk in enumerate(self.hunks):
+            self._hunk_page.append(len(self.pages) if used < max_rows else len(self.pages) + 1)
+            total = self._row_count(hunk)
+            row = 0
+            while row < total:
+                if used == max_rows:
+                    self.pages.append(page)
+                    page, used = [], 0
+                take = min(total - row, max_rows - used)
+                page.append((h, row, row + take))
+                row += take
+                used += take
+        if page:
+            self.pages.append(page)
+
+    # --- navigation ---
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    def page_of_hunk(self, h: int) -> int:
+        return self._hunk_page[h]
+
+    def hunk_header(self, h: int) -> str:
+        first, last = self.hunks[h][0], self.hunks[h][-1]
+        return (f"@@ -{diff_engine.format_range(first[1], last[2])} "
+                f"+{diff_engine.format_range(first[3], last[4])} @@")
+
+    def hunks_on_page(self, page: int) -> list:
+        return sorted({h for h, _, _ in self.pages[page]})
+
+    # --- rows ---
+
+    def _row_count(self, hunk) -> int:
+        count = 0
+        for tag, i1, i2, j1, j2 in hunk:
+            if tag == "equal" or tag == "delete":
+                count += i2 - i1
+            elif tag == "insert":
+                count += j2 - j1
+            elif self.layout == "unified":
+                count += (i2 - i1) + (j2 - j1)
+            else:
+                count += max(i2 - i1, j2 - j1)
+        return count
+
+    def _rows(self, hunk, start: int, end: int):
+        """Yield (kind, old_no, old, new_no, new) for rows start..end of a hunk."""
+        a, b = self.diff.a, self.diff.b
+        row = 0
+        for tag, i1, i2, j1, j2 in hunk:
+            if tag == "replace" and self.layout == "unified":
+                parts = [("delete", i1, i2, j1, j1), ("insert", i2, i2, j1, j2)]
+            else:
+                parts = [(tag, i1, i2, j1, j2)]
+            for tag, i1, i2, j1, j2 in parts:
+                size = max(i2 - i1, j2 - j1)
+                if row + size <= start:
+                    row += size
+                    continue
+                lo, hi = max(start - row, 0), min(end - row, size)
+                for k in range(lo, hi):
+                    old_no = i1 + k if i1 + k < i2 else None
+                    new_no = j1 + k if j1 + k < j2 else None
+                    yield (tag,
+                           old_no, a[old_no] if old_no is not None else "",
+                           new_no, b[new_no] if new_no is not None else "")
+                row += size
+                if row >= end:
+                    return
+
+    def _gap_before(self, h: int) -> int:
+        """Unchanged lines skipped between hunk h-1 (or the start) and hunk h."""
+        start = self.hunks[h][0][1]
+        prev_end = self.hunks[h - 1][-1][2] if h else 0
+        return start - prev_end
+
+    def _gap_after_last(self) -> int:
+        return len(self.diff.a) - self.hunks[-1][-1][2] if self.hunks else 0
+
+    # --- rendering ---
+
+    def render(self, page: int) -> str:
+        """HTML for one page in the configured layout."""
+        if not self.pages:
+            return "<p>No differences.</p>"
+        if self.layout == "unified":
+            return self._render_unified(page)
+        return self._render_split(page)
+
+    def _render_unified(self, page: int) -> str:
+        out = []
+        for h, start, end in self.pages[page]:
+            if start == 0:
+                gap = self._gap_before(h)
+                if gap:
+                    out.append(f"<span style='{GAP_STYLE}'>⋯ {gap} unchanged lines</span>")
+                out.append(f"<span style='color:#53629E'>{self.hunk_header(h)}</span>")
+            for kind, _, old, _, new in self._rows(self.hunks[h], start, end):
+                if kind == "equal":
+                    out.append(" " + _clip(old))
+                elif kind == "delete":
+                    out.append(f"<span style='background-color:{DEL_BG}'>-{_clip(old)}</span>")
+                else:
+                    out.append(f"<span style='background-color:{ADD_BG}'>+{_clip(new)}</span>")
+        if page == self.page_count - 1 and self._gap_after_last():
+            out.append(f"<span style='{GAP_STYLE}'>⋯ {self._gap_after_last()} unchanged lines</span>")
+        return "<pre style='font-family:monospace'>" + "\n".join(out) + "</pre>"
+
+    def _render_split(self, page: int) -> str:
+        rows = []
+        for h, start, end in self.pages[page]:
+            if start == 0:
+                gap = self._gap_before(h)
+                label = f"⋯ {gap} unchanged lines · " if gap else ""
+                rows.append(f"<tr><td colspan='4' style='{GAP_STYLE}'>"
+                            f"{label}{self.hunk_header(h)}</td></tr>")
+            for kind, old_no, old, new_no, new in self._rows(self.hunks[h], start, end):
+                old_no = "" if old_no is None else old_no + 1
+                new_no = "" if new_no is None else new_no + 1
+                if kind == "equal":
+                    cells = (f"<td style='background-color:{SAME_BG}'>{_clip(old)}</td>",
+                             f"<td style='background-color:{SAME_BG}'>{_clip(new)}</td>")
+                elif kind == "replace" and old_no != "" and new_no != "":
+                    old_html, new_html = _intraline(old, new)
+                    cells = (f"<td style='background-color:{DEL_BG}'>{old_html}</td>",
+                             f"<td style='background-color:{ADD_BG}'>{new_html}</td>")
+                else:
+                    old_bg = DEL_BG if old_no != "" else "transparent"
+                    new_bg = ADD_BG if new_no != "" else "transparent"
+                    cells = (f"<td style='background-color:{old_bg}'>{_clip(old)}</td>",
+                             f"<td style='background-color:{new_bg}'>{_clip(new)}</td>")
+                rows.append(f"<tr><td>{old_no}</td>{cells[0]}<td>{new_no}</td>{cells[1]}</tr>")
+        if page == self.page_count - 1 and self._gap_after_last():
+            rows.append(f"<tr><td colspan='4' style='{GAP_STYLE}'>"
+                        f"⋯ {self._gap_after_last()} unchanged lines</td></tr>")
+        return (
+            "<table style='width:100%; font-family:monospace; border-collapse:collapse;'>"
+            "<tr><th></th><th style='text-align:left'>Original</th>"
+            "<th></th><th style='text-align:left'>Modified</th></tr>"
+            + "".join(rows)
+            + "</table>"
+        )
@@ -1,8 +1,15 @@
 import json
-import xml.dom.minidom
-import yaml
-import csv
 import io
+import importlib
+import functools
+import configparser
+import cache
+import convert_stream
+import csv_stream
+import json_stream
+import toon
+import tracing
+import xml_stream
 
 # --- Optional imports with safe fallbacks ---
 try:
@@ -10,62 +17,98 @@ try:
 except ImportError:
     import tomli as tomllib  # fallback for <3.11
 
-try:
-    import tomli_w
-except ImportError:
-    tomli_w = None
-
-import configparser
-from bs4 import BeautifulSoup
-
-# SQL formatter (optional)
-try:
-    import sqlparse
-except ImportError:
-    sqlparse = None
 
-# Python formatter (optional)
-try:
-    import autopep8
-except ImportError:
-    autopep8 = None
+# Heavy backends (yaml, bs4, sqlparse, autopep8, jsonschema, xmlschema,
+# yamllint) are imported inside the functions that use them, so importing
+# this module stays cheap for callers that only need a few formatters.
+@functools.lru_cache(maxsize=None)
+def _optional(module: str):
+    """Import an optional backend on first use, or return None if missing."""
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        return None
 
 
 # ------------------ Core Formatters ------------------
 
+@tracing.traced()
 def format_json(text: str) -> str:
     """Format JSON string with indentation."""
-    parsed = json.loads(text)
-    return json.dumps(parsed, indent=4, ensure_ascii=False)
+    with tracing.span("format_json.parse"):
+        parsed = json.loads(text)
+    with tracing.span("format_json.serialize"):
+        return json.dumps(parsed, indent=4, ensure_ascii=False)
+
+
+@tracing.traced()
+def format_json_stream(src, dst, ndjson: bool = False) -> None:
+    """Format JSON from a file object into another without loading it whole.
+
+    With ndjson=True each line-delimited document is formatted in turn.
+    """
+    json_stream.format_stream(src, dst, indent=4, multi=ndjson)
 
 
-def format_xml(text: str) -> str:
-    """Format XML string with indentation."""
-    dom = xml.dom.minidom.parseString(text)
-    return dom.toprettyxml(indent="    ")
+@tracing.traced()
+def format_xml(text: str, streaming: bool = False) -> str:
+    """Format XML string with indentation.
 
+    streaming=True re-indents with the expat-based streaming printer instead
+    of building a minidom DOM.
+    """
+    if streaming:
+        return xml_stream.format_text(text, indent=4)
+    import xml.dom.minidom
+    with tracing.span("format_xml.parse"):
+        dom = xml.dom.minidom.parseString(text)
+    with tracing.span("format_xml.serialize"):
+        return dom.toprettyxml(indent="    ")
 
+
+@tracing.traced()
+def format_xml_stream(src, dst) -> None:
+    """Re-indent XML from a file object into another without building a DOM."""
+    xml_stream.format_stream(src, dst, indent=4)
+
+
+@tracing.traced()
 def format_yaml(text: str) -> str:
-    """Format YAML string with indentation."""
-    parsed = yaml.safe_load(text)
-    return yaml.dump(parsed, sort_keys=False, indent=4)
+    """Format YAML string with indentation, every document of a multi-document stream."""
+    import yaml_stream
+    return yaml_stream.format_text(text, indent=4)
+
+
+@tracing.traced()
+def format_yaml_stream(src, dst) -> None:
+    """Format YAML from a file object into another, one document at a time."""
+    import yaml_stream
+    yaml_stream.format_stream(src, dst, indent=4)
+
+
+@tracing.traced()
+def format_csv(text: str, align: bool = False) -> str:
+    """Format CSV string with consistent spacing.
 
+    The dialect (delimiter, quoting) is sniffed from the input and kept;
+    align=True pads columns to a common width for reading.
+    """
+    return csv_stream.format_text(text, align=align)
 
-def format_csv(text: str) -> str:
-    """Format CSV string with consistent spacing."""
-    reader = csv.reader(io.StringIO(text))
-    output = io.StringIO()
-    writer = csv.writer(output)
-    for row in reader:
-        writer.writerow(row)
-    return output.getvalue()
+
+@tracing.traced()
+def format_csv_stream(src, dst, align: bool = False) -> None:
+    """Format CSV from a text file object into another, batch by batch."""
+    csv_stream.format_stream(src, dst, align=align)
 
 
 # ------------------ Config Formats ------------------
 
+@tracing.traced()
 def format_toml(text: str) -> str:
     """Format TOML string with indentation."""
     data = tomllib.loads(text)
+    tomli_w = _optional("tomli_w")
     if tomli_w:
         return tomli_w.dumps(data)
     else:
@@ -73,6 +116,7 @@ def format_toml(text: str) -> str:
         return json.dumps(data, indent=4)
 
 
+@tracing.traced()
 def format_ini(text: str) -> str:
     """Format INI/CFG string with normalized sections."""
     cp = configparser.ConfigParser()
@@ -84,6 +128,7 @@ def format_ini(text: str) -> str:
 
 # ------------------ Docs / Markup ------------------
 
+@tracing.traced()
 def format_markdown(text: str) -> str:
     """Normalize Markdown headings and spacing."""
     lines = text.splitlines()
@@ -96,18 +141,25 @@ def format_markdown(text: str) -> str:
     return "\n".join(normalized)
 
 
+@tracing.traced()
 def format_html(text: str) -> str:
     """Prettify HTML using BeautifulSoup."""
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(text, "html.parser")
     return soup.prettify()
 
 
 # ------------------ Developer Formats ------------------
 
+SQL_OPTIONS = {"reindent": True, "keyword_case": "upper"}
+
+
+@tracing.traced()
 def format_sql(text: str) -> str:
     """Beautify SQL queries."""
+    sqlparse = _optional("sqlparse")
     if sqlparse:
-        return sqlparse.format(text, reindent=True, keyword_case="upper")
+        return sqlparse.format(text, **SQL_OPTIONS)
     else:
         # fallback: naive keyword uppercasing
         keywords = ["select", "from", "where", "join", "insert", "update", "delete"]
@@ -117,8 +169,10 @@ def format_sql(text: str) -> str:
         return formatted
 
 
+@tracing.traced()
 def format_python(text: str) -> str:
     """Format Python code using autopep8 if available."""
+    autopep8 = _optional("autopep8")
     if autopep8:
         return autopep8.fix_code(text)
     else:
@@ -126,36 +180,160 @@ def format_python(text: str) -> str:
         import textwrap
         return textwrap.dedent(text)
 
+# ------------------ Conversions ------------------
+
+@tracing.traced()
+def json_to_xml(text: str) -> str:
+    """Convert JSON to XML, wrapping the document in a <root> element."""
+    try:
+        return "".join(convert_stream.iter_json_to_xml(io.StringIO(text)))
+    except convert_stream.LateAttributeError:
+        # An @attr key after child keys needs the whole object in hand.
+        import xmltodict
+        return xmltodict.unparse({"root": json.loads(text)}, pretty=True)
+
+
+@tracing.traced()
+def json_to_xml_stream(src, dst) -> None:
+    """Convert JSON from a file object into XML without loading it whole."""
+    convert_stream.json_to_xml_stream(src, dst)
+
+
+@tracing.traced()
+def xml_to_json(text: str) -> str:
+    """Convert XML to JSON using xmltodict's @attr / #text conventions."""
+    out = io.StringIO()
+    convert_stream.xml_to_json_stream(io.StringIO(text), out)
+    return out.getvalue()
+
+
+@tracing.traced()
+def xml_to_json_stream(src, dst) -> None:
+    """Convert XML from a file object into JSON without building the whole tree."""
+    convert_stream.xml_to_json_stream(src, dst)
+
+
+@tracing.traced()
+def json_to_toml(text: str) -> str:
+    """Convert a JSON object to TOML."""
+    import toml
+    return toml.dumps(json.loads(text))
+
+
+@tracing.traced()
+def json_to_toon(text: str, delimiter: str = ",") -> str:
+    """Convert JSON to TOON (lossless; see toon.py)."""
+    return toon.encode(json.loads(text), delimiter)
+
+
+@tracing.traced()
+def toon_to_json(text: str) -> str:
+    """Convert TOON back to indented JSON."""
+    return json.dumps(toon.decode(text), indent=4, ensure_ascii=False)
+
+
 # ------------------ Validation Tools ------------------
 
-import jsonschema
-import xmlschema
-import yamllint.config
-import yamllint.linter
+# Compiled validators keyed by schema hash. Validators hold parsed schemas
+# and resolved imports, so they stay in memory only (never pickled).
+_SCHEMA_CACHE = cache.ResultCache(max_entries=32, max_bytes=256 << 20)
+
 
+def _compiled_schema(kind: str, schema_text: str, build):
+    """Return a compiled validator for schema_text, building it on first use."""
+    key = cache.make_key(f"schema:{kind}", (schema_text,), {})
+    compiled = _SCHEMA_CACHE.get(key)
+    if compiled is None:
+        compiled = build(schema_text)
+        _SCHEMA_CACHE.put(key, compiled, size=len(schema_text))
+    return compiled
+
+
+def _build_json_validator(schema_text: str):
+    import jsonschema
+    schema = json.loads(schema_text)
+    cls = jsonschema.validators.validator_for(schema)
+    cls.check_schema(schema)  # meta-schema check runs once per schema, not per instance
+    return cls(schema)
+
+
+def _build_xsd(xsd_text: str):
+    import xmlschema
+    return xmlschema.XMLSchema(xsd_text)
+
+
+def schema_cache_stats() -> dict:
+    """Hit/miss counters for the compiled-schema cache."""
+    return _SCHEMA_CACHE.stats()
+
+
+@tracing.traced()
 def validate_json_schema(instance_text: str, schema_text: str) -> str:
     """Validate JSON against a schema."""
-    instance = json.loads(instance_text)
-    schema = json.loads(schema_text)
-    try:
-        jsonschema.validate(instance=instance, schema=schema)
+    import jsonschema
+    with tracing.span("validate_json_schema.parse"):
+        instance = json.loads(instance_text)
+    with tracing.span("validate_json_schema.compile", schema_text):
+        validator = _compiled_schema("json", schema_text, _build_json_validator)
+    with tracing.span("validate_json_schema.validate"):
+        error = jsonschema.exceptions.best_match(validator.iter_errors(instance))
+    if error is None:
         return "✅ JSON is valid against schema."
-    except jsonschema.ValidationError as e:
-        return f"❌ JSON validation error: {e.message}"
+    return f"❌ JSON validation error: {error.message}"
 
+@tracing.traced()
 def validate_xml_xsd(xml_text: str, xsd_text: str) -> str:
     """Validate XML against XSD schema."""
-    schema = xmlschema.XMLSchema(xsd_text)
-    try:
-        schema.validate(xml_text)
+    schema = _compiled_schema("xsd", xsd_text, _build_xsd)
+    error = next(schema.iter_errors(xml_text), None)
+    if error is None:
         return "✅ XML is valid against XSD."
-    except xmlschema.validators.exceptions.XMLSchemaValidationError as e:
-        return f"❌ XML validation error: {e}"
-
-def lint_yaml(text: str) -> str:
-    """Run yamllint checks on YAML content."""
-    conf = yamllint.config.YamlLintConfig('extends: default')
-    problems = list(yamllint.linter.run(text, conf))
+    return f"❌ XML validation error: {error}"
+
+@tracing.traced()
+def validate_json_schema_many(instance_texts: list, schema_text: str) -> list:
+    """Validate many JSON documents against one schema.
+
+    Returns one list of error messages per instance (empty when valid),
+    reporting every error rather than only the first.
+    """
+    validator = _compiled_schema("json", schema_text, _build_json_validator)
+    results = []
+    for text in instance_texts:
+        try:
+            instance = json.loads(text)
+        except ValueError as e:
+            results.append([f"invalid JSON: {e}"])
+            continue
+        results.append([f"{e.json_path}: {e.message}" for e in validator.iter_errors(instance)])
+    return results
+
+@tracing.traced()
+def validate_xml_xsd_many(xml_texts: list, xsd_text: str) -> list:
+    """Validate many XML documents against one XSD.
+
+    Returns one list of error messages per document (empty when valid).
+    """
+    schema = _compiled_schema("xsd", xsd_text, _build_xsd)
+    results = []
+    for text in xml_texts:
+        try:
+            results.append([
+                f"{e.path or '/'}: {e.reason}" for e in schema.iter_errors(text)
+            ])
+        except Exception as e:  # malformed XML is reported, not raised
+            results.append([f"invalid XML: {e}"])
+    return results
+
+@tracing.traced()
+def lint_yaml(text: str, call=None, workers: int = 1) -> str:
+    """Run yamllint checks on YAML content, in batches of whole documents.
+
+    Batches run in-process unless call (such as an isolation.py pool's call)
+    is given; reported lines refer to the whole text.
+    """
+    import yaml_stream
+    problems = yaml_stream.lint(text, call=call, workers=workers)
     if not problems:
         return "✅ YAML passed lint checks."
-    return "\n".join([f"{p.line}:{p.column} {p.desc}" for p in problems])
\ No newline at end of file
+    return "\n".join([f"{line}:{column} {desc}" for line, column, _, desc, _ in problems])
\ No newline at end of file
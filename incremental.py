@@ -0,0 +1,345 @@
+"""Incremental formatting: re-format only the parts of a document that changed.
+
+The text is cut into units that format independently. Each unit's output
+is cached under a hash of its text, so after an edit only the changed
+units are formatted again. The result is spliced back together and equals
+a full re-format:
+
+* Markdown is cut at blank lines. The heading rule only looks one line
+  back, and a blank line is never a heading.
+* SQL is cut between statements, where sqlparse itself splits them.
+  sqlparse puts one newline between two statements if the first ends
+  with a newline (a trailing ``--`` comment), and two otherwise.
+* Python is cut before a top-level statement when only blank lines and
+  column-0 comments separate it from the previous one, and the first of
+  those lines is blank. autopep8's blank-line fixes (E30x) depend on
+  whether the previous top-level statement was a def, a class or
+  something else. So every unit but the first is formatted after a
+  two-line stub of that kind, and the stub is cut off again. The kind is
+  guessed from the source and checked against the previous unit's
+  output, since autopep8 can change it (E731 turns a lambda assignment
+  into a def); a unit with a wrong guess is formatted again. Module-level
+  imports all stay in the first unit, because E402 moves late imports to
+  the top. A unit whose output one more autopep8 pass would still change
+  is in a fix cycle, so the text is formatted whole. Text with CRLF line endings, tab or non-4-space indentation,
+  ``# autopep8: off``/``# fmt: off``, or a one-line def or class (around
+  which autopep8's fixes are not local) is formatted whole.
+
+Units shorter than MIN_LINES are merged with the next one. Cache misses go
+through ``call(target, *args)`` (``isolation.call``) in batches when one is
+given, as in yaml_stream, and are formatted in-process otherwise.
+"""
+
+import io
+import re
+import tokenize
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+
+import cache
+import registry
+import tracing
+
+MIN_LINES = {"Markdown": 200, "SQL": 20, "Python": 60}
+BATCH_CHARS = 64 << 10     # largest batch of units sent to one call
+
+PACKAGES = {"Markdown": None, "SQL": "sqlparse", "Python": "autopep8"}
+
+_UNITS = cache.ResultCache(max_entries=50_000, max_bytes=128 << 20)
+
+_PY_WHOLE = re.compile(r"^ *\t|#\s*(?:autopep8|fmt)\s*:\s*(?:off|on)\b", re.M)
+_PY_KIND = re.compile(r"(async\s+def|def|class)\b")
+_PY_STUBS = {
+    "def": "def _():\n    pass\n",
+    "async def": "async def _():\n    pass\n",
+    "class": "class _:\n    pass\n",
+    "": "_ = 0\n",
+}
+_PY_CONTINUATIONS = ("else", "elif", "except", "finally")
+
+
+def supports(name: str) -> bool:
+    """True if name's formatter can run unit by unit here."""
+    return name in PACKAGES and (PACKAGES[name] is None or find_spec(PACKAGES[name]) is not None)
+
+
+# ------------------ Splitting ------------------
+
+def _group(candidates, min_lines: int) -> list:
+    """Keep the candidate cut lines (in order) that leave units of min_lines or more."""
+    cuts, start = [], 0
+    for line in candidates:
+        if line - start >= min_lines:
+            cuts.append(line)
+            start = line
+    return cuts
+
+
+def split_markdown(text: str):
+    """[("", unit text)] cut at blank lines."""
+    lines = text.splitlines()
+    blanks = (i for i, line in enumerate(lines) if i and not line.strip())
+    bounds = [0] + _group(blanks, MIN_LINES["Markdown"]) + [len(lines)]
+    # Each line keeps a "\n", so splitlines() gives back exactly these lines.
+    return [("", "".join(line + "\n" for line in lines[a:b])) for a, b in zip(bounds, bounds[1:])]
+
+
+def split_sql(text: str):
+    """[("", unit text)] cut between statements, or None if sqlparse cannot split text."""
+    from sqlparse import lexer
+    from sqlparse.engine.statement_splitter import StatementSplitter
+    statements = [str(s) for s in StatementSplitter().process(lexer.tokenize(text))]
+    # Trailing whitespace is not a statement; sqlparse drops it from the output too.
+    if not text.startswith("".join(statements)):
+        return None
+    units, current, lines = [], "", 0
+    for statement in statements[:-1]:
+        current += statement
+        lines += statement.count("\n")
+        if lines >= MIN_LINES["SQL"]:
+            units.append(("", current))
+            current, lines = "", 0
+    return units + [("", current + statements[-1])] if statements else []
+
+
+def _one_line_def(tokens) -> bool:
+    """True if a def or class has its body on the header line (``def k(): pass``)."""
+    header, colon, parens = False, False, 0
+    for tok in tokens:
+        if tok.type == tokenize.NEWLINE:
+            header = colon = False
+        elif tok.type in (tokenize.COMMENT, tokenize.NL, tokenize.INDENT, tokenize.DEDENT):
+            continue
+        elif colon:
+            return True
+        elif tok.type == tokenize.NAME and tok.string in ("def", "class"):
+            header, parens = True, 0
+        elif header and tok.type == tokenize.OP:
+            if tok.string in ("(", "[", "{"):
+                parens += 1
+            elif tok.string in (")", "]", "}"):
+                parens -= 1
+            elif tok.string == ":" and not parens:
+                header, colon = False, True
+    return False
+
+
+def split_python(text: str):
+    """[(stub, unit text)] cut before top-level statements, or None to format whole."""
+    if "\r" in text or _PY_WHOLE.search(text):
+        return None
+    try:
+        compile(text, "<incremental>", "exec", dont_inherit=True)
+        tokens = list(tokenize.generate_tokens(io.StringIO(text).readline))
+    except (SyntaxError, ValueError, tokenize.TokenError):
+        return None
+    if _one_line_def(tokens):
+        return None
+    lines = io.StringIO(text).readlines()
+    statements = []      # (row, first token, row of the previous logical line's end)
+    depth, at_start, previous_end, indent = 0, True, 0, None
+    for tok in tokens:
+        if tok.type == tokenize.INDENT:
+            depth += 1
+            indent = tok.string if indent is None else indent
+        elif tok.type == tokenize.DEDENT:
+            depth -= 1
+        elif tok.type == tokenize.NEWLINE:
+            at_start, previous_end = True, tok.start[0]
+        elif tok.type in (tokenize.COMMENT, tokenize.NL, tokenize.ENDMARKER):
+            continue
+        elif at_start:
+            at_start = False
+            if depth == 0:
+                statements.append((tok.start[0], tok.string, previous_end))
+    if indent not in (None, "    "):
+        return None
+    # The first unit runs through the statement after the last import, so an
+    # import that E402 moves never leaves the end of a unit.
+    imports = [i for i, s in enumerate(statements) if s[1] in ("import", "from")]
+    candidates, stubs = [], {}
+    for k in range(max(imports, default=-1) + 2, len(statements)):
+        row, first, previous_end = statements[k]
+        gap = lines[previous_end:row - 1]
+        if (first in _PY_CONTINUATIONS or statements[k - 1][1] == "@" or not gap
+                or gap[0].strip() or any(g.strip() and not g.startswith("#") for g in gap)):
+            continue
+        kind = _PY_KIND.match(lines[statements[k - 1][0] - 1])
+        stubs[previous_end] = _PY_STUBS[re.sub(r"\s+", " ", kind.group(1)) if kind else ""]
+        candidates.append(previous_end)
+    bounds = [0] + _group(candidates, MIN_LINES["Python"]) + [len(lines)]
+    return [(stubs.get(a, ""), "".join(lines[a:b])) for a, b in zip(bounds, bounds[1:])]
+
+
+SPLITTERS = {"Markdown": split_markdown, "SQL": split_sql, "Python": split_python}
+
+
+def _last_kind(text: str):
+    """_PY_STUBS key for the last top-level statement of Python source, or None."""
+    try:
+        tokens = tokenize.generate_tokens(io.StringIO(text).readline)
+        depth, at_start, last = 0, True, None
+        for tok in tokens:
+            if tok.type == tokenize.INDENT:
+                depth += 1
+            elif tok.type == tokenize.DEDENT:
+                depth -= 1
+            elif tok.type == tokenize.NEWLINE:
+                at_start = True
+            elif tok.type in (tokenize.COMMENT, tokenize.NL, tokenize.ENDMARKER):
+                continue
+            elif at_start:
+                at_start = False
+                if depth == 0:
+                    last = tok.line
+    except (SyntaxError, tokenize.TokenError):
+        return None
+    kind = _PY_KIND.match(last or "")
+    return re.sub(r"\s+", " ", kind.group(1)) if kind else ""
+
+
+# ------------------ Unit formatting ------------------
+
+def _format_sql(text: str):
+    """(formatted text, whether sqlparse saw its last statement end in a newline)."""
+    import formatter
+    from sqlparse import engine, filters
+    from sqlparse import formatter as options
+    stack = options.build_filter_stack(engine.FilterStack(), options.validate_options(
+        dict(formatter.SQL_OPTIONS)))
+    serializer, parts, last = filters.SerializerUnicode(), [], ""
+    for statement in stack.run(text):
+        last = str(statement)
+        parts.append(serializer.process(statement))
+    return "".join(parts), last.endswith("\n")
+
+
+def format_units(name: str, units: list) -> list:
+    """Formatted output of each (stub, text) unit; None where the stub did not survive.
+
+    Python outputs are (text, kind of their last top-level statement).
+    """
+    import formatter
+    results = []
+    for stub, text in units:
+        if name == "Markdown":
+            results.append(formatter.format_markdown(text))
+        elif name == "SQL":
+            results.append(_format_sql(text))
+        else:
+            out = formatter.format_python(stub + text)
+            out = out[len(stub):] if out.startswith(stub) and _settled(out) else None
+            kind = _last_kind(out) if out is not None else None
+            results.append((out, kind) if kind is not None else None)
+    return results
+
+
+def _settled(out: str) -> bool:
+    """True if one more autopep8 pass leaves out unchanged.
+
+    autopep8 stops once its passes repeat a state. Some fixes cycle instead
+    of settling (E305 and E303 around an indented comment before a dedent),
+    and then where it stops depends on how many passes the whole file needs.
+    """
+    import autopep8
+    return autopep8.fix_code(out, options={"pep8_passes": 0}) == out
+
+
+def _batches(units: list) -> list:
+    batches, current, size = [], [], 0
+    for unit in units:
+        if current and size + len(unit[1]) > BATCH_CHARS:
+            batches.append(current)
+            current, size = [], 0
+        current.append(unit)
+        size += len(unit[1])
+    return batches + [current] if current else batches
+
+
+def _run(name: str, units: list, call, workers: int) -> list:
+    batches = _batches(units)
+    if call is None:
+        parts = [format_units(name, batch) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches))),
+                                thread_name_prefix="neatify-units") as pool:
+            parts = list(pool.map(lambda batch: call("incremental:format_units", name, batch), batches))
+    return [result for part in parts for result in part]
+
+
+def _splice(name: str, outputs: list) -> str:
+    if name == "Markdown":
+        return "\n".join(outputs)
+    if name == "SQL":
+        text = outputs[0][0]
+        for (_, newline), (out, _) in zip(outputs, outputs[1:]):
+            text += ("\n" if newline else "\n\n") + out
+        return text
+    return "".join(out for out, _ in outputs)
+
+
+def _whole(name: str, text: str, call):
+    backend = registry.get_formatter(name)
+    if call is not None and backend.isolated:
+        return call(backend.target, text)
+    return backend(text)
+
+
+def format_text(text: str, name: str, call=None, workers: int = 1) -> str:
+    """Format text like name's formatter, re-using cached output for unchanged units."""
+    with tracing.span(f"incremental.{name}", text) as s:
+        units = SPLITTERS[name](text) if supports(name) else None
+        if not units or len(units) < 2:
+            s.set(units=1)
+            return _whole(name, text, call)
+        version = registry.get_formatter(name).version()
+        outputs = [None] * len(units)
+        formatted = _fill(name, units, outputs, range(len(units)), version, call, workers)
+        if name == "Python" and formatted is not None:
+            # Re-format units whose stub guess the previous output contradicts.
+            for i in range(1, len(units)):
+                stub = _PY_STUBS[outputs[i - 1][1]]
+                if stub != units[i][0]:
+                    units[i] = (stub, units[i][1])
+                    if _fill(name, units, outputs, [i], version, call, workers) is None:
+                        formatted = None
+                        break
+                    formatted += 1
+        if formatted is None:
+            s.set(units=len(units), fallback=True)
+            return _whole(name, text, call)
+        s.set(units=len(units), formatted=formatted)
+        return _splice(name, outputs)
+
+
+def _fill(name: str, units: list, outputs: list, indices, version: str, call, workers: int):
+    """Set outputs[i] for indices from the unit cache or by formatting; None on a failed unit.
+
+    Returns how many units had to be formatted.
+    """
+    keys = {i: cache.make_key(f"unit:{name}", units[i], {}, version) for i in indices}
+    missing = []
+    for i, key in keys.items():
+        outputs[i] = _UNITS.get(key)
+        if outputs[i] is None:
+            missing.append(i)
+    if missing:
+        for i, out in zip(missing, _run(name, [units[i] for i in missing], call, workers)):
+            if out is None:
+                return None
+            outputs[i] = out
+            _UNITS.put(keys[i], out, size=len(units[i][1]))
+    return len(missing)
+
+
+def format_document(text: str, name: str) -> str:
+    """format_text, with misses in the default isolation.py pool for isolated backends."""
+    import isolation
+    if isolation.in_worker() or not registry.get_formatter(name).isolated:
+        return format_text(text, name)
+    pool = isolation.default_pool()
+    return format_text(text, name, call=pool.call, workers=pool.size)
+
+
+def stats() -> dict:
+    return _UNITS.stats()
@@ -0,0 +1,244 @@
+"""Run CPU-heavy backends in a pool of isolated worker processes.
+
+autopep8, sqlparse, BeautifulSoup's html.parser and yamllint are pure
+Python: a pathological input can spin for minutes while holding the GIL of
+the Streamlit process, stalling every session. Backends registered with
+``isolated=True`` are called here instead, one call per worker at a time.
+
+* Workers start ahead of use and import the backends once (pre-warmed).
+* Every call has a wall-clock timeout. On expiry the worker is killed and
+  replaced, and the caller gets ``WorkerTimeout``.
+* Where the resource module exists, RLIMIT_CPU caps the CPU seconds of each
+  call and RLIMIT_AS caps each worker's memory; a worker that hits either
+  dies and the caller gets ``WorkerCrashed``.
+* A worker is retired after MAX_JOBS calls, shedding whatever it leaked.
+
+Settings come from NEATIFY_WORKERS, NEATIFY_WORKER_TIMEOUT (seconds),
+NEATIFY_WORKER_CPU (seconds), NEATIFY_WORKER_MB and NEATIFY_WORKER_MAX_JOBS.
+"""
+
+import importlib
+import multiprocessing
+import os
+import pickle
+import queue
+import signal
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: timeouts still apply, rlimits do not
+    resource = None
+
+WORKERS = max(2, min(4, os.cpu_count() or 1))
+TIMEOUT = 30.0
+CPU_SECONDS = 60
+MEMORY_MB = 2048
+MAX_JOBS = 200
+POLL_SECONDS = 0.05
+
+WARM_MODULES = ("formatter", "incremental", "autopep8", "sqlparse", "bs4", "yaml", "yaml_stream",
+                "yamllint.config", "yamllint.linter")
+
+_in_worker = False
+
+
+class WorkerTimeout(TimeoutError):
+    """A call did not finish (or find a free worker) within its timeout."""
+
+
+class WorkerCrashed(RuntimeError):
+    """The worker process died during a call (CPU or memory limit, or a crash)."""
+
+
+# ------------------ Worker process ------------------
+
+def _resolve(target: str):
+    module, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+def _portable(exc: BaseException) -> BaseException:
+    """exc if it survives pickling, else a RuntimeError carrying its message."""
+    try:
+        pickle.loads(pickle.dumps(exc))
+        return exc
+    except Exception:
+        return RuntimeError(f"{type(exc).__name__}: {exc}")
+
+
+def _serve(conn, cpu_seconds: int, memory_bytes: int):
+    """Worker main loop: receive (target, args, options), send (status, value)."""
+    global _in_worker
+    _in_worker = True
+    for module in WARM_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+    if resource is not None and memory_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        target, args, options = message
+        if resource is not None and cpu_seconds:
+            # RLIMIT_CPU counts the whole process, so move it along per call.
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+            soft = int(usage.ru_utime + usage.ru_stime) + cpu_seconds
+            if hard != resource.RLIM_INFINITY:
+                soft = min(soft, hard)
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+        try:
+            reply = ("ok", _resolve(target)(*args, **options))
+        except BaseException as e:
+            reply = ("error", _portable(e))
+        conn.send(reply)
+
+
+def in_worker() -> bool:
+    """True inside a worker process (which must not start pools of its own)."""
+    return _in_worker
+
+
+# ------------------ Pool ------------------
+
+class _Worker:
+    def __init__(self, ctx, cpu_seconds: int, memory_bytes: int):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_serve, args=(child, cpu_seconds, memory_bytes),
+                                   name="neatify-worker", daemon=True)
+        self.process.start()
+        child.close()
+        self.jobs = 0
+
+    def stop(self, kill: bool = False):
+        """Ask the worker to exit after its current message, or kill it now."""
+        if kill:
+            self.process.kill()
+            self.process.join()
+        else:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+        self.conn.close()
+
+    def crash_reason(self) -> str:
+        self.process.join(1)
+        code = self.process.exitcode
+        if resource is not None and code == -signal.SIGXCPU:
+            return "exceeded its CPU limit"
+        if code == -signal.SIGKILL:
+            return "was killed (out of memory?)"
+        return f"exited with code {code}"
+
+
+class WorkerPool:
+    """Fixed-size pool of pre-started worker processes (thread-safe)."""
+
+    def __init__(self, size: int = WORKERS, timeout: float = TIMEOUT,
+                 cpu_seconds: int = CPU_SECONDS, memory_mb: int = MEMORY_MB,
+                 max_jobs: int = MAX_JOBS):
+        self.size = size
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_mb << 20 if memory_mb else 0
+        self.max_jobs = max_jobs
+        self._ctx = multiprocessing.get_context("spawn")  # no fork of a threaded server
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "timeouts": 0, "crashes": 0, "recycled": 0}
+        for _ in range(size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._ctx, self.cpu_seconds, self.memory_bytes)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, workers=self.size, idle=self._idle.qsize())
+
+    def call(self, target: str, *args, timeout: float = None, check=None, **options):
+        """Return target(*args, **options) computed in a worker process.
+
+        target is a "module:function" string. check, if given, is called
+        while waiting and may raise to abandon the call (the worker is then
+        replaced, which is how jobs are cancelled).
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise WorkerTimeout(f"No free worker within {timeout:g}s") from None
+        self._count("calls")
+        healthy = False
+        try:
+            worker.conn.send((target, args, options))
+            while not worker.conn.poll(POLL_SECONDS):
+                if check is not None:
+                    check()
+                if time.monotonic() >= deadline:
+                    self._count("timeouts")
+                    raise WorkerTimeout(f"{target} timed out after {timeout:g}s")
+            try:
+                status, value = worker.conn.recv()
+            except (EOFError, OSError):
+                self._count("crashes")
+                raise WorkerCrashed(f"Worker {worker.crash_reason()} running {target}") from None
+            healthy = not isinstance(value, MemoryError)
+        finally:
+            worker.jobs += 1
+            if healthy and worker.jobs < self.max_jobs:
+                self._idle.put(worker)
+            else:
+                if healthy:
+                    self._count("recycled")
+                worker.stop(kill=not healthy)
+                self._idle.put(self._spawn())
+        if status == "error":
+            raise value
+        return value
+
+    def close(self):
+        """Stop idle workers (busy ones stop when their call returns)."""
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                return
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_pool() -> WorkerPool:
+    """Process-wide pool shared by every Streamlit session in this server."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = WorkerPool(
+                size=int(os.environ.get("NEATIFY_WORKERS", WORKERS)),
+                timeout=float(os.environ.get("NEATIFY_WORKER_TIMEOUT", TIMEOUT)),
+                cpu_seconds=int(os.environ.get("NEATIFY_WORKER_CPU", CPU_SECONDS)),
+                memory_mb=int(os.environ.get("NEATIFY_WORKER_MB", MEMORY_MB)),
+                max_jobs=int(os.environ.get("NEATIFY_WORKER_MAX_JOBS", MAX_JOBS)),
+            )
+        return _default
+
+
+def call(target: str, *args, **options):
+    """default_pool().call(...)."""
+    return default_pool().call(target, *args, **options)
@@ -0,0 +1,241 @@
+"""Background jobs for format/validate/convert calls.
+
+Work runs in a shared thread pool instead of the Streamlit script thread, so
+a slow backend no longer blocks the page and a rerun does not throw the work
+away: the session keeps a ``Job`` handle and polls it. Jobs are keyed like
+cache entries (operation, inputs, options, backend version); asking for the
+same key again, from a rerun or another session, attaches to the running
+job, and finished results are stored in the result cache.
+
+Progress and cancellation are cooperative. Streaming functions (``src, dst``
+signatures) read their input through a file object that records how far
+they got and raises ``Cancelled`` once the job is cancelled. Other calls
+report no progress. Isolated calls (``isolate=True``, see isolation.py) are
+stopped by killing their worker process; other calls cannot be interrupted,
+so cancelling them only detaches the job and drops its result. Every
+submit() that returns a job counts as one holder of it; release() cancels
+the job only once no holder is left, so a session dropping a job shared
+with another session does not stop the other session's work.
+"""
+
+import contextvars
+import io
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import cache
+import isolation
+import tracing
+
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+POLL_SECONDS = 0.25
+
+_MISSING = object()
+
+
+class Cancelled(Exception):
+    """Raised by Job.result() (and inside the job) once a job is cancelled."""
+
+
+class Job:
+    """Handle on one background call: status, progress, result, cancel()."""
+
+    def __init__(self, key: str, op: str):
+        self.key = key
+        self.op = op
+        self.progress = None          # fraction of input read, for streaming jobs
+        self.started = time.monotonic()
+        self.finished = None
+        self.future = None
+        self.holders = 1
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    def done(self) -> bool:
+        return self.cancelled or self.future.done()
+
+    def cancel(self) -> None:
+        """Stop the job (streaming jobs stop at their next read) and forget it."""
+        self._cancel.set()
+        self.future.cancel()
+        _forget(self)
+
+    def release(self) -> None:
+        """Drop one holder; the job is cancelled when it was the last one."""
+        with _lock:
+            self.holders -= 1
+            last = self.holders <= 0
+        if last and not self.future.done():
+            self.cancel()
+
+    def check(self) -> None:
+        if self.cancelled:
+            raise Cancelled(self.op)
+
+    def result(self):
+        """The job's return value; raises its exception, or Cancelled."""
+        self.check()
+        return self.future.result()
+
+
+class _ProgressReader(io.StringIO):
+    """StringIO that reports read progress to a job and aborts when it is cancelled."""
+
+    def __init__(self, text: str, job: Job):
+        super().__init__(text, newline="")
+        self._size = max(len(text), 1)
+        self._job = job
+        self._lines = 0
+
+    def _report(self):
+        self._job.check()
+        self._job.progress = min(self.tell() / self._size, 1.0)
+
+    def read(self, size=-1):
+        self._report()
+        return super().read(size)
+
+    def readline(self, size=-1):
+        self._report()
+        return super().readline(size)
+
+    def __next__(self):
+        # Line iteration (csv.reader) is too hot to report on every line.
+        self._lines += 1
+        if self._lines % 1024 == 0:
+            self._report()
+        return super().__next__()
+
+
+class _ProgressFile:
+    """_ProgressReader for an uploads.Upload: a text reader over its bytes."""
+
+    def __init__(self, upload, job: Job):
+        self._file = upload.open_text()
+        self._size = max(upload.size, 1)
+        self._job = job
+        self._lines = 0
+
+    def _report(self):
+        self._job.check()
+        self._job.progress = min(self._file.buffer.tell() / self._size, 1.0)
+
+    def read(self, size=-1):
+        self._report()
+        return self._file.read(size)
+
+    def readline(self, size=-1):
+        self._report()
+        return self._file.readline(size)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self._lines += 1
+        if self._lines % 1024 == 0:
+            self._report()
+        return next(self._file)
+
+    def __getattr__(self, name):
+        # seekable(), seek(), tell() and the rest go straight to the reader.
+        return getattr(self._file, name)
+
+
+_pool = None
+_jobs = {}                # key -> running Job
+_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="neatify-job")
+    return _pool
+
+
+def _forget(job: Job) -> None:
+    with _lock:
+        if _jobs.get(job.key) is job:
+            del _jobs[job.key]
+
+
+def _run(job: Job, func, args: tuple, options: dict, stream: bool, isolate: bool, size: int):
+    try:
+        job.check()
+        with tracing.span(f"job.{job.op}", args[0] if args else None, capture=True,
+                          queued_ms=round((time.monotonic() - job.started) * 1e3, 2),
+                          mode="stream" if stream else "isolated" if isolate else "call") as s:
+            if stream:
+                src = args[0]
+                reader = _ProgressReader(src, job) if isinstance(src, str) else _ProgressFile(src, job)
+                out = io.StringIO()
+                try:
+                    func(reader, out, *args[1:], **options)
+                finally:
+                    reader.close()
+                value = out.getvalue()
+            elif isolate:
+                value = isolation.call(getattr(func, "target", func), *args, check=job.check, **options)
+            else:
+                value = func(*args, **options)
+            s.set(out=len(value) if isinstance(value, str) else None)
+        job.check()
+        cache.default_cache().put(job.key, value, size=size)
+        job.progress = 1.0
+        return value
+    finally:
+        job.finished = time.monotonic()
+        _forget(job)
+
+
+def submit(op: str, func, *args, version: str = "", stream: bool = False, isolate: bool = False,
+           size: int = None, **options) -> Job:
+    """Run func(*args, **options) in the background and return its Job.
+
+    Keys and size follow cache.cached, so either one finds the other's results.
+    With stream=True, func is called as func(src, dst, *args[1:], **options)
+    with args[0] (the input text, or an uploads.Upload read through its text
+    reader) as src, and the job's result is what it wrote to dst. With
+    isolate=True, func (a registry Backend or a "module:function" string)
+    runs in an isolation.py worker process.
+    """
+    with tracing.span("job.submit", args[0] if args else None, op=op):
+        return _submit(op, func, args, options, version, stream, isolate, size)
+
+
+def _submit(op, func, args, options, version, stream, isolate, size) -> Job:
+    key = cache.make_key(op, args, options, version)
+    with _lock:
+        job = _jobs.get(key)
+        if job is not None:
+            job.holders += 1
+            return job
+        job = Job(key, op)
+        value = cache.default_cache().get(key, _MISSING)
+        if value is not _MISSING:
+            job.future = Future()
+            job.future.set_result(value)
+            job.finished = job.started
+            job.progress = 1.0
+            return job
+        _jobs[key] = job
+        # The copied context carries the submitting run's trace (tracing.py).
+        job.future = _executor().submit(contextvars.copy_context().run, _run,
+                                        job, func, args, options, stream, isolate, size)
+    return job
+
+
+def running() -> list:
+    """Jobs currently queued or running, across all sessions."""
+    with _lock:
+        return list(_jobs.values())
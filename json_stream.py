@@ -0,0 +1,320 @@
+"""Streaming JSON pretty-printer.
+
+Reads JSON from a file object chunk by chunk and yields indented output
+token by token, so memory is bounded by nesting depth (plus the longest
+single string or number) instead of document size. Output is identical to
+``json.dumps(json.loads(text), indent=4, ensure_ascii=False)``, except that
+duplicate object keys are passed through instead of collapsed.
+"""
+
+import codecs
+import json
+import re
+from json.decoder import scanstring
+from json.encoder import encode_basestring
+
+CHUNK_SIZE = 1 << 16
+FLUSH_SIZE = 1 << 16
+
+_WS = re.compile(r"[ \t\n\r]*")
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?")
+_NUMBER_CHARS = frozenset("0123456789+-.eE")
+_LITERALS = {"t": "true", "f": "false", "n": "null", "N": "NaN", "I": "Infinity"}
+_LITERAL_VALUES = {"true": True, "false": False, "null": None, "NaN": float("nan"),
+                   "Infinity": float("inf"), "-Infinity": float("-inf")}
+
+
+def _float_repr(value: float) -> str:
+    """Render a float exactly like json.dumps does."""
+    if value != value:
+        return "NaN"
+    if value == float("inf"):
+        return "Infinity"
+    if value == float("-inf"):
+        return "-Infinity"
+    return float.__repr__(value)
+
+
+class _Reader:
+    """Sliding text buffer over a file object (text or binary)."""
+
+    def __init__(self, src, chunk_size: int = CHUNK_SIZE):
+        self.src = src
+        self.chunk_size = chunk_size
+        self.decoder = None
+        self.buf = ""
+        self.pos = 0
+        self.offset = 0  # absolute offset of buf[0] in the stream
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Read another chunk, dropping consumed text. Return False at EOF."""
+        if self.eof:
+            return False
+        chunk = self.src.read(self.chunk_size)
+        if isinstance(chunk, bytes):
+            if self.decoder is None:
+                self.decoder = codecs.getincrementaldecoder("utf-8")()
+            raw = chunk
+            chunk = self.decoder.decode(raw, final=not raw)
+            while raw and not chunk:  # partial multi-byte sequence
+                raw = self.src.read(self.chunk_size)
+                chunk = self.decoder.decode(raw, final=not raw)
+        if not chunk:
+            self.eof = True
+            return False
+        self.offset += self.pos
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def error(self, msg: str) -> ValueError:
+        return ValueError(f"{msg}: char {self.offset + self.pos}")
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at EOF)."""
+        pos = self.pos
+        if pos < len(self.buf) and self.buf[pos] not in " \t\n\r":
+            return self.buf[pos]
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def ensure(self, n: int) -> None:
+        """Make sure at least n characters are buffered past pos, if possible."""
+        while len(self.buf) - self.pos < n and self.fill():
+            pass
+
+    def read_string(self) -> str:
+        """Consume a string token (pos at the opening quote) and return it encoded."""
+        return encode_basestring(self.read_string_value())
+
+    def read_string_value(self) -> str:
+        """Consume a string token (pos at the opening quote) and return it decoded."""
+        start = self.pos
+        scan = start + 1
+        while True:
+            quote = self.buf.find('"', scan)
+            if quote == -1:
+                scan = len(self.buf)
+                consumed = self.pos
+                if not self.fill():
+                    raise self.error("Unterminated string starting at")
+                start -= consumed
+                scan -= consumed
+                continue
+            backslashes = 0
+            i = quote - 1
+            while i > start and self.buf[i] == "\\":
+                backslashes += 1
+                i -= 1
+            if backslashes % 2 == 0:
+                break
+            scan = quote + 1
+        try:
+            value, end = scanstring(self.buf, start + 1)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{e.msg}: char {self.offset + e.pos}") from None
+        self.pos = end
+        return value
+
+    def read_scalar(self) -> str:
+        """Consume a number or literal token and return its canonical form."""
+        literal = self._read_literal()
+        if literal is not None:
+            return literal
+        match = self._read_number()
+        if match.group(1) or match.group(2):
+            return _float_repr(float(match.group()))
+        return int.__repr__(int(match.group()))
+
+    def read_scalar_value(self):
+        """Consume a number or literal token and return it as json.loads would."""
+        literal = self._read_literal()
+        if literal is not None:
+            return _LITERAL_VALUES[literal]
+        match = self._read_number()
+        if match.group(1) or match.group(2):
+            return float(match.group())
+        return int(match.group())
+
+    def _read_literal(self):
+        literal = _LITERALS.get(self.buf[self.pos])
+        if literal is None and self.buf[self.pos] == "-":
+            self.ensure(9)
+            if self.buf.startswith("-Infinity", self.pos):
+                literal = "-Infinity"
+        if literal is not None:
+            self.ensure(len(literal))
+            if not self.buf.startswith(literal, self.pos):
+                raise self.error("Expecting value")
+            self.pos += len(literal)
+        return literal
+
+    def _read_number(self):
+        end = self.pos
+        while True:
+            while end < len(self.buf) and self.buf[end] in _NUMBER_CHARS:
+                end += 1
+            if end < len(self.buf):
+                break
+            consumed = self.pos
+            if not self.fill():
+                break
+            end -= consumed
+        match = _NUMBER.match(self.buf, self.pos, end)
+        if match is None or match.end() == self.pos:
+            raise self.error("Expecting value")
+        self.pos = match.end()
+        return match
+
+
+def _iter_document(reader: _Reader, indent: str):
+    """Yield output pieces for a single JSON value read from reader."""
+    stack = []  # "[" or "{" per open container
+    expect_key = False
+    while True:
+        ch = reader.peek()
+        if expect_key:
+            if ch != '"':
+                raise reader.error("Expecting property name enclosed in double quotes")
+            yield reader.read_string()
+            if reader.peek() != ":":
+                raise reader.error("Expecting ':' delimiter")
+            reader.pos += 1
+            yield ": "
+            ch = reader.peek()
+            expect_key = False
+
+        if ch == "":
+            raise reader.error("Expecting value")
+        if ch in "[{":
+            reader.pos += 1
+            close = "]" if ch == "[" else "}"
+            if reader.peek() == close:
+                reader.pos += 1
+                yield ch + close
+            else:
+                stack.append(ch)
+                yield ch + "\n" + indent * len(stack)
+                expect_key = ch == "{"
+                continue
+        elif ch == '"':
+            yield reader.read_string()
+        else:
+            yield reader.read_scalar()
+
+        # After a complete value: close finished containers or move to the next item.
+        while stack:
+            ch = reader.peek()
+            close = "]" if stack[-1] == "[" else "}"
+            if ch == ",":
+                reader.pos += 1
+                yield ",\n" + indent * len(stack)
+                expect_key = stack[-1] == "{"
+                break
+            if ch == close:
+                reader.pos += 1
+                stack.pop()
+                yield "\n" + indent * len(stack) + close
+                continue
+            raise reader.error("Expecting ',' delimiter")
+        else:
+            return
+
+
+def iter_events(src, chunk_size: int = CHUNK_SIZE):
+    """Yield (event, value) pairs for one JSON document read from a file object.
+
+    Events are ("start_map", None), ("key", name), ("end_map", None),
+    ("start_array", None), ("end_array", None) and ("value", scalar), with
+    scalars decoded exactly as json.loads decodes them.
+    """
+    reader = _Reader(src, chunk_size)
+    stack = []
+    expect_key = False
+    while True:
+        ch = reader.peek()
+        if expect_key:
+            if ch != '"':
+                raise reader.error("Expecting property name enclosed in double quotes")
+            yield "key", reader.read_string_value()
+            if reader.peek() != ":":
+                raise reader.error("Expecting ':' delimiter")
+            reader.pos += 1
+            ch = reader.peek()
+            expect_key = False
+
+        if ch == "":
+            raise reader.error("Expecting value")
+        if ch in "[{":
+            reader.pos += 1
+            close = "]" if ch == "[" else "}"
+            yield ("start_array" if ch == "[" else "start_map"), None
+            if reader.peek() == close:
+                reader.pos += 1
+                yield ("end_array" if ch == "[" else "end_map"), None
+            else:
+                stack.append(ch)
+                expect_key = ch == "{"
+                continue
+        elif ch == '"':
+            yield "value", reader.read_string_value()
+        else:
+            yield "value", reader.read_scalar_value()
+
+        while stack:
+            ch = reader.peek()
+            close = "]" if stack[-1] == "[" else "}"
+            if ch == ",":
+                reader.pos += 1
+                expect_key = stack[-1] == "{"
+                break
+            if ch == close:
+                reader.pos += 1
+                yield ("end_array" if stack.pop() == "[" else "end_map"), None
+                continue
+            raise reader.error("Expecting ',' delimiter")
+        else:
+            break
+    if reader.peek() != "":
+        raise reader.error("Extra data")
+
+
+def iter_format(src, indent: int = 4, multi: bool = False, chunk_size: int = CHUNK_SIZE):
+    """Yield formatted JSON text in pieces as it is read from a file object.
+
+    With ``multi=True`` every top-level value (e.g. one per NDJSON line) is
+    formatted in turn and the results are separated by newlines.
+    """
+    reader = _Reader(src, chunk_size)
+    pad = " " * indent
+    first = True
+    while True:
+        if not first:
+            if not multi or reader.peek() == "":
+                break
+            yield "\n"
+        yield from _iter_document(reader, pad)
+        first = False
+    if reader.peek() != "":
+        raise reader.error("Extra data")
+
+
+def format_stream(src, dst, indent: int = 4, multi: bool = False,
+                  chunk_size: int = CHUNK_SIZE) -> None:
+    """Format JSON from src into dst, flushing output in bounded batches."""
+    pending = []
+    size = 0
+    for piece in iter_format(src, indent=indent, multi=multi, chunk_size=chunk_size):
+        pending.append(piece)
+        size += len(piece)
+        if size >= FLUSH_SIZE:
+            dst.write("".join(pending))
+            pending.clear()
+            size = 0
+    if pending:
+        dst.write("".join(pending))
@@ -0,0 +1,131 @@
+"""Registry of formatters and validators, resolved lazily by name.
+
+Each entry names its implementation as a ``"module:function"`` string and is
+only imported the first time it is called, so listing what is available
+(for menus, upload filters or the CLI) never pulls in a backend.
+"""
+
+import functools
+import importlib
+import platform
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Backend:
+    """A formatter or validator plus the metadata the UI needs to drive it."""
+
+    name: str
+    target: str                      # "module:function", imported on first call
+    kind: str = "formatter"          # "formatter" or "validator"
+    extensions: tuple = ()           # file extensions handled, without dots
+    language: str = "text"           # st.code highlighting language
+    tree: bool = False               # has a tree viewer
+    schema_label: str = ""           # validators: prompt for a schema, if one is needed
+    button_label: str = ""           # validators: action button text
+    package: str = ""                # distribution whose version affects output
+    stream: str = ""                 # "module:function(src, dst)" with the same output, if any
+    isolated: bool = False           # CPU-heavy pure Python: run in isolation.py workers
+    incremental: bool = False        # incremental.py can re-format it unit by unit
+    _func: object = field(default=None, repr=False, compare=False)
+
+    def load(self):
+        """Import and return the implementation."""
+        if self._func is None:
+            module, _, attr = self.target.partition(":")
+            self._func = getattr(importlib.import_module(module), attr)
+        return self._func
+
+    def load_stream(self):
+        """Import and return the streaming implementation, or None."""
+        if not self.stream:
+            return None
+        module, _, attr = self.stream.partition(":")
+        return getattr(importlib.import_module(module), attr)
+
+    def version(self) -> str:
+        """Backend version string, used to key cached results."""
+        return package_version(self.package)
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+
+@functools.lru_cache(maxsize=None)
+def package_version(package: str) -> str:
+    """Installed version of a distribution ("python-X.Y.Z" for the stdlib)."""
+    if not package:
+        return "python-" + platform.python_version()
+    from importlib import metadata
+    try:
+        return f"{package}-{metadata.version(package)}"
+    except metadata.PackageNotFoundError:
+        return f"{package}-missing"
+
+
+_FORMATTERS = {}
+_VALIDATORS = {}
+
+
+def register(backend: Backend) -> Backend:
+    """Add (or replace) a backend under its name."""
+    table = _VALIDATORS if backend.kind == "validator" else _FORMATTERS
+    table[backend.name] = backend
+    return backend
+
+
+def get_formatter(name: str) -> Backend:
+    return _FORMATTERS[name]
+
+
+def get_validator(name: str):
+    """Return the validator for a format name, or None if it has none."""
+    return _VALIDATORS.get(name)
+
+
+def formatter_names() -> list:
+    return list(_FORMATTERS)
+
+
+def extensions() -> list:
+    """All file extensions handled by registered formatters, in order."""
+    seen = []
+    for backend in _FORMATTERS.values():
+        seen.extend(ext for ext in backend.extensions if ext not in seen)
+    return seen
+
+
+def formatter_for_extension(ext: str):
+    """Return the formatter that claims a file extension, or None."""
+    ext = ext.lower().lstrip(".")
+    for backend in _FORMATTERS.values():
+        if ext in backend.extensions:
+            return backend
+    return None
+
+
+# ------------------ Built-in backends ------------------
+
+for _name, _func, _exts, _lang, _tree, _pkg, _stream in [
+    ("JSON", "format_json", ("json",), "json", True, "", "format_json_stream"),
+    ("XML", "format_xml", ("xml",), "xml", True, "", ""),
+    ("YAML", "format_yaml", ("yaml", "yml"), "yaml", True, "PyYAML", "format_yaml_stream"),
+    ("CSV", "format_csv", ("csv",), "csv", False, "", "format_csv_stream"),
+    ("TOML", "format_toml", ("toml",), "toml", False, "tomli_w", ""),
+    ("INI", "format_ini", ("ini", "cfg"), "ini", False, "", ""),
+    ("Markdown", "format_markdown", ("md",), "markdown", False, "", ""),
+    ("HTML", "format_html", ("html",), "html", False, "beautifulsoup4", ""),
+    ("SQL", "format_sql", ("sql",), "sql", False, "sqlparse", ""),
+    ("Python", "format_python", ("py",), "python", False, "autopep8", ""),
+]:
+    register(Backend(_name, f"formatter:{_func}", extensions=_exts, language=_lang,
+                     tree=_tree, package=_pkg, stream=_stream and f"formatter:{_stream}",
+                     isolated=_name in ("HTML", "SQL", "Python"),
+                     incremental=_name in ("Markdown", "SQL", "Python")))
+
+register(Backend("JSON", "formatter:validate_json_schema", kind="validator", package="jsonschema",
+                 schema_label="Paste JSON Schema (optional):", button_label="Validate JSON"))
+register(Backend("XML", "formatter:validate_xml_xsd", kind="validator", package="xmlschema",
+                 schema_label="Paste XSD Schema (optional):", button_label="Validate XML"))
+register(Backend("YAML", "formatter:lint_yaml", kind="validator", package="yamllint",
+                 button_label="Lint YAML", isolated=True))
@@ -0,0 +1,548 @@
+"""Local HTTP formatting service (ASGI, no framework).
+
+Run with ``python service.py [--host H] [--port P]`` (needs uvicorn), or
+serve ``service:app`` with any ASGI server. Endpoints, UTF-8 throughout::
+
+    GET  /health                     status, cache, job and worker statistics
+    GET  /formats                    formatter, validator and conversion names
+    POST /format/{name}              body: document  -> formatted document
+    POST /convert/{source}-{target}  body: document  -> converted document
+    POST /validate/{name}            {"document", "schema"?}  -> {"result"}
+    POST /diff                       {"original", "modified", "format"?, "list_key"?}
+                                     -> {"diff"} (unified) or {"ops"} (structural)
+    POST /batch                      {"items": [...]} or NDJSON, one item per line
+                                     -> NDJSON, one result per line as items finish
+
+Batch items look like ``{"op": "format", "name": "JSON", "document": "..."}``
+(``op`` is format, convert, validate or diff, with the fields of the matching
+endpoint); results carry the item's ``index`` and ``id`` and either
+``result`` or ``error``.
+
+Large bodies stream both ways. A format or conversion with a streaming
+implementation (JSON, CSV, JSON -> XML, XML -> JSON) whose body exceeds
+STREAM_THRESHOLD is fed to the formatter as it arrives, and output is sent
+as it is produced, so memory stays bounded. If such a call fails after
+output has started, the connection is closed mid-body. Smaller calls go
+through jobs.submit, so they share the result cache and in-flight
+deduplication with the app. CPU-heavy backends run in isolation.py workers.
+
+At most MAX_CONCURRENCY calls run at once and MAX_QUEUED more may wait;
+past that requests get 503 with Retry-After rather than queueing without
+bound. A streamed response pauses the formatter while the client is slow
+to read; the streamed request is spooled meanwhile (to disk past
+SPOOL_SIZE), so memory stays bounded either way. Settings:
+NEATIFY_SERVICE_CONCURRENCY, NEATIFY_SERVICE_QUEUE, NEATIFY_SERVICE_MAX_BODY_MB.
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+
+import cache
+import diff_engine
+import isolation
+import jobs
+import registry
+import struct_diff
+
+MAX_CONCURRENCY = int(os.environ.get("NEATIFY_SERVICE_CONCURRENCY", 2 * (os.cpu_count() or 1)))
+MAX_QUEUED = int(os.environ.get("NEATIFY_SERVICE_QUEUE", 64))
+MAX_BODY = int(os.environ.get("NEATIFY_SERVICE_MAX_BODY_MB", 64)) << 20   # buffered bodies
+STREAM_THRESHOLD = 1 << 20
+SPOOL_SIZE = 8 << 20       # streamed request bytes kept in memory before spilling to disk
+OUTPUT_QUEUE = 16          # response pieces buffered ahead of the client
+OUTPUT_PIECE = 64 << 10
+
+# name -> (buffered "module:function", streaming "module:function" or "", package)
+CONVERSIONS = {
+    "json-xml": ("formatter:json_to_xml", "formatter:json_to_xml_stream", "xmltodict"),
+    "xml-json": ("formatter:xml_to_json", "formatter:xml_to_json_stream", "xmltodict"),
+    "json-toml": ("formatter:json_to_toml", "", "toml"),
+    "json-toon": ("formatter:json_to_toon", "", ""),
+    "toon-json": ("formatter:toon_to_json", "", ""),
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: list = ()):
+        super().__init__(message)
+        self.status = status
+        self.headers = list(headers)
+
+
+# ------------------ Helpers ------------------
+
+def _resolve(target: str):
+    return registry.Backend("", target).load()
+
+
+def _formatter(name: str) -> registry.Backend:
+    """Case-insensitive formatter lookup."""
+    for known in registry.formatter_names():
+        if known.lower() == name.lower():
+            return registry.get_formatter(known)
+    raise HTTPError(404, f"Unknown format {name!r}")
+
+
+def _validator(name: str) -> registry.Backend:
+    validator = registry.get_validator(_formatter(name).name)
+    if validator is None:
+        raise HTTPError(404, f"No validator for {name!r}")
+    return validator
+
+
+def _conversion(name: str) -> tuple:
+    if name.lower() not in CONVERSIONS:
+        raise HTTPError(404, f"Unknown conversion {name!r}")
+    return CONVERSIONS[name.lower()]
+
+
+def _field(item: dict, name: str) -> str:
+    value = item.get(name)
+    if not isinstance(value, str):
+        raise HTTPError(400, f"Missing string field {name!r}")
+    return value
+
+
+def _status(exc: Exception) -> int:
+    if isinstance(exc, HTTPError):
+        return exc.status
+    if isinstance(exc, isolation.WorkerTimeout):
+        return 504
+    if isinstance(exc, (ValueError, TypeError, KeyError, UnicodeDecodeError)):
+        return 400
+    return 500
+
+
+def text_diff(original: str, modified: str) -> str:
+    """Unified diff of two texts (diff_engine, patience with a work budget)."""
+    return "".join(diff_engine.unified_diff(original.splitlines(keepends=True),
+                                            modified.splitlines(keepends=True),
+                                            fromfile="original", tofile="modified"))
+
+
+async def _send(send, status: int, body: bytes, content_type: str, headers: list = ()):
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", content_type.encode()),
+                            (b"content-length", str(len(body)).encode()), *headers]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_json(send, status: int, obj, headers: list = ()):
+    await _send(send, status, json.dumps(obj, ensure_ascii=False).encode("utf-8"),
+                "application/json", headers)
+
+
+async def _read_body(receive, limit: int = MAX_BODY) -> bytes:
+    parts, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise HTTPError(499, "Client disconnected")
+        parts.append(message.get("body", b""))
+        size += len(parts[-1])
+        if size > limit:
+            raise HTTPError(413, f"Body larger than {limit >> 20} MB")
+        if not message.get("more_body"):
+            return b"".join(parts)
+
+
+async def _read_json(receive) -> dict:
+    try:
+        data = json.loads(await _read_body(receive))
+    except ValueError as e:
+        raise HTTPError(400, f"Invalid JSON body: {e}") from None
+    if not isinstance(data, dict):
+        raise HTTPError(400, "JSON body must be an object")
+    return data
+
+
+# ------------------ Streaming bridge ------------------
+
+class _BodyPipe(io.RawIOBase):
+    """Request body spooled as it arrives and read back by a worker thread.
+
+    Arrival never waits for the formatter: clients commonly send their whole
+    body before reading the response, and a full response queue must not
+    stall the upload. The spool moves to disk past SPOOL_SIZE.
+    """
+
+    def __init__(self, stop):
+        self.spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        self.stop = stop          # threading.Event: the exchange was abandoned
+        self.cond = threading.Condition()
+        self.written = 0
+        self.offset = 0
+        self.eof = False
+        self.error = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        with self.cond:
+            while self.offset == self.written and not self.eof and self.error is None:
+                if self.stop.is_set():
+                    raise ConnectionAbortedError("Request abandoned")
+                self.cond.wait(0.1)
+            if self.offset == self.written:
+                if self.error is not None:
+                    raise self.error
+                return 0
+            self.spool.seek(self.offset)
+            data = self.spool.read(min(len(buffer), self.written - self.offset))
+        buffer[:len(data)] = data
+        self.offset += len(data)
+        return len(data)
+
+    async def feed(self, receive):
+        """Copy the request body into the spool as it arrives."""
+        while True:
+            message = await receive()
+            with self.cond:
+                if message["type"] == "http.disconnect":
+                    self.error = ConnectionAbortedError("Client disconnected")
+                else:
+                    body = message.get("body", b"")
+                    self.spool.seek(self.written)
+                    self.spool.write(body)
+                    self.written += len(body)
+                    self.eof = not message.get("more_body")
+                self.cond.notify_all()
+            if self.error is not None or self.eof:
+                return
+
+
+class _ResponseWriter:
+    """Text file object whose writes go, in pieces, to an asyncio queue."""
+
+    def __init__(self, loop, out: asyncio.Queue, stop):
+        self.loop = loop
+        self.out = out
+        self.stop = stop
+        self.pending = []
+        self.size = 0
+
+    def _put(self, item):
+        future = asyncio.run_coroutine_threadsafe(self.out.put(item), self.loop)
+        while True:
+            try:
+                return future.result(timeout=0.1)
+            except TimeoutError:
+                if self.stop.is_set():
+                    future.cancel()
+                    raise ConnectionAbortedError("Response abandoned") from None
+
+    def write(self, text: str) -> int:
+        self.pending.append(text)
+        self.size += len(text)
+        if self.size >= OUTPUT_PIECE:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if self.pending:
+            self._put("".join(self.pending).encode("utf-8"))
+            self.pending.clear()
+            self.size = 0
+
+    def close(self, error: BaseException = None):
+        if error is None:
+            self.flush()
+        self._put(error)
+
+
+# ------------------ Application ------------------
+
+class Service:
+    """The ASGI application."""
+
+    def __init__(self, concurrency: int = MAX_CONCURRENCY, queued: int = MAX_QUEUED):
+        self.concurrency = concurrency
+        self.queued = queued
+        self.waiting = 0
+        self.active = 0
+        self.rejected = 0
+        self._slots = None
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="neatify-http")
+
+    def admit(self):
+        """Reject with 503 when every slot is busy and the wait queue is full."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        if self._slots.locked() and self.waiting >= self.queued:
+            self.rejected += 1
+            raise HTTPError(503, "Too many requests in flight", [(b"retry-after", b"1")])
+
+    @contextlib.asynccontextmanager
+    async def slot(self, admit: bool = True):
+        """Hold one of the concurrency slots, after admission unless admit=False."""
+        if admit:
+            self.admit()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        method, path = scope["method"], unquote(scope["path"]).rstrip("/")
+        started = False
+        raw_send = send
+
+        async def send(message):
+            nonlocal started
+            started = started or message["type"] == "http.response.start"
+            await raw_send(message)
+
+        try:
+            if method == "GET" and path == "/health":
+                await _send_json(send, 200, self.health())
+            elif method == "GET" and path == "/formats":
+                await _send_json(send, 200, {
+                    "formatters": registry.formatter_names(),
+                    "validators": [n for n in registry.formatter_names() if registry.get_validator(n)],
+                    "conversions": list(CONVERSIONS)})
+            elif method != "POST":
+                raise HTTPError(405 if path in ("/health", "/formats") else 404, "Not found")
+            elif path.startswith("/format/"):
+                backend = _formatter(path[len("/format/"):])
+                await self._transform(scope, receive, send, f"format:{backend.name}", backend,
+                                      backend.stream, backend.version(), backend.isolated)
+            elif path.startswith("/convert/"):
+                name = path[len("/convert/"):].lower()
+                target, stream, package = _conversion(name)
+                await self._transform(scope, receive, send, f"convert:{name}", _resolve(target),
+                                      stream, registry.package_version(package), False)
+            elif path.startswith("/validate/") or path == "/diff":
+                request = await _read_json(receive)
+                request["op"] = "diff" if path == "/diff" else "validate"
+                request["name"] = path[len("/validate/"):]
+                async with self.slot():
+                    await _send_json(send, 200, await self.run_item(request))
+            elif path == "/batch":
+                await self._batch(scope, receive, send)
+            else:
+                raise HTTPError(404, "Not found")
+        except Exception as e:
+            if started:
+                raise   # too late for an error response; the server drops the connection
+            await _send_json(send, _status(e), {"error": str(e)}, getattr(e, "headers", []))
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # Import every backend and start the workers before the first request.
+                for name in registry.formatter_names():
+                    registry.get_formatter(name).load()
+                isolation.default_pool()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self._executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def health(self) -> dict:
+        return {"status": "ok", "active": self.active, "waiting": self.waiting,
+                "rejected": self.rejected, "cache": cache.default_cache().stats(),
+                "jobs": len(jobs.running()), "workers": isolation.default_pool().stats()}
+
+    # -------- format / convert --------
+
+    async def _transform(self, scope, receive, send, op, func, stream, version, isolate):
+        length = dict(scope.get("headers", [])).get(b"content-length")
+        async with self.slot():
+            if stream and (length is None or int(length) > STREAM_THRESHOLD):
+                await self._stream(receive, send, _resolve(stream))
+                return
+            text = (await _read_body(receive)).decode("utf-8")
+            job = jobs.submit(op, func, text, version=version, isolate=isolate)
+            result = await asyncio.wrap_future(job.future)
+        await _send(send, 200, result.encode("utf-8"), "text/plain; charset=utf-8")
+
+    async def _stream(self, receive, send, func):
+        loop = asyncio.get_running_loop()
+        stop = threading.Event()
+        body = _BodyPipe(stop)
+        out = asyncio.Queue(maxsize=OUTPUT_QUEUE)
+        writer = _ResponseWriter(loop, out, stop)
+
+        def work():
+            src = io.TextIOWrapper(io.BufferedReader(body), encoding="utf-8", newline="")
+            try:
+                func(src, writer)
+            except BaseException as e:
+                if not stop.is_set():
+                    writer.close(e)
+            else:
+                writer.close()
+
+        feeder = asyncio.ensure_future(body.feed(receive))
+        worker = loop.run_in_executor(self._executor, work)
+        started = False
+        try:
+            while True:
+                piece = await out.get()
+                if piece is None:
+                    break
+                if isinstance(piece, BaseException):
+                    if started:
+                        raise piece
+                    raise HTTPError(_status(piece), str(piece))
+                if not started:
+                    started = True
+                    await send({"type": "http.response.start", "status": 200,
+                                "headers": [(b"content-type", b"text/plain; charset=utf-8")]})
+                await send({"type": "http.response.body", "body": piece, "more_body": True})
+            if not started:
+                await send({"type": "http.response.start", "status": 200,
+                            "headers": [(b"content-type", b"text/plain; charset=utf-8")]})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            stop.set()
+            feeder.cancel()
+            await worker
+            body.spool.close()
+
+    # -------- validate / diff / batch items --------
+
+    async def run_item(self, item: dict) -> dict:
+        """Run one format/convert/validate/diff request given as a dict."""
+        op = item.get("op")
+        if op == "format":
+            backend = _formatter(item.get("name", ""))
+            job = jobs.submit(f"format:{backend.name}", backend, _field(item, "document"),
+                              version=backend.version(), isolate=backend.isolated)
+        elif op == "convert":
+            name = item.get("name", "").lower()
+            target, _, package = _conversion(name)
+            job = jobs.submit(f"convert:{name}", _resolve(target), _field(item, "document"),
+                              version=registry.package_version(package))
+        elif op == "validate":
+            validator = _validator(item.get("name", ""))
+            args = (_field(item, "document"),)
+            if validator.schema_label:
+                args += (_field(item, "schema"),)
+            job = jobs.submit(f"validate:{validator.name}", validator, *args,
+                              version=validator.version(), isolate=validator.isolated)
+        elif op == "diff":
+            original, modified = _field(item, "original"), _field(item, "modified")
+            if item.get("format"):
+                job = jobs.submit("diff:structural", struct_diff.diff_documents, original, modified,
+                                  _formatter(item["format"]).name, item.get("list_key"))
+                return {"ops": await asyncio.wrap_future(job.future)}
+            job = jobs.submit("diff:text", text_diff, original, modified)
+            return {"diff": await asyncio.wrap_future(job.future)}
+        else:
+            raise HTTPError(400, f"Unknown op {op!r}")
+        return {"result": await asyncio.wrap_future(job.future)}
+
+    async def _items(self, scope, receive):
+        """Yield batch items: a JSON {"items": [...]} body, or NDJSON as it arrives."""
+        content_type = dict(scope.get("headers", [])).get(b"content-type", b"")
+        if b"ndjson" not in content_type:
+            request = await _read_json(receive)
+            for item in request.get("items", []):
+                yield item
+            return
+        buffer = b""
+        more = True
+        while more:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise HTTPError(499, "Client disconnected")
+            buffer += message.get("body", b"")
+            more = message.get("more_body", False)
+            *lines, buffer = buffer.split(b"\n")
+            if not more:
+                lines.append(buffer)
+            if len(buffer) > MAX_BODY:
+                raise HTTPError(413, f"Batch item larger than {MAX_BODY >> 20} MB")
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+
+    async def _batch(self, scope, receive, send):
+        # A batch holds no slot itself (its items would wait on it); once
+        # admitted, its items queue for slots like any other call.
+        self.admit()
+        results = asyncio.Queue()
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def run(index, item):
+            try:
+                if not isinstance(item, dict):
+                    raise HTTPError(400, "Batch items must be objects")
+                async with self.slot(admit=False):
+                    line = {"index": index, "id": item.get("id"), **(await self.run_item(item))}
+            except Exception as e:
+                line = {"index": index, "id": item.get("id") if isinstance(item, dict) else None,
+                        "error": str(e), "status": _status(e)}
+            finally:
+                limit.release()
+            await results.put(line)
+
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")]})
+        count = sent = 0
+        tasks = set()
+        try:
+            async for item in self._items(scope, receive):
+                await limit.acquire()   # stop reading items while the batch is saturated
+                task = asyncio.ensure_future(run(count, item))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                count += 1
+                while not results.empty():
+                    await self._send_line(send, results.get_nowait())
+                    sent += 1
+        except Exception as e:   # a bad request line ends the batch after what was read
+            await self._send_line(send, {"index": None, "error": str(e), "status": _status(e)})
+        while sent < count:
+            await self._send_line(send, await results.get())
+            sent += 1
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _send_line(self, send, line: dict):
+        await send({"type": "http.response.body", "more_body": True,
+                    "body": json.dumps(line, ensure_ascii=False).encode("utf-8") + b"\n"})
+
+
+app = Service()
+
+
+def main(argv: list = None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve Neatify's formatters over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:
+        print("service.py needs an ASGI server: pip install uvicorn", flush=True)
+        return 1
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
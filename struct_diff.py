@@ -0,0 +1,194 @@
+"""Semantic (structural) diff for JSON, YAML, TOML and XML documents.
+
+Both sides are parsed with the same parsers the formatter uses and compared
+as trees, so re-indentation and reordered mapping keys produce no changes.
+The result is a JSON-Patch-style list of operations::
+
+    {"op": "remove",  "path": "/users/3", "old": {...}}
+    {"op": "add",     "path": "/users/4", "value": {...}}
+    {"op": "replace", "path": "/port",    "old": 80, "value": 8080}
+
+``remove``/``replace`` paths index into the old document and ``add`` paths
+into the new one. Every subtree gets a SHA-256 digest of a canonical
+encoding, computed once up front (iteratively, so depth is not limited by
+the recursion limit), and branches with equal digests are skipped without
+being walked. Lists are aligned with the line diff engine on item codes
+(digests, or the encoding of a scalar), or matched by a key field when
+``list_key`` is given.
+"""
+
+import hashlib
+import json
+
+import diff_engine
+
+FORMATS = ["JSON", "YAML", "TOML", "XML"]
+
+
+# ------------------ Parsing ------------------
+
+def parse(text: str, fmt: str):
+    """Parse a document into plain dicts/lists/scalars."""
+    if fmt == "JSON":
+        return json.loads(text)
+    if fmt == "YAML":
+        import yaml_stream
+        return yaml_stream.load(text)
+    if fmt == "TOML":
+        from formatter import tomllib
+        return tomllib.loads(text)
+    if fmt == "XML":
+        import xmltodict
+        return xmltodict.parse(text)
+    raise ValueError(f"Structural diff not supported for {fmt}")
+
+
+# ------------------ Hashing ------------------
+
+_CONTAINERS = (dict, list)
+
+
+def _leaf_key(value):
+    """value as a dict key that only equal values of the same type share."""
+    try:
+        hash(value)
+    except TypeError:  # unhashable scalars such as YAML !!set
+        return (type(value), repr(value))
+    return (type(value), value)
+
+
+_KINDS = {}   # type -> encoded name, for _leaf_code
+
+
+def _leaf_code(value) -> bytes:
+    """Canonical encoding of a scalar: type, then the string or repr (sets sorted)."""
+    kind = type(value)
+    if kind is str:
+        text = value
+    elif kind is set or kind is frozenset:
+        text = "{" + ", ".join(sorted(map(repr, value))) + "}"
+    else:
+        text = repr(value)
+    name = _KINDS.get(kind)
+    if name is None:
+        name = _KINDS[kind] = f"{kind.__module__}.{kind.__qualname__}:".encode()
+    code = name + text.encode("utf-8", "surrogatepass")
+    return b"s%d:" % len(code) + code
+
+
+def _hash_tree(root, hashes: dict) -> None:
+    """Fill hashes[id(container)] with a code for every dict/list under root, post-order.
+
+    A container's code is a SHA-256 digest over its children's codes.
+    """
+    if not isinstance(root, _CONTAINERS):
+        return
+    stack = [(root, False)]
+    active = set()
+    leaf = _leaf_code
+    while stack:
+        node, children_done = stack.pop()
+        key = id(node)
+        if not children_done:
+            if key in hashes:
+                continue
+            if key in active:
+                raise ValueError("Cannot diff recursive (self-referencing) documents")
+            active.add(key)
+            stack.append((node, True))
+            for child in (node.values() if type(node) is dict else node):
+                if isinstance(child, _CONTAINERS) and id(child) not in hashes:
+                    stack.append((child, False))
+            continue
+        active.discard(key)
+        if type(node) is dict:
+            # Sorted pairs, so key order does not change the digest.
+            codes = sorted(leaf(k) + (hashes[id(v)] if isinstance(v, _CONTAINERS) else leaf(v))
+                           for k, v in node.items())
+            hashes[key] = b"d" + hashlib.sha256(b"".join(codes)).digest()
+        else:
+            codes = [hashes[id(v)] if isinstance(v, _CONTAINERS) else leaf(v) for v in node]
+            hashes[key] = b"l" + hashlib.sha256(b"".join(codes)).digest()
+
+
+def _node_hash(value, hashes: dict) -> bytes:
+    if isinstance(value, _CONTAINERS):
+        return hashes[id(value)]
+    return _leaf_code(value)
+
+
+# ------------------ Diff ------------------
+
+def _pointer(tokens: tuple) -> str:
+    return "".join("/" + str(t).replace("~", "~0").replace("/", "~1") for t in tokens)
+
+
+def diff_trees(old, new, list_key: str = None) -> list:
+    """Return the operations that turn old into new."""
+    hashes = {}
+    _hash_tree(old, hashes)
+    _hash_tree(new, hashes)
+    ops = []
+    stack = [((), (), old, new)]  # (old path, new path, old node, new node)
+    while stack:
+        old_path, new_path, a, b = stack.pop()
+        if _node_hash(a, hashes) == _node_hash(b, hashes):
+            continue
+        if isinstance(a, dict) and isinstance(b, dict):
+            pending = []
+            for k in a:
+                if k not in b:
+                    ops.append({"op": "remove", "path": _pointer(old_path + (k,)), "old": a[k]})
+                else:
+                    pending.append((old_path + (k,), new_path + (k,), a[k], b[k]))
+            for k in b:
+                if k not in a:
+                    ops.append({"op": "add", "path": _pointer(new_path + (k,)), "value": b[k]})
+            stack.extend(reversed(pending))
+        elif isinstance(a, list) and isinstance(b, list):
+            stack.extend(reversed(_diff_lists(old_path, new_path, a, b, list_key, hashes, ops)))
+        else:
+            ops.append({"op": "replace", "path": _pointer(old_path), "old": a, "value": b})
+    return ops
+
+
+def _diff_lists(old_path, new_path, a, b, list_key, hashes, ops) -> list:
+    """Emit add/remove ops for a list pair; return item pairs still to compare."""
+    pending = []
+    if list_key and all(isinstance(x, dict) and list_key in x for x in a + b):
+        old_index = {}
+        for i, item in enumerate(a):
+            old_index.setdefault(_leaf_key(item[list_key]), []).append(i)
+        matched = set()
+        for j, item in enumerate(b):
+            candidates = old_index.get(_leaf_key(item[list_key]))
+            if candidates:
+                i = candidates.pop(0)
+                matched.add(i)
+                pending.append((old_path + (i,), new_path + (j,), a[i], item))
+            else:
+                ops.append({"op": "add", "path": _pointer(new_path + (j,)), "value": item})
+        for i, item in enumerate(a):
+            if i not in matched:
+                ops.append({"op": "remove", "path": _pointer(old_path + (i,)), "old": item})
+        return pending
+
+    # Align items by digest with the line diff engine, then compare replaced pairs.
+    result = diff_engine.diff_lines([_node_hash(x, hashes) for x in a],
+                                    [_node_hash(x, hashes) for x in b])
+    for tag, i1, i2, j1, j2 in result.opcodes:
+        if tag == "equal":
+            continue
+        paired = min(i2 - i1, j2 - j1) if tag == "replace" else 0
+        for k in range(paired):
+            pending.append((old_path + (i1 + k,), new_path + (j1 + k,), a[i1 + k], b[j1 + k]))
+        for i in range(i1 + paired, i2):
+            ops.append({"op": "remove", "path": _pointer(old_path + (i,)), "old": a[i]})
+        for j in range(j1 + paired, j2):
+            ops.append({"op": "add", "path": _pointer(new_path + (j,)), "value": b[j]})
+    return pending
+
+
+def diff_documents(old_text: str, new_text: str, fmt: str, list_key: str = None) -> list:
+    """Parse both documents as fmt and diff them structurally."""
+    return diff_trees(parse(old_text, fmt), parse(new_text, fmt), list_key=list_key)
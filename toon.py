@@ -0,0 +1,432 @@
+"""TOON (Token-Oriented Object Notation) encoder and decoder.
+
+TOON is an indentation-based rendering of the JSON data model that states
+array lengths up front and writes arrays of same-shaped objects as a table::
+
+    users[2]{id,name,active}:
+      1,Alice,true
+      2,"Smith, Bob",false
+    tags[3]: a,b,c
+
+* Objects are ``key: value`` lines; nested objects are indented two spaces.
+* Arrays carry their length, ``key[N]:``. Primitive arrays are written
+  inline. Arrays of objects that share the same keys (in the same order)
+  and hold only primitive values become tables, ``key[N]{f1,f2}:``. Any
+  other array is written as ``- item`` lines.
+* Strings are quoted only when they would otherwise be read as something
+  else: empty, padded, literal-like (``true``, ``12``), or containing
+  ``:``, quotes, brackets, braces, the delimiter or a control character.
+  Only ``\\\\ \\" \\n \\r \\t`` escapes are used.
+
+Round trips are lossless for JSON values, int/float distinction included:
+floats always keep a decimal point (``1.0``) and never use exponents. NaN
+and infinities have no TOON form and are written as ``null``.
+
+``iter_encode`` yields lines as it walks the value. ``decode_stream`` reads
+lines from a file object one at a time. The encoder needs the value in
+hand, because every array header states its length before the items.
+"""
+
+import io
+import math
+import re
+from decimal import Decimal
+
+INDENT = "  "
+DELIMITERS = {",": "", "\t": "\t", "|": "|"}   # delimiter -> marker inside [N...]
+
+_UNQUOTED_KEY = re.compile(r"[A-Za-z_][A-Za-z0-9_.]*\Z")
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?\Z")
+_NUMERIC_LIKE = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\Z")
+_HEADER = re.compile(r"\[(\d+)([\t|]?)\]")
+_ESCAPES = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t"}
+_UNESCAPES = {"\\": "\\", '"': '"', "n": "\n", "r": "\r", "t": "\t"}
+_PLAIN_RUN = re.compile(r'[^"\\]*')
+_SPECIAL = frozenset(':"\\[]{}\n\r\t')
+
+
+# ------------------ Encoding ------------------
+
+def _quote(text: str) -> str:
+    return '"' + "".join(_ESCAPES.get(ch, ch) for ch in text) + '"'
+
+
+def _string(text: str, delimiter: str) -> str:
+    if (not text or text != text.strip() or text in ("true", "false", "null")
+            or text.startswith("-") or _NUMERIC_LIKE.match(text)
+            or delimiter in text or not _SPECIAL.isdisjoint(text)
+            or any(ch < " " for ch in text)):
+        return _quote(text)
+    return text
+
+
+def _key(key: str) -> str:
+    return key if _UNQUOTED_KEY.match(key) else _quote(key)
+
+
+def _float(value: float) -> str:
+    if math.isnan(value) or math.isinf(value):
+        return "null"
+    text = repr(value)
+    if "e" in text or "E" in text:
+        text = format(Decimal(text), "f")
+    return text if "." in text else text + ".0"
+
+
+def _primitive(value, delimiter: str) -> str:
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return _float(value)
+    if isinstance(value, str):
+        return _string(value, delimiter)
+    raise TypeError(f"Object of type {type(value).__name__} is not TOON serializable")
+
+
+def _is_primitive(value) -> bool:
+    return not isinstance(value, (dict, list))
+
+
+def _table_fields(items: list):
+    """Field names if items can be written as a table, else None."""
+    if not items or not all(isinstance(item, dict) and item for item in items):
+        return None
+    fields = list(items[0])
+    for item in items:
+        if list(item) != fields or not all(_is_primitive(v) for v in item.values()):
+            return None
+    return fields
+
+
+def _array(head: str, items: list, depth: int, delimiter: str):
+    """Lines for an array whose header line starts with head; items go at depth + 1."""
+    marker = f"[{len(items)}{DELIMITERS[delimiter]}]"
+    if all(_is_primitive(v) for v in items):
+        values = delimiter.join(_primitive(v, delimiter) for v in items)
+        yield f"{head}{marker}: {values}" if items else f"{head}{marker}:"
+        return
+    fields = _table_fields(items)
+    if fields is not None:
+        yield f"{head}{marker}{{{delimiter.join(_key(f) for f in fields)}}}:"
+        pad = INDENT * (depth + 1)
+        for item in items:
+            yield pad + delimiter.join(_primitive(item[f], delimiter) for f in fields)
+        return
+    yield f"{head}{marker}:"
+    for item in items:
+        yield from _item(item, depth + 1, delimiter)
+
+
+def _field(key: str, value, depth: int, delimiter: str, head: str = None):
+    """Lines for one object field at depth (head overrides the first line's indent)."""
+    head = (INDENT * depth if head is None else head) + _key(key)
+    if isinstance(value, dict):
+        yield head + ":"
+        yield from _object(value, depth + 1, delimiter)
+    elif isinstance(value, list):
+        yield from _array(head, value, depth, delimiter)
+    else:
+        yield f"{head}: {_primitive(value, delimiter)}"
+
+
+def _object(obj: dict, depth: int, delimiter: str):
+    for key, value in obj.items():
+        if not isinstance(key, str):
+            raise TypeError(f"Keys must be str, not {type(key).__name__}")
+        yield from _field(key, value, depth, delimiter)
+
+
+def _item(value, depth: int, delimiter: str):
+    """Lines for one "- " list item at depth."""
+    head = INDENT * depth + "- "
+    if isinstance(value, dict):
+        if not value:
+            yield head.rstrip()
+            return
+        # The first field shares the hyphen line; the rest line up under it.
+        fields = iter(value.items())
+        key, first = next(fields)
+        yield from _field(key, first, depth + 1, delimiter, head=head)
+        for key, rest in fields:
+            yield from _field(key, rest, depth + 1, delimiter)
+    elif isinstance(value, list):
+        yield from _array(head, value, depth, delimiter)
+    else:
+        yield head + _primitive(value, delimiter)
+
+
+def iter_encode(value, delimiter: str = ","):
+    """Yield the TOON lines for a JSON-compatible value."""
+    if delimiter not in DELIMITERS:
+        raise ValueError(f"Unsupported delimiter {delimiter!r}")
+    if isinstance(value, dict):
+        yield from _object(value, 0, delimiter)
+    elif isinstance(value, list):
+        yield from _array("", value, 0, delimiter)
+    else:
+        yield _primitive(value, delimiter)
+
+
+def encode(value, delimiter: str = ",") -> str:
+    """Encode a JSON-compatible value as a TOON string."""
+    return "\n".join(iter_encode(value, delimiter))
+
+
+def encode_stream(value, dst, delimiter: str = ",") -> None:
+    """Write the TOON encoding of value to a text file object, line by line."""
+    for line in iter_encode(value, delimiter):
+        dst.write(line)
+        dst.write("\n")
+
+
+# ------------------ Decoding ------------------
+
+class _Lines:
+    """Cursor over (line number, depth, content) for non-blank lines of a file object."""
+
+    def __init__(self, src):
+        self.src = iter(src)
+        self.lineno = 0
+        self.current = None
+        self._advance()
+
+    def _advance(self):
+        for raw in self.src:
+            self.lineno += 1
+            line = raw.rstrip("\r\n")
+            content = line.lstrip(" ")
+            if not content:
+                continue
+            spaces = len(line) - len(content)
+            if content.startswith("\t") or spaces % len(INDENT):
+                raise self.error("Indentation must be a multiple of two spaces")
+            self.current = (self.lineno, spaces // len(INDENT), content)
+            return
+        self.current = None
+
+    def peek(self):
+        return self.current
+
+    def next(self):
+        current = self.current
+        self._advance()
+        return current
+
+    def error(self, msg: str, lineno: int = None) -> ValueError:
+        return ValueError(f"{msg}: line {lineno or self.lineno}")
+
+
+def _read_quoted(text: str, pos: int, lineno: int):
+    """Parse a quoted string starting at text[pos] == '"'; return (value, end)."""
+    out = []
+    i = pos + 1
+    while True:
+        match = _PLAIN_RUN.match(text, i)
+        out.append(match.group())
+        i = match.end()
+        ch = text[i:i + 1]
+        if ch == '"':
+            return "".join(out), i + 1
+        if not ch:
+            raise ValueError(f"Unterminated string: line {lineno}")
+        esc = _UNESCAPES.get(text[i + 1:i + 2])
+        if esc is None:
+            raise ValueError(f"Invalid escape in string: line {lineno}")
+        out.append(esc)
+        i += 2
+
+
+def _parse_primitive(token: str, lineno: int):
+    token = token.strip()
+    if token.startswith('"'):
+        value, end = _read_quoted(token, 0, lineno)
+        if end != len(token):
+            raise ValueError(f"Unexpected text after string: line {lineno}")
+        return value
+    if token == "true":
+        return True
+    if token == "false":
+        return False
+    if token == "null":
+        return None
+    match = _NUMBER.match(token)
+    if match:
+        return float(token) if match.group(1) or match.group(2) else int(token)
+    return token
+
+
+def _split_values(text: str, delimiter: str, lineno: int) -> list:
+    """Split a delimited row, keeping delimiters inside quoted strings."""
+    if '"' not in text:
+        return text.split(delimiter)
+    values, start, i = [], 0, 0
+    while i < len(text):
+        ch = text[i]
+        if ch == '"':
+            _, i = _read_quoted(text, i, lineno)
+            continue
+        if ch == delimiter:
+            values.append(text[start:i])
+            start = i + 1
+        i += 1
+    values.append(text[start:])
+    return values
+
+
+def _parse_header(content: str, pos: int, lineno: int):
+    """Parse [N<delim>]{fields} at content[pos]; return (length, delimiter, fields, end)."""
+    match = _HEADER.match(content, pos)
+    if match is None:
+        raise ValueError(f"Invalid array header: line {lineno}")
+    length = int(match.group(1))
+    delimiter = match.group(2) or ","
+    pos = match.end()
+    fields = None
+    if content.startswith("{", pos):
+        end = pos + 1
+        while end < len(content) and content[end] != "}":
+            end = _read_quoted(content, end, lineno)[1] if content[end] == '"' else end + 1
+        if end >= len(content):
+            raise ValueError(f"Unterminated field list: line {lineno}")
+        fields = [_parse_key(f.strip(), lineno) for f in _split_values(content[pos + 1:end], delimiter, lineno)]
+        pos = end + 1
+    return length, delimiter, fields, pos
+
+
+def _parse_key(text: str, lineno: int) -> str:
+    if text.startswith('"'):
+        return _read_quoted(text, 0, lineno)[0]
+    return text
+
+
+def _split_key_line(content: str, lineno: int):
+    """(key, header, rest) for 'key[...]: rest' lines, or None if content is not one."""
+    if content.startswith('"'):
+        key, pos = _read_quoted(content, 0, lineno)
+    else:
+        pos = 0
+        while pos < len(content) and content[pos] not in ":[":
+            pos += 1
+        if pos == len(content):
+            return None
+        key = content[:pos].rstrip()
+        if not key:
+            return None
+    header = None
+    if content.startswith("[", pos):
+        length, delimiter, fields, pos = _parse_header(content, pos, lineno)
+        header = (length, delimiter, fields)
+    if not content.startswith(":", pos):
+        return None
+    return key, header, content[pos + 1:].strip()
+
+
+def _parse_object(lines: _Lines, depth: int, obj: dict = None) -> dict:
+    obj = {} if obj is None else obj
+    while True:
+        current = lines.peek()
+        if current is None or current[1] < depth:
+            return obj
+        lineno, line_depth, content = current
+        if line_depth > depth:
+            raise lines.error("Unexpected indentation", lineno)
+        if content == "-" or content.startswith("- "):
+            return obj
+        lines.next()
+        parsed = _split_key_line(content, lineno)
+        if parsed is None:
+            raise lines.error("Expected 'key: value'", lineno)
+        key, header, rest = parsed
+        obj[key] = _parse_value(lines, header, rest, depth, lineno)
+
+
+def _parse_value(lines: _Lines, header, rest: str, depth: int, lineno: int):
+    """Value of a field (or array item) whose line sits at depth."""
+    if header is not None:
+        return _parse_array(lines, header, rest, depth, lineno)
+    if rest:
+        return _parse_primitive(rest, lineno)
+    return _parse_object(lines, depth + 1)
+
+
+def _parse_array(lines: _Lines, header, rest: str, depth: int, lineno: int) -> list:
+    length, delimiter, fields = header
+    if fields is not None:
+        rows = []
+        for _ in range(length):
+            current = lines.next()
+            if current is None or current[1] != depth + 1:
+                raise lines.error(f"Expected {length} table rows", lineno)
+            values = _split_values(current[2], delimiter, current[0])
+            if len(values) != len(fields):
+                raise lines.error(f"Expected {len(fields)} values in row", current[0])
+            rows.append({f: _parse_primitive(v, current[0]) for f, v in zip(fields, values)})
+        return rows
+    if rest:
+        values = [_parse_primitive(v, lineno) for v in _split_values(rest, delimiter, lineno)]
+        if len(values) != length:
+            raise lines.error(f"Expected {length} values, found {len(values)}", lineno)
+        return values
+    items = []
+    for _ in range(length):
+        current = lines.peek()
+        if current is None or current[1] != depth + 1 or not (
+                current[2] == "-" or current[2].startswith("- ")):
+            raise lines.error(f"Expected {length} list items", lineno)
+        lines.next()
+        items.append(_parse_item(lines, current[2][2:], depth + 1, current[0]))
+    return items
+
+
+def _parse_item(lines: _Lines, content: str, depth: int, lineno: int):
+    """Value of a '- content' list item whose hyphen sits at depth."""
+    if not content:
+        return {}
+    if content.startswith("["):
+        length, delimiter, fields, pos = _parse_header(content, 0, lineno)
+        if not content.startswith(":", pos):
+            raise lines.error("Expected ':' after array header", lineno)
+        return _parse_array(lines, (length, delimiter, fields), content[pos + 1:].strip(), depth, lineno)
+    parsed = _split_key_line(content, lineno)
+    if parsed is None:
+        return _parse_primitive(content, lineno)
+    key, header, rest = parsed
+    # The first field sits on the hyphen line; the others line up under it.
+    obj = {key: _parse_value(lines, header, rest, depth + 1, lineno)}
+    return _parse_object(lines, depth + 1, obj)
+
+
+def decode_stream(src):
+    """Decode a TOON document read line by line from a text file object."""
+    lines = _Lines(src)
+    first = lines.peek()
+    if first is None:
+        return {}
+    lineno, depth, content = first
+    if depth:
+        raise lines.error("Unexpected indentation", lineno)
+    if content.startswith("["):
+        lines.next()
+        length, delimiter, fields, pos = _parse_header(content, 0, lineno)
+        if not content.startswith(":", pos):
+            raise lines.error("Expected ':' after array header", lineno)
+        value = _parse_array(lines, (length, delimiter, fields), content[pos + 1:].strip(), 0, lineno)
+    elif _split_key_line(content, lineno) is not None:
+        value = _parse_object(lines, 0)
+    else:
+        lines.next()
+        value = _parse_primitive(content, lineno)
+    if lines.peek() is not None:
+        raise lines.error("Unexpected content after document", lines.peek()[0])
+    return value
+
+
+def decode(text: str):
+    """Decode a TOON string into Python values."""
+    return decode_stream(io.StringIO(text))
@@ -0,0 +1,259 @@
+"""Timing spans for the hot path, Chrome trace export and one-shot profiling.
+
+A ``Trace`` collects the spans of one Streamlit script run: upload
+decoding, parsing, formatting, validation, ``st.code`` rendering and the
+tree viewer. It is bound to the running thread with ``bind()`` or
+``activate()``, and jobs.py carries it into the background jobs a run
+submits, so their spans land in the trace of the run that started them.
+
+With no active trace (the default), ``span()`` returns a shared no-op
+object after one context-variable lookup, and ``traced`` functions call
+straight through, so the instrumentation costs next to nothing.
+
+A trace can also carry a ``Capture`` request: the next ``capture=True``
+span that runs records a cProfile or tracemalloc report for that one
+request only. Calls that run in isolation.py workers are timed from this
+process; their internals are not profiled.
+
+Sizes are ``len()`` of the values passed in and out: bytes for bytes,
+characters for text.
+"""
+
+import contextlib
+import contextvars
+import functools
+import io
+import os
+import threading
+import time
+
+PROFILE_LINES = 30
+
+_current = contextvars.ContextVar("neatify_trace", default=None)
+
+
+def _size(value):
+    return len(value) if isinstance(value, (str, bytes, bytearray)) else None
+
+
+class Capture:
+    """A request to profile the next capturing span ("cprofile" or "tracemalloc")."""
+
+    def __init__(self, mode: str):
+        if mode not in ("cprofile", "tracemalloc"):
+            raise ValueError(f"Unknown capture mode: {mode}")
+        self.mode = mode
+        self.span = None          # name of the span that was profiled
+        self.report = None        # text report, once taken
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.report is not None
+
+    def claim(self, name: str) -> bool:
+        """True for the first span to ask; later spans are not profiled."""
+        with self._lock:
+            if self.span is not None:
+                return False
+            self.span = name
+            return True
+
+
+class Trace:
+    """Spans recorded during one script run (and the jobs it submitted)."""
+
+    def __init__(self, label: str, capture: Capture = None):
+        self.label = label
+        self.capture = capture
+        self.created = time.time()
+        self.origin = time.perf_counter_ns()
+        self.events = []          # (name, start ns, duration ns, thread id, args)
+        self._threads = {}
+
+    def add(self, name: str, start: int, duration: int, args: dict):
+        thread = threading.current_thread()
+        self._threads[thread.ident] = thread.name
+        self.events.append((name, start - self.origin, duration, thread.ident, args))
+
+    def breakdown(self) -> list:
+        """One row per span in start order, for a table."""
+        rows = []
+        for name, start, duration, ident, args in sorted(self.events, key=lambda e: e[1]):
+            row = {"stage": name, "start ms": round(start / 1e6, 2), "ms": round(duration / 1e6, 2),
+                   "in": args.get("in"), "out": args.get("out"),
+                   "thread": self._threads.get(ident, str(ident))}
+            if args.get("in") and duration:
+                row["MB/s"] = round(args["in"] / (1 << 20) / (duration / 1e9), 2)
+            row.update((k, v) for k, v in args.items() if k not in ("in", "out"))
+            rows.append(row)
+        return rows
+
+    def chrome_events(self, pid: int) -> list:
+        """Chrome trace "complete" events, plus process/thread name metadata."""
+        created = time.strftime("%H:%M:%S", time.localtime(self.created))
+        events = [{"name": "process_name", "ph": "M", "pid": pid,
+                   "args": {"name": f"{self.label} @ {created}"}}]
+        events += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": ident, "args": {"name": name}}
+                   for ident, name in self._threads.items()]
+        events += [{"name": name, "cat": name.partition(".")[0], "ph": "X", "pid": pid, "tid": ident,
+                    "ts": start / 1e3, "dur": duration / 1e3, "args": args}
+                   for name, start, duration, ident, args in self.events]
+        return events
+
+
+def chrome_trace(traces) -> dict:
+    """A Chrome/Perfetto trace document with one "process" per trace."""
+    events = []
+    for pid, trace in enumerate(traces, 1):
+        events.extend(trace.chrome_events(pid))
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+# ------------------ Spans ------------------
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NOOP = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("trace", "name", "args", "capture", "start", "_profiler", "_started_tracemalloc")
+
+    def __init__(self, trace: Trace, name: str, args: dict, capture: bool):
+        self.trace = trace
+        self.name = name
+        self.args = args
+        self.capture = capture and trace.capture is not None and trace.capture.claim(name)
+        self._profiler = None
+        self._started_tracemalloc = False
+
+    def set(self, **args):
+        """Attach values (e.g. out=len(result)) to the span."""
+        self.args.update(args)
+
+    def __enter__(self):
+        if self.capture:
+            self.args["profiled"] = self.trace.capture.mode   # timings include profiler overhead
+            self._start_capture()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        if self.capture:
+            self._stop_capture()
+        self.trace.add(self.name, self.start, end - self.start, self.args)
+        return False
+
+    def _start_capture(self):
+        if self.trace.capture.mode == "cprofile":
+            import cProfile
+            self._profiler = cProfile.Profile()
+            try:
+                self._profiler.enable()
+            except ValueError:  # another profiler is active in this thread
+                self._profiler = None
+        else:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            tracemalloc.reset_peak()
+
+    def _stop_capture(self):
+        capture = self.trace.capture
+        if capture.mode == "cprofile":
+            if self._profiler is None:
+                capture.report = "cProfile could not start (another profiler is active)."
+                return
+            self._profiler.disable()
+            import pstats
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+            capture.report = f"cProfile of {self.name}\n{out.getvalue()}"
+        else:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            lines = [f"tracemalloc of {self.name}: peak {peak / (1 << 20):.2f} MB, "
+                     f"still allocated {current / (1 << 20):.2f} MB", ""]
+            lines += [str(stat) for stat in snapshot.statistics("lineno")[:PROFILE_LINES]]
+            capture.report = "\n".join(lines)
+
+
+def span(name: str, value=None, capture: bool = False, **args):
+    """Context manager timing a stage of the active trace (no-op without one).
+
+    value, if given, is the stage's input; its size is recorded as "in".
+    capture=True lets a pending Capture profile this span.
+    """
+    trace = _current.get()
+    if trace is None:
+        return _NOOP
+    if value is not None:
+        args["in"] = _size(value)
+    return _Span(trace, name, args, capture)
+
+
+def traced(name: str = None, capture: bool = False):
+    """Decorator: time each call as a span, with the first argument's and result's sizes."""
+    def decorate(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _current.get()
+            if trace is None:
+                return func(*args, **kwargs)
+            with _Span(trace, label, {"in": _size(args[0]) if args else None}, capture) as s:
+                result = func(*args, **kwargs)
+                s.set(out=_size(result))
+                return result
+        return wrapper
+    return decorate
+
+
+def current() -> Trace:
+    """The active trace, or None."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def activate(trace: Trace):
+    """Make trace the active one for this thread (and contexts copied from it)."""
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+def bind(trace: Trace) -> Trace:
+    """Make trace (or None) the active one for this thread from now on.
+
+    For a Streamlit script run, which has no enclosing block. Streamlit
+    reruns a session in the same thread, so call this at the top of every
+    run; otherwise the previous run's trace stays active.
+    """
+    _current.set(trace)
+    return trace
+
+
+def enabled_by_env() -> bool:
+    return os.environ.get("NEATIFY_TRACE", "").lower() in ("1", "true", "yes")
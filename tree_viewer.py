@@ -1,7 +1,21 @@
 import streamlit as st
+import copy
 import json
-import yaml
+import pickle
+import re
+import sys
 import xml.etree.ElementTree as ET
+from itertools import islice
+import cache
+import jobs
+import tracing
+
+# Documents up to this size keep the fully expanded st.json view; larger
+# ones (and all XML) use the paged navigator, which only renders one node's
+# children at a time.
+SMALL_DOC_CHARS = 100_000
+PAGE_SIZE = 50
+VALUE_PREVIEW_CHARS = 200
 
 # Add a helper to inject larger fonts
 def set_tree_viewer_style():
@@ -11,7 +25,7 @@ def set_tree_viewer_style():
         .tree-viewer * {
             font-size: 18px !important;  /* Increase font size */
         }
-        .stJson { 
+        .stJson {
             font-size: 18px !important;  /* JSON/YAML viewer */
         }
         </style>
@@ -24,38 +38,237 @@ def render_json_yaml(data):
     set_tree_viewer_style()
     st.json(data)
 
-def render_xml_interactive(element):
-    """Interactive XML viewer using tabs for children."""
+# ---------------- Paths ----------------
+
+_JSONPATH_TOKEN = re.compile(r"""\.([^.\[\]]+)|\[(\d+)\]|\[(['"])(.*?)\3\]""")
+
+def parse_jsonpath(expr):
+    """Parse a simple JSONPath ($.a.b[0]['c d']) into a list of keys/indexes."""
+    expr = expr.strip()
+    if expr.startswith("$"):
+        expr = expr[1:]
+    steps, pos = [], 0
+    while pos < len(expr):
+        m = _JSONPATH_TOKEN.match(expr, pos)
+        if m is None:
+            raise ValueError(f"Unsupported JSONPath near '{expr[pos:]}'")
+        if m.group(1) is not None:
+            steps.append(m.group(1))
+        elif m.group(2) is not None:
+            steps.append(int(m.group(2)))
+        else:
+            steps.append(m.group(4))
+        pos = m.end()
+    return steps
+
+def resolve_path(root, steps):
+    """Walk a parsed JSON/YAML value or an XML element along steps."""
+    node = root
+    for step in steps:
+        if isinstance(node, ET.Element):
+            node = node[step]
+        elif isinstance(node, dict):
+            node = node[step]
+        elif isinstance(node, list):
+            node = node[int(step)]
+        else:
+            raise KeyError(step)
+    return node
+
+def xpath_to_steps(root, expr):
+    """Find the first element matching an XPath (ElementTree subset) and return its child-index path."""
+    expr = expr.strip()
+    if expr.startswith("//"):
+        expr = "." + expr
+    elif expr.startswith("/"):
+        first, _, rest = expr[1:].partition("/")
+        if first not in (root.tag, "*"):
+            raise ValueError(f"Root element is <{root.tag}>, not <{first}>")
+        if not rest:
+            return []
+        expr = "./" + rest
+    target = root.find(expr)
+    if target is None:
+        raise ValueError(f"No element matches {expr}")
+    # Parent links are only built when a jump needs them.
+    parents = {child: parent for parent in root.iter() for child in parent}
+    steps = []
+    while target is not root:
+        parent = parents[target]
+        steps.append(list(parent).index(target))
+        target = parent
+    return steps[::-1]
+
+# ---------------- Lazy navigator ----------------
+
+def _preview(value):
+    text = json.dumps(value, ensure_ascii=False, default=str)
+    return text if len(text) <= VALUE_PREVIEW_CHARS else text[:VALUE_PREVIEW_CHARS] + "…"
+
+def _size_label(node):
+    if isinstance(node, dict):
+        return f"{{…}} {len(node)} keys"
+    if isinstance(node, list):
+        return f"[…] {len(node)} items"
+    return f"<{node.tag}> {len(node)} children"
+
+def _is_container(node):
+    return isinstance(node, (dict, list)) or (isinstance(node, ET.Element) and len(node))
+
+def _children(node, start, stop):
+    """(label, step, child) triples for one page of a node's children."""
+    if isinstance(node, dict):
+        return [(str(k), k, v) for k, v in islice(node.items(), start, stop)]
+    if isinstance(node, list):
+        return [(f"[{i}]", i, v) for i, v in zip(range(start, stop), node[start:stop])]
+    return [(f"{child.tag}[{i}]", i, child) for i, child in zip(range(start, stop), node[start:stop])]
+
+def _set_path(steps):
+    st.session_state.tree_path = list(steps)
+    st.session_state.tree_page = 1
+
+def _jump(root, fmt_type):
+    expr = st.session_state.get("tree_jump", "").strip()
+    if not expr:
+        return
+    try:
+        if fmt_type == "XML":
+            steps = xpath_to_steps(root, expr)
+        else:
+            steps = parse_jsonpath(expr)
+        resolve_path(root, steps)
+        _set_path(steps)
+        st.session_state.tree_jump_error = ""
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        st.session_state.tree_jump_error = f"Cannot jump to {expr}: {e}"
+
+def render_lazy_tree(root, fmt_type, doc_key):
+    """Navigator that renders only the current node's children, one page at a time."""
     set_tree_viewer_style()
-    st.markdown(f"**Tag:** `{element.tag}`", unsafe_allow_html=True)
-    if element.attrib:
-        st.write("Attributes:", element.attrib)
-    if element.text and element.text.strip():
-        st.write("Text:", element.text.strip())
-
-    children = list(element)
-    if children:
-        tab_labels = [child.tag for child in children]
-        tabs = st.tabs(tab_labels)
-        for tab, child in zip(tabs, children):
-            with tab:
-                render_xml_interactive(child)
-
-def show_tree(raw_text, fmt_type):
-    """Entry point: parse and render tree based on format type."""
+    if st.session_state.get("tree_doc") != doc_key:
+        st.session_state.tree_doc = doc_key
+        _set_path([])
+
+    st.text_input(
+        "Jump to " + ("XPath (e.g. /root/item[3])" if fmt_type == "XML" else "JSONPath (e.g. $.items[3].name)"),
+        key="tree_jump", on_change=_jump, args=(root, fmt_type)
+    )
+    if st.session_state.get("tree_jump_error"):
+        st.warning(st.session_state.tree_jump_error)
+
+    steps = st.session_state.get("tree_path", [])
     try:
-        set_tree_viewer_style()
-        if fmt_type == "JSON":
-            data = json.loads(raw_text)
-            render_json_yaml(data)
-        elif fmt_type == "YAML":
-            data = yaml.safe_load(raw_text)
-            render_json_yaml(data)
-        elif fmt_type == "XML":
-            root = ET.fromstring(raw_text)
-            st.subheader("🌳 XML Tree Viewer")
-            render_xml_interactive(root)
+        node = resolve_path(root, steps)
+    except (KeyError, IndexError, TypeError):
+        steps, node = [], root
+        _set_path(steps)
+
+    # Breadcrumb: one button per ancestor.
+    crumbs = ["$" if fmt_type != "XML" else root.tag] + [str(s) for s in steps]
+    cols = st.columns(min(len(crumbs), 8))
+    for depth, label in list(enumerate(crumbs))[-8:]:
+        cols[depth - max(len(crumbs) - 8, 0)].button(
+            label, key=f"tree_crumb_{depth}", on_click=_set_path, args=(steps[:depth],))
+
+    if isinstance(node, ET.Element):
+        st.markdown(f"**Tag:** `{node.tag}`")
+        if node.attrib:
+            st.write("Attributes:", node.attrib)
+        if node.text and node.text.strip():
+            st.write("Text:", node.text.strip()[:VALUE_PREVIEW_CHARS])
+    if not _is_container(node):
+        if not isinstance(node, ET.Element):
+            st.code(_preview(node), language="json")
+        return
+
+    total = len(node)
+    pages = max((total - 1) // PAGE_SIZE + 1, 1)
+    page = 1
+    if pages > 1:
+        if st.session_state.get("tree_page", 1) > pages:
+            st.session_state.tree_page = 1
+        page = st.number_input(f"Page (of {pages}, {total} children)", min_value=1,
+                               max_value=pages, step=1, key="tree_page")
+    start = (page - 1) * PAGE_SIZE
+    for i, (label, step, child) in enumerate(_children(node, start, start + PAGE_SIZE)):
+        if _is_container(child):
+            st.button(f"▸ {label}  ·  {_size_label(child)}", key=f"tree_child_{i}",
+                      on_click=_set_path, args=(steps + [step],))
+        elif isinstance(child, ET.Element):
+            text = (child.text or "").strip()
+            attrs = " ".join(f'{k}="{v}"' for k, v in child.attrib.items())
+            st.markdown(f"`<{child.tag}{' ' + attrs if attrs else ''}>` {text[:VALUE_PREVIEW_CHARS]}")
+        else:
+            st.markdown(f"**{label}**: `{_preview(child)}`")
+
+# ---------------- Entry point ----------------
+
+class Parsed:
+    """A parsed document as shared through the result cache by every session.
+
+    Sessions render their own copy(), never the shared object. JSON and YAML
+    are held pickled (unpickling costs about as much as json.loads and far
+    less than YAML parsing); XML is held as the element tree, which copies
+    faster than it pickles. nbytes is the memory held, for the cache budget.
+    """
+
+    def __init__(self, fmt_type, data):
+        if fmt_type == "XML":
+            self.root, self.blob = data, None
+            self.nbytes = sum(sys.getsizeof(e) + sys.getsizeof(e.attrib) + sys.getsizeof(e.text)
+                              + sys.getsizeof(e.tail) for e in data.iter())
         else:
+            self.root, self.blob = None, pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+            self.nbytes = len(self.blob)
+
+    def copy(self):
+        return copy.deepcopy(self.root) if self.blob is None else pickle.loads(self.blob)
+
+def _loader(fmt_type):
+    if fmt_type == "JSON":
+        return json.loads, ""
+    if fmt_type == "YAML":
+        import yaml_stream
+        # Multi-document streams show as a list of their documents.
+        return yaml_stream.load, f"{yaml_stream.yaml.__version__}-{yaml_stream.ENGINE}"
+    return ET.fromstring, ""
+
+def parse(raw_text, fmt_type):
+    """Parse raw_text into a Parsed snapshot."""
+    func, _ = _loader(fmt_type)
+    return Parsed(fmt_type, func(raw_text))
+
+def _parse(raw_text, fmt_type):
+    return cache.cached(f"tree:{fmt_type}", parse, raw_text, fmt_type, version=_loader(fmt_type)[1])
+
+def parse_job(raw_text, fmt_type):
+    """Parse in the background; pass the job to show_tree once it is done."""
+    return jobs.submit(f"tree:{fmt_type}", parse, raw_text, fmt_type, version=_loader(fmt_type)[1])
+
+def show_tree(raw_text, fmt_type, job=None):
+    """Entry point: parse (or take the finished parse_job's result) and render the tree."""
+    try:
+        set_tree_viewer_style()
+        if fmt_type not in ("JSON", "YAML", "XML"):
             st.warning("Tree view not supported for this format.")
+            return
+        # The parse is cached by content hash; this session keeps its own
+        # copy, so reruns (page changes, node clicks) reuse it.
+        doc_key = cache.make_key(fmt_type, (raw_text,), {})
+        held = st.session_state.get("tree_data")
+        if held is None or held[0] != doc_key:
+            with tracing.span("tree.parse", raw_text, format=fmt_type):
+                parsed = job.result() if job is not None else _parse(raw_text, fmt_type)
+                held = st.session_state.tree_data = (doc_key, parsed.copy())
+        data = held[1]
+        with tracing.span("tree.render", raw_text, capture=True) as span:
+            if fmt_type == "XML":
+                st.subheader("🌳 XML Tree Viewer")
+            if fmt_type != "XML" and len(raw_text) <= SMALL_DOC_CHARS:
+                span.set(mode="full")
+                render_json_yaml(data)
+            else:
+                span.set(mode="paged")
+                render_lazy_tree(data, fmt_type, doc_key)
     except Exception as e:
-        st.error(f"Error building tree: {e}")
\ No newline at end of file
+        st.error(f"Error building tree: {e}")
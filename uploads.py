@@ -0,0 +1,191 @@
+"""Uploads spooled to a temporary file, memory-mapped and decoded on demand.
+
+``spool()`` copies an upload (a Streamlit ``UploadedFile`` or any binary
+file object) in CHUNK-sized pieces, hashing it on the way. Uploads up to
+MEMORY_BYTES stay in memory. Larger ones go to an anonymous temporary
+file that is memory-mapped, so their bytes live in the page cache rather
+than in the process. Nothing is decoded until it is asked for:
+
+* ``open_text()`` is a text reader over the bytes, for streaming formatters.
+* ``preview()`` decodes only the head.
+* ``text()`` decodes everything into one ``str``, for backends that need one.
+
+The encoding is detected chunk by chunk, never on a whole-file string. A
+BOM wins (UTF-8, UTF-16 or UTF-32). Otherwise the first candidate that
+decodes every chunk is used: UTF-8, then charset-normalizer's guess from
+the head (if installed), then cp1252, and latin-1, which accepts any bytes.
+
+Uploads over LARGE_BYTES are meant to skip the text area (see app.py).
+Sizes can be tuned with NEATIFY_UPLOAD_MEMORY_MB and NEATIFY_UPLOAD_LARGE_MB.
+"""
+
+import codecs
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+
+CHUNK = 1 << 20
+MEMORY_BYTES = int(float(os.environ.get("NEATIFY_UPLOAD_MEMORY_MB", 8)) * (1 << 20))
+LARGE_BYTES = int(float(os.environ.get("NEATIFY_UPLOAD_LARGE_MB", 5)) * (1 << 20))
+PREVIEW_CHARS = 20_000
+SNIFF_BYTES = 64 << 10
+
+# Longest first: the UTF-32-LE BOM starts with the UTF-16-LE one.
+BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+class _MappedRaw(io.RawIOBase):
+    """Seekable raw reader over a buffer (bytes or an mmap), without copying it."""
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self):
+        self._view.release()
+        super().close()
+
+
+class Upload:
+    """A spooled upload: size, SHA-256, detected encoding and readers over its bytes."""
+
+    def __init__(self, name: str, data, size: int, sha256: str, file=None):
+        self.name = name
+        self.size = size
+        self.sha256 = sha256
+        self._data = data            # bytes, or an mmap of file
+        self._file = file
+        self.bom, self.encoding = detect_encoding(data)
+
+    @property
+    def large(self) -> bool:
+        return self.size > LARGE_BYTES
+
+    @property
+    def on_disk(self) -> bool:
+        return self._file is not None
+
+    def __repr__(self) -> str:
+        # Content-addressed, so cache.make_key can key jobs on an Upload.
+        return f"Upload(sha256={self.sha256}, encoding={self.encoding})"
+
+    def open_binary(self) -> io.BufferedReader:
+        return io.BufferedReader(_MappedRaw(self._data), CHUNK)
+
+    def open_text(self) -> io.TextIOWrapper:
+        """Text reader (newline="", so line endings are kept as they are)."""
+        return io.TextIOWrapper(self.open_binary(), encoding=self.encoding, newline="")
+
+    def text(self) -> str:
+        with memoryview(self._data) as view:
+            return str(view, self.encoding)
+
+    def preview(self, chars: int = PREVIEW_CHARS) -> str:
+        """The first chars characters or so (a multi-byte character cut at the end is dropped)."""
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        with memoryview(self._data) as view:
+            return decoder.decode(view[:chars * 4 + len(BOMS[0][0])])[:chars]
+
+    def close(self):
+        """Release the mapping and the temporary file (readers still open keep it alive)."""
+        if self._file is None:
+            return
+        try:
+            self._data.close()
+        except BufferError:   # a reader still holds a view; the GC closes it later
+            pass
+        self._file.close()
+        self._file = None
+
+
+def _decodes(view: memoryview, encoding: str) -> bool:
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        for start in range(0, len(view), CHUNK):
+            decoder.decode(view[start:start + CHUNK])
+        decoder.decode(b"", final=True)
+    except (UnicodeDecodeError, LookupError):
+        return False
+    return True
+
+
+def _guess(sample: bytes):
+    try:
+        import charset_normalizer
+    except ImportError:
+        return None
+    match = charset_normalizer.from_bytes(sample).best()
+    return match.encoding if match is not None else None
+
+
+def detect_encoding(data) -> tuple:
+    """(BOM found, Python codec name) for bytes or an mmap, decoded chunk by chunk."""
+    with memoryview(data) as view:
+        head = bytes(view[:4])
+        for bom, encoding in BOMS:
+            if head.startswith(bom) and _decodes(view, encoding):
+                return True, encoding
+        if _decodes(view, "utf-8"):
+            return False, "utf-8"
+        for encoding in filter(None, [_guess(bytes(view[:SNIFF_BYTES])), "cp1252"]):
+            if _decodes(view, encoding):
+                return False, encoding
+        return False, "latin-1"
+
+
+def spool(src, name: str = "", memory_bytes: int = None) -> Upload:
+    """Copy a binary file object (from its current position) into an Upload.
+
+    The bytes stay in memory up to memory_bytes, and are memory-mapped from
+    a temporary file beyond that.
+    """
+    memory_bytes = MEMORY_BYTES if memory_bytes is None else memory_bytes
+    digest = hashlib.sha256()
+    head, file, size = bytearray(), None, 0
+    while True:
+        chunk = src.read(CHUNK)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+        if file is None and size <= memory_bytes:
+            head += chunk
+            continue
+        if file is None:
+            file = tempfile.TemporaryFile(prefix="neatify-upload-")
+            file.write(head)
+            head = None
+        file.write(chunk)
+    if file is None:
+        return Upload(name, bytes(head), size, digest.hexdigest())
+    file.flush()
+    data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return Upload(name, data, size, digest.hexdigest(), file)
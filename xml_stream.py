@@ -0,0 +1,182 @@
+"""Streaming XML pretty-printer.
+
+Feeds the input to expat incrementally and writes re-indented output from
+the SAX-style callbacks as it goes, so no DOM is ever built. Comments,
+CDATA sections, processing instructions, namespace prefixes/declarations
+and the DOCTYPE internal subset are kept as written; whitespace-only text
+between tags is replaced by the new indentation.
+"""
+
+import io
+import xml.parsers.expat
+
+CHUNK_SIZE = 1 << 16
+XML_DECL = '<?xml version="1.0" ?>\n'
+
+
+def _escape(data: str) -> str:
+    """Escape &, < and > in character data.
+
+    Local stand-in for xml.sax.saxutils.escape, which drags in urllib on import.
+    """
+    return data.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _attrs(attributes: list) -> str:
+    """Render expat's ordered [name, value, ...] attribute list."""
+    return "".join(
+        f' {attributes[i]}="{_escape(attributes[i + 1]).replace(chr(34), "&quot;")}"'
+        for i in range(0, len(attributes), 2)
+    )
+
+
+class _Indenter:
+    """Expat callbacks that emit indented markup into an output list."""
+
+    def __init__(self, indent: str):
+        self.indent = indent
+        self.out = [XML_DECL]
+        self.depth = 0
+        self.pending = None   # (name, attrs) of a start tag not written yet
+        self.content = []     # ("text" | "cdata", str) since the last tag
+        self.in_cdata = False
+        self.doctype = None   # pieces of a DOCTYPE with an internal subset, while in it
+
+    # --- helpers ---
+
+    def _line(self, markup: str) -> None:
+        self.out.append(self.indent * self.depth + markup + "\n")
+
+    def _render(self, kind: str, data: str) -> str:
+        return f"<![CDATA[{data}]]>" if kind == "cdata" else _escape(data)
+
+    def _flush(self) -> None:
+        """Write any held start tag and the text collected after it."""
+        if self.pending is not None:
+            name, attrs = self.pending
+            self._line(f"<{name}{attrs}>")
+            self.depth += 1
+            self.pending = None
+        for kind, data in self.content:
+            if kind == "cdata":
+                self._line(self._render(kind, data))
+            elif data.strip():
+                self._line(self._render(kind, data.strip()))
+        self.content = []
+
+    # --- expat handlers ---
+
+    def start_element(self, name, attributes):
+        self._flush()
+        self.pending = (name, _attrs(attributes))
+
+    def end_element(self, name):
+        if self.pending is not None:
+            _, attrs = self.pending
+            self.pending = None
+            if not any(kind == "cdata" or data.strip() for kind, data in self.content):
+                self._line(f"<{name}{attrs}/>")
+            else:
+                body = "".join(self._render(kind, data) for kind, data in self.content)
+                self._line(f"<{name}{attrs}>{body}</{name}>")
+            self.content = []
+            return
+        self._flush()
+        self.depth -= 1
+        self._line(f"</{name}>")
+
+    def character_data(self, data):
+        if self.in_cdata:
+            kind, text = self.content[-1]
+            self.content[-1] = (kind, text + data)
+        elif self.content and self.content[-1][0] == "text":
+            self.content[-1] = ("text", self.content[-1][1] + data)
+        else:
+            self.content.append(("text", data))
+
+    def start_cdata(self):
+        self.in_cdata = True
+        self.content.append(("cdata", ""))
+
+    def end_cdata(self):
+        self.in_cdata = False
+
+    def comment(self, data):
+        if self.doctype is not None:
+            self.doctype.append(f"<!--{data}-->")
+            return
+        self._flush()
+        self._line(f"<!--{data}-->")
+
+    def processing_instruction(self, target, data):
+        markup = f"<?{target} {data}?>" if data else f"<?{target}?>"
+        if self.doctype is not None:
+            self.doctype.append(markup)
+            return
+        self._flush()
+        self._line(markup)
+
+    def start_doctype(self, name, sysid, pubid, has_internal_subset):
+        if pubid:
+            decl = f'<!DOCTYPE {name} PUBLIC "{pubid}" "{sysid}"'
+        elif sysid:
+            decl = f'<!DOCTYPE {name} SYSTEM "{sysid}"'
+        else:
+            decl = f"<!DOCTYPE {name}"
+        if has_internal_subset:
+            self.doctype = [decl + " ["]
+        else:
+            self._line(decl + ">")
+
+    def default(self, data):
+        # expat hands the internal subset's declarations, as written, to the
+        # default handler; everything else it sends here is dropped.
+        if self.doctype is not None:
+            self.doctype.append(data)
+
+    def end_doctype(self):
+        if self.doctype is not None:
+            self._line("".join(self.doctype) + "]>")
+            self.doctype = None
+
+
+def _make_parser(handler: _Indenter):
+    parser = xml.parsers.expat.ParserCreate()
+    parser.ordered_attributes = True
+    parser.buffer_text = True
+    parser.StartElementHandler = handler.start_element
+    parser.EndElementHandler = handler.end_element
+    parser.CharacterDataHandler = handler.character_data
+    parser.StartCdataSectionHandler = handler.start_cdata
+    parser.EndCdataSectionHandler = handler.end_cdata
+    parser.CommentHandler = handler.comment
+    parser.ProcessingInstructionHandler = handler.processing_instruction
+    parser.StartDoctypeDeclHandler = handler.start_doctype
+    parser.EndDoctypeDeclHandler = handler.end_doctype
+    parser.DefaultHandlerExpand = handler.default
+    return parser
+
+
+def iter_format(src, indent: int = 4, chunk_size: int = CHUNK_SIZE):
+    """Yield re-indented XML in pieces while reading src (text or binary file)."""
+    handler = _Indenter(" " * indent)
+    parser = _make_parser(handler)
+    while True:
+        chunk = src.read(chunk_size)
+        parser.Parse(chunk, not chunk)
+        if handler.out:
+            yield "".join(handler.out)
+            handler.out.clear()
+        if not chunk:
+            break
+
+
+def format_stream(src, dst, indent: int = 4, chunk_size: int = CHUNK_SIZE) -> None:
+    """Re-indent XML from src into dst."""
+    for piece in iter_format(src, indent=indent, chunk_size=chunk_size):
+        dst.write(piece)
+
+
+def format_text(text: str, indent: int = 4) -> str:
+    """Re-indent an XML string with the streaming pipeline."""
+    return "".join(iter_format(io.StringIO(text), indent=indent))
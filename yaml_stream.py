@@ -0,0 +1,195 @@
+"""Multi-document YAML: libyaml-accelerated, one document at a time.
+
+Loading and dumping use libyaml's ``CSafeLoader``/``CSafeDumper`` when
+PyYAML was built with it, and the pure-Python safe classes otherwise.
+Bundles of ``---``-separated documents (Kubernetes manifests, for example)
+are formatted document by document, so a stream never holds more than one
+parsed document.
+
+For parallel work the text is cut into batches of whole documents.
+A ``---`` marker at column 0 always starts a new document, and so do the
+``%`` directive lines just before it. Documents share no state (anchors
+and tags are per document), so each batch can be formatted or linted on
+its own. ``format_text`` and ``lint`` take a ``call(target, *args)``
+function, such as ``isolation.call``, and run every batch through it (from
+a few threads when there are several), a single batch included. Without
+one, batches run in-process one after another.
+
+Lint problems are reported with lines from the original text. Settings
+that yamllint resolves per file are resolved before the split:
+
+* ``indentation: {spaces: consistent}`` is fixed to the width of the
+  first indented block.
+* A batch other than the last is linted with a ``---`` line appended, so
+  blank lines before the next document are not taken for the end of the file.
+* Text with ``# yamllint disable``/``enable`` directives is linted whole,
+  since those directives carry state across documents.
+
+Each batch reports its own first syntax error. A whole-file lint reports
+only one.
+"""
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+
+LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+ENGINE = "libyaml" if LOADER is not yaml.SafeLoader else "python"
+
+BATCH_CHARS = 256 << 10    # largest batch of documents sent to one call
+MIN_BATCH_CHARS = 16 << 10
+LINT_CONFIG = "extends: default"
+
+_MARKER = re.compile(r"^---(?=[ \t\r\n]|$)", re.M)
+_TOGGLE = re.compile(r"^\s*#\s*yamllint (disable|enable)(?!-)", re.M)
+
+
+# ------------------ Load / dump ------------------
+
+def iter_load(src):
+    """Yield the documents of a YAML string or text file object, one at a time."""
+    return yaml.load_all(src, Loader=LOADER)
+
+
+def load(text: str):
+    """The document in text, or a list of its documents when there are several."""
+    documents = list(iter_load(text))
+    if len(documents) == 1:
+        return documents[0]
+    return documents or None
+
+
+def dump(document, indent: int = 4) -> str:
+    return yaml.dump(document, Dumper=DUMPER, sort_keys=False, indent=indent)
+
+
+def iter_format(src, indent: int = 4):
+    """Yield the formatted text of each document, with "---" between documents."""
+    count = 0
+    for count, document in enumerate(iter_load(src), 1):
+        yield ("---\n" if count > 1 else "") + dump(document, indent)
+    if count == 0:
+        yield dump(None, indent)   # an empty stream formats like safe_load("") did
+
+
+def format_stream(src, dst, indent: int = 4) -> None:
+    for piece in iter_format(src, indent):
+        dst.write(piece)
+
+
+# ------------------ Batches ------------------
+
+def split_points(text: str) -> list:
+    """Offsets [0, ..., len(text)] of every document start (directives included)."""
+    points = [0]
+    for match in _MARKER.finditer(text):
+        start = match.start()
+        # Directive lines right above the marker belong to its document.
+        while start > 0:
+            line = text.rfind("\n", 0, start - 1) + 1
+            if not text.startswith("%", line):
+                break
+            start = line
+        if start > points[-1]:
+            points.append(start)
+    if len(text) > points[-1]:
+        points.append(len(text))
+    return points
+
+
+def batches(text: str, size: int = BATCH_CHARS) -> list:
+    """(first line, text) pieces of whole documents, each about size chars or less."""
+    points = split_points(text)
+    pieces, start, line = [], 0, 1
+    for end, following in zip(points[1:], points[2:] + [None]):
+        if following is not None and following - start <= size:
+            continue   # the next document still fits in this batch
+        piece = text[start:end]
+        pieces.append((line, piece))
+        line += piece.count("\n")
+        start = end
+    return pieces
+
+
+def _batch_size(text: str, workers: int) -> int:
+    return min(BATCH_CHARS, max(MIN_BATCH_CHARS, -(-len(text) // max(workers, 1))))
+
+
+def _map(target: str, jobs: list, call, workers: int) -> list:
+    """[func(*job) for job in jobs], through call(target, *job) when call is given."""
+    if call is None:
+        func = globals()[target.partition(":")[2]]
+        return [func(*job) for job in jobs]
+    if workers < 2 or len(jobs) < 2:
+        return [call(target, *job) for job in jobs]
+    with ThreadPoolExecutor(max_workers=min(workers, len(jobs)), thread_name_prefix="neatify-yaml") as pool:
+        return list(pool.map(lambda job: call(target, *job), jobs))
+
+
+def format_batch(text: str, indent: int = 4) -> list:
+    """Formatted text of each document in text (no separators)."""
+    return [dump(document, indent) for document in iter_load(text)]
+
+
+def format_text(text: str, indent: int = 4, call=None, workers: int = 1) -> str:
+    """Format every document in text; with call and workers > 1, batches in parallel."""
+    if call is None or workers < 2:
+        return "".join(iter_format(text, indent))
+    jobs = [(piece, indent) for _, piece in batches(text, _batch_size(text, workers))]
+    documents = [d for part in _map("yaml_stream:format_batch", jobs, call, workers) for d in part]
+    if not documents:
+        return dump(None, indent)
+    return "---\n".join(documents)
+
+
+# ------------------ Lint ------------------
+
+def indent_spaces(text: str):
+    """The indentation width yamllint's "consistent" setting locks onto, or None."""
+    from yamllint import parser
+    from yamllint.rules import indentation
+    conf = dict(indentation.DEFAULT, level="error")
+    context = {}
+    try:
+        for elem in parser.token_or_comment_generator(text):
+            if isinstance(elem, parser.Token):
+                for _ in indentation.check(conf, elem.curr, elem.prev, elem.next,
+                                           elem.nextnext, context):
+                    pass
+                if isinstance(context.get("spaces"), int):
+                    return context["spaces"]
+    except yaml.YAMLError:
+        pass
+    return None
+
+
+def lint_batch(text: str, first_line: int = 1, last: bool = True, spaces: int = None) -> list:
+    """yamllint problems in text as (line, column, level, description, rule) tuples."""
+    import yamllint.config
+    import yamllint.linter
+    source = LINT_CONFIG
+    if spaces is not None:
+        source += f"\nrules:\n  indentation:\n    spaces: {spaces}\n"
+    conf = yamllint.config.YamlLintConfig(source)
+    if last:
+        problems = list(yamllint.linter.run(text, conf))
+    else:
+        # A stand-in for the next document, so blank lines before it are
+        # checked as blank lines, not as the end of the file.
+        end = text.count("\n")
+        problems = [p for p in yamllint.linter.run(text + "---\n", conf) if p.line <= end]
+    return [(p.line + first_line - 1, p.column, p.level, p.desc, p.rule) for p in problems]
+
+
+def lint(text: str, call=None, workers: int = 1) -> list:
+    """Lint text document batch by batch; lines refer to text."""
+    pieces = batches(text, _batch_size(text, workers))
+    if len(pieces) < 2 or _TOGGLE.search(text) or re.match(r"#\s*yamllint disable-file\s*$",
+                                                          text.split("\n", 1)[0]):
+        jobs = [(text,)]
+    else:
+        spaces = indent_spaces(text)
+        jobs = [(piece, line, i == len(pieces) - 1, spaces) for i, (line, piece) in enumerate(pieces)]
+    return [p for part in _map("yaml_stream:lint_batch", jobs, call, workers) for p in part]